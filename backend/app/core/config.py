@@ -6,22 +6,82 @@ class Settings(BaseSettings):
     redis_host: str = "redis"
     redis_port: int = 6379
     redis_db: int = 0
+    redis_warm_connections: int = 4  # Connections each API worker opens at startup, before its first request
     
     # Selenium Configuration
     selenium_host: str = "selenium"  # Docker service name for Selenium container
     selenium_port: int = 4444  # External port mapped to Selenium container
     selenium_command_executor: str = "http://selenium:4444/wd/hub"  # Internal Selenium hub URL
+    webdriver_pool_size: int = 2  # Max concurrent WebDriver sessions per process
+    webdriver_pool_warm: int = 1  # Sessions created at startup
+    webdriver_max_uses: int = 50  # Leases before a session is recycled
+    webdriver_acquire_timeout: float = 30.0  # Seconds to wait for a free session
     
     # Book Scraper Configuration
     book_base_url: str = "https://books.toscrape.com/"
     max_books: int = 100
     min_books: int = 50
     max_price: float = 20.0
-    request_delay: float = 1.0
     request_timeout: int = 10
+    html_parser: str = "lxml"  # HTML parser backend: lxml, lxml-stream, selectolax or bs4
+    parse_workers: int = 2  # Processes used for HTML parsing, 0 parses on the event loop
+    book_storage: str = "json"  # Book record layout: json, hash or msgpack (needs the msgpack package)
+    store_batch_size: int = 50  # Books buffered by the scraper before one batched Redis write
+    store_flush_interval: float = 1.0  # Max seconds a scraped book waits in the buffer
+    catalogue_cache_books: int = 20000  # Books held by the in-process search cache of each API worker, 0 disables it
+    catalogue_cache_check_interval: float = 1.0  # Seconds between catalogue version checks backing the pub/sub invalidation
+    catalogue_gc_delay: float = 5.0  # Seconds a replaced catalogue version stays readable before it is deleted
+    incremental_scrape: bool = False  # Default mode for /init: refresh in place instead of a full re-crawl
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 
+    # Crawl Engine Configuration
+    crawl_workers: int = 8  # Concurrent workers pulling from the crawl queue
+    crawl_queue_size: int = 200  # Pages held in the crawl priority queue, further discoveries wait in an overflow heap
+    per_host_concurrency: int = 4  # Max in-flight requests to a single host
+    rate_limit_per_second: float = 5.0  # Token bucket refill rate per host
+    rate_limit_burst: int = 5  # Token bucket capacity per host
+
+    # HTTP Fetch Configuration
+    fetch_retries: int = 3  # Retries of a throttled, 5xx, timed out or failed request before the page counts as failed
+    fetch_backoff_base: float = 0.5  # Seconds; retry n waits a random delay of up to base * 2^n
+    fetch_backoff_max: float = 30.0  # Cap of a backoff delay and of an honoured Retry-After
+    fetch_min_concurrency: int = 1  # Floor of the adaptive per-host concurrency, per_host_concurrency is its ceiling
+    fetch_latency_target: float = 2.0  # Seconds; slower responses shrink a host's concurrency like errors do
+    breaker_failure_threshold: int = 5  # Consecutive failures that open a host's circuit breaker, 0 disables it
+    breaker_reset_timeout: float = 10.0  # Seconds an open breaker holds requests back before a trial request
+    http_max_connections: int = 20  # Connection pool size of the scraping client
+    http_max_keepalive_connections: int = 10  # Idle connections kept open for reuse
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    http2: bool = False  # Negotiate HTTP/2 with origins supporting it (needs the h2 package)
+
     hnews_site_url: str = "https://news.ycombinator.com/news"
+    hnews_backend: str = "http"  # http (plain HTTP + lxml) or selenium (remote browser)
+    hnews_selenium_fallback: bool = False  # Retry with Selenium when the HTTP backend finds no stories
+    hnews_selenium_extraction: str = "script"  # script (one execute_script per page) or elements (per-row lookups)
+    headlines_cache_ttl: int = 0  # Seconds headlines are served from cache, 0 disables caching
+    headlines_cache_stale: int = 60  # Extra seconds a stale entry is served while it is refreshed
+    headlines_cache_redis: bool = False  # Share cached headlines between workers through Redis
+    headlines_stream_interval: float = 30.0  # Seconds between the scrapes pushing changes to /headlines/stream clients
+    headlines_stream_pages: int = 1  # Pages scraped for the stream
+    headlines_stream_queue: int = 100  # Events buffered per stream client before a slow one is resynced with a snapshot
+    headlines_stream_keepalive: float = 15.0  # Seconds of silence before a keepalive comment is sent to stream clients
+
+    # Scrape Jobs Configuration
+    scrape_interval: int = 0  # Seconds between scrapes scheduled by the workers, 0 disables the schedule
+    scrape_if_empty: bool = True  # Workers queue a scrape at startup when no catalogue is stored
+    scrape_lock_ttl: int = 60  # Seconds the scrape lock outlives a worker that stopped renewing it
+    job_progress_interval: float = 1.0  # Seconds between progress updates (and lock renewals) of a running job
+    job_ttl: int = 86400  # Seconds a finished job stays readable
+    checkpoint_batch_size: int = 100  # Crawl progress changes buffered before one checkpoint write
+    checkpoint_ttl: int = 86400  # Seconds the checkpoint of an interrupted crawl is kept for resuming
+    distributed_crawl: bool = False  # Idle workers join the running scrape through a shared Redis frontier
+    crawl_lease_timeout: int = 60  # Seconds a claimed page stays leased before another worker may fetch it again
+
+    # API Configuration
+    fast_json_responses: bool = True  # Serialize trusted results directly (orjson when installed), splicing JSON records from Redis
+    response_compression_min_size: int = 500  # Responses from this many bytes are compressed per Accept-Encoding (brotli when installed, gzip), 0 disables it
+    metrics_enabled: bool = True  # Collect Prometheus metrics, served by the API at /metrics
+    worker_metrics_port: int = 0  # Port serving the metrics of a scrape worker, 0 disables it
 
     class Config:
         env_file = ".env"
@@ -1,18 +1,112 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from core.config import settings
-from services.scrape_book import BookScraper
-from services.scrape_hn import HackerNewsScraper
-from utils.schemas import BookSearchResponse, HeadlinesResponse, CategoriesResponse
-from utils.models import BookRepository
+from services.jobs import JobQueue
+from services.catalogue_cache import get_catalogue_cache, shutdown_catalogue_cache
+from services.headline_cache import get_headline_cache
+from services.headline_stream import get_headline_stream, shutdown_headline_stream
+from services.webdriver_pool import peek_webdriver_pool, shutdown_webdriver_pool
+from utils.book_codecs import BOOK_FIELDS
+from utils.compression import CompressionMiddleware
+from utils.fast_json import FastJSONResponse, dumps, json_object
+from utils.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from utils.models import RedisManager
+from utils.schemas import BookSearchResponse, Headline, HeadlinesResponse, CategoriesResponse, JobResponse
 import logging
 import asyncio
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Sequence, Union
 import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Headline scrapers shared by all requests, by backend
+_headline_scrapers: Dict[str, Any] = {}
+
+
+def selenium_enabled() -> bool:
+    """Whether any headline path may need a real browser"""
+    return settings.hnews_backend == "selenium" or settings.hnews_selenium_fallback
+
+
+def headline_scraper(backend: str):
+    """
+    Shared scraper of a headline backend, its module imported on first use:
+    workers serving only /books/* never load lxml or the selenium package.
+    """
+    scraper = _headline_scrapers.get(backend)
+    if scraper is None:
+        if backend == "selenium":
+            from services.scrape_hn import HackerNewsScraper
+            scraper = HackerNewsScraper()
+        else:
+            from services.scrape_hn_http import HackerNewsHttpScraper
+            scraper = HackerNewsHttpScraper()
+        _headline_scrapers[backend] = scraper
+    return scraper
+
+
+async def warm_headlines() -> None:
+    """Load the configured headline scrapers, open their client and warm the WebDriver pool"""
+    try:
+        if settings.hnews_backend == "http":
+            await asyncio.to_thread(headline_scraper, "http")
+            from services.scrape_hn_http import get_hn_client
+            get_hn_client()
+        if selenium_enabled():
+            scraper = await asyncio.to_thread(headline_scraper, "selenium")
+            await asyncio.to_thread(scraper.pool.warm, settings.webdriver_pool_warm)
+    except Exception as e:
+        logger.error(f"Failed to warm headline scrapers: {str(e)}")
+
+
+async def close_headline_scrapers() -> None:
+    """Close the WebDriver sessions and the Hacker News client of the headline scrapers"""
+    await asyncio.to_thread(shutdown_webdriver_pool)
+    if "http" in _headline_scrapers:
+        from services.scrape_hn_http import close_hn_client
+        await close_hn_client()
+    _headline_scrapers.clear()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the Redis connections and check the book indexes before serving;
+    a storage migration and the headline scrapers warm up behind the API.
+    Everything started here is stopped on shutdown.
+    """
+    try:
+        await RedisManager().warm(settings.redis_warm_connections)
+    except Exception as e:
+        logger.error(f"Failed to connect to Redis: {str(e)}")
+    app.state.storage_migration = None
+    try:
+        repository = get_catalogue_cache().repository
+        await repository.ensure_indexes()
+        # A storage format migration may take a while, run it behind the API
+        app.state.storage_migration = asyncio.create_task(repository.ensure_storage_format())
+    except Exception as e:
+        logger.error(f"Failed to build book indexes: {str(e)}")
+    app.state.headlines_warmup = asyncio.create_task(warm_headlines())
+    try:
+        yield
+    finally:
+        for task in (app.state.headlines_warmup, app.state.storage_migration):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        await shutdown_headline_stream()
+        await close_headline_scrapers()
+        await shutdown_catalogue_cache()
+        await RedisManager().close()
+
+
 app = FastAPI(
     title="BookScraper & Hacker News API",
     description="API for scraping books and fetching Hacker News headlines",
@@ -20,7 +114,39 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
+if settings.response_compression_min_size > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_min_size)
+if settings.metrics_enabled:
+    # Added last, so it is outermost and times compression too
+    app.add_middleware(MetricsMiddleware)
+
+HEADLINE_FIELDS = tuple(Headline.model_fields)
+
+FIELDS_DESCRIPTION = "Fields of each {} to return, repeated or comma separated: {}"
+SHAPE_DESCRIPTION = "rows: a list of objects; columns: one array per field, in the order of `fields`"
+
+
+def parse_fields(values: Optional[List[str]], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Fields of a fields= projection, None when it is absent"""
+    names = (name.strip() for value in values or () for name in value.split(","))
+    fields = list(dict.fromkeys(name for name in names if name))
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {', '.join(unknown)}; expected some of {', '.join(allowed)}"
+        )
+    return fields
+
+
+def columns(records: List[dict], fields: Sequence[str]) -> dict:
+    """Columnar shape of records: one array of values per field"""
+    return {field: [record.get(field) for record in records] for field in fields}
 
 
 @app.get("/", tags=["Root"])
@@ -37,58 +163,194 @@ async def root():
         "api_version": app.version
     }
 
-@app.post("/init", tags=["Books"], response_model=dict)
-async def init_scrape():
+@app.post("/init", tags=["Books"], response_model=dict, status_code=202)
+async def init_scrape(
+    incremental: Optional[bool] = Query(
+        None,
+        description="Refresh the existing catalogue with conditional requests instead of a full re-crawl"
+    )
+):
     """
-    Initialize the book scraping process.
+    Queue a book scrape.
     
-    Starts the scraping process to fetch books from configured sources.
+    The scrape runs in a worker process (worker.py); poll GET /jobs/{job_id}
+    for its progress. A request made while a scrape of the same mode is still
+    waiting to start returns that job instead of queueing another one.
     
+    Args:
+        incremental (Optional[bool]): Override the configured scrape mode
+
     Returns:
-        dict: Status message with scraping initiation result
+        dict: Status message with the ID of the queued job
         
     Raises:
-        HTTPException: 500 if scraping fails
+        HTTPException: 500 if the job cannot be queued
     """
     try:
-        scraper = BookScraper()
-        await scraper.scrape()
+        job_id, created = await JobQueue().enqueue(incremental=incremental)
         return {
             "status": "success",
-            "message": "Book scraping process initiated successfully",
+            "message": "Book scraping job queued" if created else "A book scraping job is already queued",
+            "job_id": job_id,
             "timestamp": int(time.time())
         }
     except Exception as e:
-        logger.error(f"Error during book scraping: {str(e)}", exc_info=True)
+        logger.error(f"Error queueing book scraping: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail={
                 "status": "error",
-                "message": f"Failed to initiate book scraping: {str(e)}",
+                "message": f"Failed to queue book scraping: {str(e)}",
                 "timestamp": int(time.time())
             }
         )
 
+@app.get("/jobs/{job_id}", tags=["Jobs"], response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Get the state and progress of a scrape job.
+
+    Progress (pages crawled, books stored, errors and books per second) is
+    updated by the worker while the job runs. Finished jobs are kept for
+    JOB_TTL seconds.
+
+    Args:
+        job_id (str): ID returned by POST /init
+
+    Returns:
+        JobResponse: The job
+
+    Raises:
+        HTTPException: 404 if the job is unknown or expired, 500 if it cannot be read
+    """
+    try:
+        job = await JobQueue().get(job_id)
+    except Exception as e:
+        logger.error(f"Error reading job {job_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "status": "error",
+                "message": f"Error reading job: {str(e)}",
+                "timestamp": int(time.time())
+            }
+        )
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job}
+
+@app.delete("/jobs/{job_id}", tags=["Jobs"], response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancel a scrape job.
+
+    A queued job is cancelled at once. A running one is flagged and its
+    worker stops the scrape within JOB_PROGRESS_INTERVAL seconds, keeping
+    the live catalogue; cancel_requested reports the flag until then.
+    Finished jobs are returned unchanged.
+
+    Args:
+        job_id (str): ID returned by POST /init
+
+    Returns:
+        JobResponse: The job after the cancellation
+
+    Raises:
+        HTTPException: 404 if the job is unknown or expired, 500 if it cannot be cancelled
+    """
+    try:
+        job = await JobQueue().cancel(job_id)
+    except Exception as e:
+        logger.error(f"Error cancelling job {job_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "status": "error",
+                "message": f"Error cancelling job: {str(e)}",
+                "timestamp": int(time.time())
+            }
+        )
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job}
+
+async def fetch_headlines(pages: int = 1) -> List[dict]:
+    """Fetch headlines with the configured backend, Selenium being the opt-in fallback"""
+    if settings.hnews_backend == "selenium":
+        scraper = await asyncio.to_thread(headline_scraper, "selenium")
+        return await asyncio.to_thread(scraper.fetch_top_stories, pages)
+
+    headlines = await headline_scraper("http").fetch_top_stories(pages)
+    if not headlines and settings.hnews_selenium_fallback:
+        logger.warning("HTTP backend found no stories, falling back to Selenium")
+        scraper = await asyncio.to_thread(headline_scraper, "selenium")
+        return await asyncio.to_thread(scraper.fetch_top_stories, pages)
+    return headlines
+
 @app.get("/headlines", tags=["Hacker News"], response_model=HeadlinesResponse)
-async def get_headlines():
+async def get_headlines(
+    max_age: Optional[int] = Query(
+        None,
+        description="Maximum acceptable age of the headlines in seconds, 0 forces a fresh scrape",
+        ge=0
+    ),
+    limit: Optional[int] = Query(None, description="Maximum number of headlines returned", ge=1),
+    fields: Optional[List[str]] = Query(
+        None,
+        description=FIELDS_DESCRIPTION.format("headline", ", ".join(HEADLINE_FIELDS)),
+        example=["title", "score"]
+    ),
+    shape: Literal["rows", "columns"] = Query("rows", description=SHAPE_DESCRIPTION)
+):
     """
     Get top Hacker News headlines.
     
     Fetches the current top stories from Hacker News with their scores and URLs.
+    Concurrent requests share one scrape; when HEADLINES_CACHE_TTL is set,
+    recent results are served from cache and `data_age` reports their age.
+    `limit`, `fields` and shape=columns trim the payload for callers that
+    only need part of it.
     
+    Args:
+        max_age (Optional[int]): Maximum acceptable age in seconds
+        limit (Optional[int]): Maximum number of headlines
+        fields (Optional[List[str]]): Fields of each headline to return
+        shape (str): rows or columns
+
     Returns:
         HeadlinesResponse: Structured response containing headlines data
         
     Raises:
-        HTTPException: 500 if fetching headlines fails
+        HTTPException: 400 if a field is unknown, 500 if fetching headlines fails
     """
+    projection = parse_fields(fields, HEADLINE_FIELDS)
     try:
-        scraper = HackerNewsScraper()
-        headlines = await asyncio.to_thread(scraper.fetch_top_stories)
+        headlines, age = await get_headline_cache(fetch_headlines).get(max_age=max_age)
+        if limit:
+            headlines = headlines[:limit]
+        if shape == "columns":
+            projection = projection or list(HEADLINE_FIELDS)
+            return FastJSONResponse({
+                "status": "success",
+                "count": len(headlines),
+                "fields": projection,
+                "headlines": columns(headlines, projection),
+                "data_age": round(age, 3)
+            })
+        if settings.fast_json_responses or projection:
+            # Scraper output is trusted, shape it like the model instead of validating it
+            projection = projection or HEADLINE_FIELDS
+            return FastJSONResponse({
+                "status": "success",
+                "count": len(headlines),
+                "headlines": [{field: headline.get(field) for field in projection} for headline in headlines],
+                "data_age": round(age, 3)
+            })
         return HeadlinesResponse(
             status="success",
             count=len(headlines),
             headlines=headlines,
+            data_age=round(age, 3),
             timestamp=int(time.time())
         )
     except Exception as e:
@@ -102,34 +364,263 @@ async def get_headlines():
             }
         )
 
-@app.get("/books/search", tags=["Books"], response_model=BookSearchResponse)
+EVENT_STREAM = "text/event-stream"
+
+@app.get(
+    "/headlines/stream",
+    tags=["Hacker News"],
+    response_class=StreamingResponse,
+    responses={200: {"content": {EVENT_STREAM: {}}, "description": "Server-Sent Events: a snapshot, then diffs"}}
+)
+async def stream_headlines(last_event_id: Optional[int] = Header(None)):
+    """
+    Stream live Hacker News headlines as Server-Sent Events.
+
+    The first event (`snapshot`) holds the current headlines; every later
+    `diff` event holds the changes of one scrape: stories added at their
+    position, removed stories, moved stories, and changed fields with score
+    deltas, stories being identified by URL. Event IDs are sequence numbers;
+    a reconnecting client sending Last-Event-ID skips the snapshot if it is
+    still current. A single scrape every HEADLINES_STREAM_INTERVAL seconds
+    feeds every client of every API worker, through Redis pub/sub.
+
+    Args:
+        last_event_id (Optional[int]): Last-Event-ID header of a reconnecting client
+
+    Returns:
+        StreamingResponse: text/event-stream of snapshot and diff events
+    """
+    return StreamingResponse(
+        get_headline_stream(fetch_headlines).events(last_event_id),
+        media_type=EVENT_STREAM,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/headlines/stream/metrics", tags=["Hacker News"], response_model=dict)
+async def get_headline_stream_metrics():
+    """
+    Get headline stream metrics.
+
+    Reports the clients connected to this worker, whether it is the worker
+    scraping for the stream, its scrapes and the diffs published, received
+    and delivered.
+
+    Returns:
+        dict: Stream configuration and counters
+    """
+    return {
+        "status": "success",
+        "stream": get_headline_stream(fetch_headlines).metrics(),
+        "timestamp": int(time.time())
+    }
+
+@app.get("/headlines/cache", tags=["Hacker News"], response_model=dict)
+async def get_headline_cache_metrics():
+    """
+    Get headline cache metrics.
+
+    Reports cache hits, stale hits served during revalidation, misses and
+    the number of upstream scrapes.
+
+    Returns:
+        dict: Cache configuration and counters
+    """
+    return {
+        "status": "success",
+        "cache": get_headline_cache(fetch_headlines).metrics(),
+        "timestamp": int(time.time())
+    }
+
+@app.get("/webdriver/pool", tags=["Hacker News"], response_model=dict)
+async def get_webdriver_pool_metrics():
+    """
+    Get WebDriver session pool metrics.
+
+    Reports sessions in use and idle, sessions created and recycled, and the
+    average time spent waiting for a session.
+
+    Returns:
+        dict: Pool metrics, or enabled=false when no pool is running
+    """
+    pool = peek_webdriver_pool()
+    return {
+        "status": "success",
+        "enabled": pool is not None,
+        "pool": pool.metrics() if pool else None,
+        "timestamp": int(time.time())
+    }
+
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus metrics of this API worker.
+
+    Fetch, parse, Redis, WebDriver and request latency histograms, with page,
+    book and error counters of the scrapes this worker ran.
+
+    Raises:
+        HTTPException: 404 if metrics are disabled
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+NDJSON = "application/x-ndjson"
+
+async def ndjson_lines(batches: AsyncIterator[List[Union[bytes, dict]]]) -> AsyncIterator[bytes]:
+    """Serialize batches of books as newline-delimited JSON, one chunk per batch, books already serialized as is"""
+    try:
+        async for books in batches:
+            yield b"".join((book if isinstance(book, bytes) else dumps(book)) + b"\n" for book in books)
+    except Exception as e:
+        # The status line is already sent, the client sees a truncated stream
+        logger.error(f"Error streaming books: {str(e)}", exc_info=True)
+        raise
+
+@app.get(
+    "/books/search",
+    tags=["Books"],
+    response_model=BookSearchResponse,
+    responses={200: {"content": {NDJSON: {}}, "description": "One page of books, or every match as NDJSON when streaming"}}
+)
 async def search_books(
-    category: Optional[str] = Query(
+    category: Optional[List[str]] = Query(
         None,
-        description="Filter books by category",
-        example="fiction",
-        min_length=2,
-        max_length=50
-    )
+        description="Filter books by category; repeat the parameter or separate with commas to match any of several",
+        example=["fiction"]
+    ),
+    q: Optional[str] = Query(
+        None,
+        description="Title search; every word must match, the last one as a prefix",
+        example="great gats",
+        min_length=1,
+        max_length=100
+    ),
+    min_price: Optional[float] = Query(None, description="Minimum price (inclusive)", ge=0),
+    max_price: Optional[float] = Query(None, description="Maximum price (inclusive)", ge=0),
+    limit: Optional[int] = Query(
+        None,
+        description="Maximum number of books returned; 50 by default and at most 500, unlimited when streaming",
+        ge=1
+    ),
+    offset: int = Query(0, description="Number of matching books to skip", ge=0),
+    sort: Optional[Literal["relevance", "price", "title"]] = Query(
+        None,
+        description="Sort field; relevance (the default with q) needs q, price is the default otherwise"
+    ),
+    order: Optional[Literal["asc", "desc"]] = Query(
+        None,
+        description="Sort order; defaults to desc for relevance, asc otherwise"
+    ),
+    stream: bool = Query(False, description="Stream every match as NDJSON, same as Accept: application/x-ndjson"),
+    fields: Optional[List[str]] = Query(
+        None,
+        description=FIELDS_DESCRIPTION.format("book", ", ".join(BOOK_FIELDS)),
+        example=["title", "price"]
+    ),
+    shape: Literal["rows", "columns"] = Query("rows", description=SHAPE_DESCRIPTION),
+    accept: Optional[str] = Header(None)
 ):
     """
-    Search books with optional category filtering.
+    Search books by title, category and price range.
+
+    Repeated searches are served from the in-process catalogue cache until
+    the next scrape publishes a new catalogue version. With
+    FAST_JSON_RESPONSES (the default) the page is serialized without
+    re-validating the books, and records stored as JSON are copied from Redis
+    into the body undecoded. With stream=true or
+    `Accept: application/x-ndjson` every match (from offset, up to limit if
+    given) is streamed as one JSON book per line, read from Redis in batches
+    so memory stays bounded; X-Total-Count gives the number of lines.
+    `fields` returns only those fields of each book, read from Redis
+    without the others where the storage layout allows it (BOOK_STORAGE=hash),
+    and shape=columns returns one array per field instead of book objects.
     
     Args:
-        category (Optional[str]): Category to filter books by
+        category (Optional[List[str]]): Categories to filter books by (any of)
+        q (Optional[str]): Title search terms
+        min_price (Optional[float]): Minimum price
+        max_price (Optional[float]): Maximum price
+        limit (Optional[int]): Page size
+        offset (int): Number of matching books to skip
+        sort (Optional[str]): Sort by relevance, price or title
+        order (Optional[str]): asc or desc
+        stream (bool): Stream every match as NDJSON
+        fields (Optional[List[str]]): Fields of each book to return
+        shape (str): rows or columns
+        accept (Optional[str]): Accept header, application/x-ndjson streams
         
     Returns:
-        BookSearchResponse: Structured response containing books data
+        BookSearchResponse: Structured response containing one page of books and the total match count,
+        or a StreamingResponse of NDJSON books
         
     Raises:
-        HTTPException: 500 if search fails
+        HTTPException: 400 if the price range is empty, relevance is requested without q, a page
+        exceeds 500 books, a field is unknown or a stream is asked for in columns, 500 if search fails
     """
+    categories = [name.strip() for value in category or [] for name in value.split(",") if name.strip()]
+    if any(not 2 <= len(name) <= 50 for name in categories):
+        raise HTTPException(status_code=400, detail="Categories must be between 2 and 50 characters")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price must not be greater than max_price")
+    if sort == "relevance" and not q:
+        raise HTTPException(status_code=400, detail="sort=relevance requires q")
+    streaming = stream or NDJSON in (accept or "")
+    projection = parse_fields(fields, BOOK_FIELDS)
+    if shape == "columns":
+        if streaming:
+            raise HTTPException(status_code=400, detail="shape=columns cannot be streamed")
+        projection = projection or list(BOOK_FIELDS)
+    if not streaming:
+        limit = limit or 50
+        if limit > 500:
+            raise HTTPException(status_code=400, detail="limit must not be greater than 500")
+
     try:
-        books = BookRepository()
-        result = await books.get_books(category=category)
+        if streaming:
+            total, batches = await get_catalogue_cache().repository.stream_books(
+                categories=categories,
+                min_price=min_price,
+                max_price=max_price,
+                query=q,
+                offset=offset,
+                limit=limit,
+                sort=sort,
+                order=order,
+                raw_json=settings.fast_json_responses,
+                fields=projection
+            )
+            return StreamingResponse(ndjson_lines(batches), media_type=NDJSON, headers={"X-Total-Count": str(total)})
+
+        result, total = await get_catalogue_cache().get_books(
+            categories=categories,
+            min_price=min_price,
+            max_price=max_price,
+            query=q,
+            limit=limit,
+            offset=offset,
+            sort=sort,
+            order=order,
+            raw_json=settings.fast_json_responses,
+            fields=projection
+        )
+        if shape == "columns":
+            return FastJSONResponse({
+                "status": "success", "count": len(result), "total": total, "limit": limit, "offset": offset,
+                "fields": projection, "books": columns(result, projection)
+            })
+        if settings.fast_json_responses or projection:
+            # Books come from the repository, skip response_model validation
+            return FastJSONResponse(json_object(
+                {"status": "success", "count": len(result), "total": total, "limit": limit, "offset": offset},
+                books=result
+            ))
         return BookSearchResponse(
             success=True,
             count=len(result),
+            total=total,
+            limit=limit,
+            offset=offset,
             books=result,
             timestamp=int(time.time())
         )
@@ -144,6 +635,23 @@ async def search_books(
             }
         )
 
+@app.get("/books/cache", tags=["Books"], response_model=dict)
+async def get_catalogue_cache_metrics():
+    """
+    Get catalogue cache metrics.
+
+    Reports the cached catalogue version, cached results and books, hits,
+    misses and invalidations of this worker.
+
+    Returns:
+        dict: Cache configuration and counters
+    """
+    return {
+        "status": "success",
+        "cache": get_catalogue_cache().metrics(),
+        "timestamp": int(time.time())
+    }
+
 @app.get("/books/categories", tags=["Books"], response_model=CategoriesResponse)
 async def get_book_categories():
     """
@@ -158,8 +666,9 @@ async def get_book_categories():
         HTTPException: 500 if fetching categories fails
     """
     try:
-        books = BookRepository()
-        result = await books.get_categories()
+        result = await get_catalogue_cache().get_categories()
+        if settings.fast_json_responses:
+            return FastJSONResponse({"status": "success", "count": len(result), "categories": result})
         return {
             "success": True,
             "count": len(result),
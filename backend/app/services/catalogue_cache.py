@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple, Union
+
+from core.config import settings
+from utils.models import CATALOGUE_CHANNEL, CATALOGUE_VERSION_KEY, BookRepository
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class CatalogueCache:
+    """
+    Read-through cache of book searches and categories in the API process.
+
+    Results are tagged with the catalogue version token written by the
+    scraper (BookRepository.publish_change) and the whole snapshot is dropped
+    when the version changes. A background watcher learns about changes from
+    the catalogue pub/sub channel and re-reads the version key every
+    `check_interval` seconds, in case a message was lost, so hits never
+    touch Redis. While the watcher is not connected every call goes to Redis.
+    The LRU holds at most `max_books` books across all cached pages.
+    """
+
+    def __init__(self, repository: BookRepository, max_books: int, check_interval: float = 1.0):
+        self.repository = repository
+        self.max_books = max_books
+        self.check_interval = check_interval
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._books = 0
+        self._live = False
+        self._watcher: Optional[asyncio.Task] = None
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_books > 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._books = 0
+
+    def _set_version(self, version: Optional[str]) -> None:
+        if version != self.version:
+            if self.version is not None or self._entries:
+                self.invalidations += 1
+                logger.info(f"Catalogue version changed to {version}, dropping {len(self._entries)} cached results")
+            self.clear()
+            self.version = version
+
+    async def _sync(self) -> None:
+        self._set_version(await self.repository.redis.get(CATALOGUE_VERSION_KEY))
+
+    async def _watch(self) -> None:
+        while True:
+            pubsub = self.repository.redis.pubsub()
+            try:
+                await pubsub.subscribe(CATALOGUE_CHANNEL)
+                # Read the version after subscribing so no change falls in between
+                await self._sync()
+                self._live = True
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.check_interval)
+                    if message is not None:
+                        self._set_version(message["data"])
+                    else:
+                        await self._sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Catalogue cache watcher disconnected, bypassing the cache: {str(e)}")
+                await asyncio.sleep(self.check_interval)
+            finally:
+                self._live = False
+                self.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _start(self) -> None:
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+
+    def _put(self, key: tuple, value: Any, size: int, version: Optional[str]) -> None:
+        # A change seen while the value was read makes it unsafe to keep
+        if not self._live or version != self.version or size > self.max_books:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._books -= previous[1]
+        self._entries[key] = (value, size)
+        self._books += size
+        while self._books > self.max_books:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._books -= evicted
+
+    async def _cached(self, key: tuple, load, size):
+        if not self.enabled:
+            return await load()
+        self._start()
+        if self._live:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        self.misses += 1
+        version = self.version
+        value = await load()
+        self._put(key, value, size(value), version)
+        return value
+
+    async def get_books(
+        self,
+        categories: Optional[List[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        query: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        sort: Optional[str] = None,
+        order: Optional[str] = None,
+        raw_json: bool = False,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Union[bytes, dict]], int]:
+        """BookRepository.get_books, served from the cache when the same search was made on this version"""
+        key = (
+            "books",
+            tuple(sorted({category.lower() for category in categories or [] if category})),
+            min_price, max_price, query, limit, offset, sort, order, raw_json,
+            tuple(fields) if fields is not None else None
+        )
+        return await self._cached(
+            key,
+            lambda: self.repository.get_books(
+                categories=categories, min_price=min_price, max_price=max_price,
+                query=query, limit=limit, offset=offset, sort=sort, order=order, raw_json=raw_json, fields=fields
+            ),
+            lambda result: len(result[0]) + 1
+        )
+
+    async def get_categories(self) -> List[str]:
+        """BookRepository.get_categories, served from the cache"""
+        return await self._cached(("categories",), self.repository.get_categories, lambda result: 1)
+
+    def metrics(self) -> dict:
+        """Snapshot of cache usage"""
+        return {
+            "enabled": self.enabled,
+            "live": self._live,
+            "version": self.version,
+            "entries": len(self._entries),
+            "books": self._books,
+            "max_books": self.max_books,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    async def close(self) -> None:
+        """Stop the watcher"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._watcher = None
+
+
+_cache: Optional[CatalogueCache] = None
+
+
+def get_catalogue_cache() -> CatalogueCache:
+    """Return the process-wide catalogue cache and its shared BookRepository"""
+    global _cache
+    if _cache is None:
+        _cache = CatalogueCache(
+            BookRepository(),
+            max_books=settings.catalogue_cache_books,
+            check_interval=settings.catalogue_cache_check_interval
+        )
+    return _cache
+
+
+async def shutdown_catalogue_cache() -> None:
+    """Stop the catalogue cache watcher, if one was started"""
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+        _cache = None
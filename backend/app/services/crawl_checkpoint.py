@@ -0,0 +1,133 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from core.config import settings
+from services.crawler import CrawlTask
+from utils.models import RedisManager
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY_PREFIX = "crawl:"  # + crawl ID + :meta, :urls or :books
+
+# Per-URL status in the :urls hash; queued URLs are stored as QUEUED + task kind
+QUEUED = "queued:"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+@dataclass
+class CrawlState:
+    """What a previous run of a crawl left in its checkpoint"""
+    incremental: bool
+    version: Optional[int]
+    frontier: List[CrawlTask] = field(default_factory=list)
+    visited: List[str] = field(default_factory=list)
+    book_ids: set = field(default_factory=set)
+
+
+class CrawlCheckpoint:
+    """
+    Progress of one crawl persisted in Redis, so a scrape restarted with the
+    same crawl ID resumes where the previous run stopped.
+
+    The :urls hash maps every discovered URL to its status: queued (with its
+    task kind, the frontier), done, skipped or failed (the visited set). The
+    :books set holds the IDs of the books stored so far and :meta the scrape
+    mode and the catalogue version being written. Updates are buffered and
+    written in one round trip per `batch_size` changes. A detail page only
+    becomes done once its book was written, and a queued mark never
+    overwrites another status. Losing the unwritten buffer in a crash
+    therefore means fetching a few pages again, never skipping one.
+    """
+
+    def __init__(self, crawl_id: str, batch_size: Optional[int] = None, ttl: Optional[int] = None):
+        self.crawl_id = crawl_id
+        self.redis = RedisManager().client
+        self.batch_size = max(1, batch_size or settings.checkpoint_batch_size)
+        self.ttl = ttl or settings.checkpoint_ttl
+        self._statuses: dict = {}
+        self._queued: dict = {}
+        self._books: set = set()
+        self.writes = 0
+
+    def key(self, name: str) -> str:
+        return f"{CHECKPOINT_KEY_PREFIX}{self.crawl_id}:{name}"
+
+    @property
+    def _keys(self) -> List[str]:
+        return [self.key(name) for name in ("meta", "urls", "books")]
+
+    async def load(self) -> Optional[CrawlState]:
+        """State left by a previous run, None when the crawl starts afresh"""
+        meta = await self.redis.hgetall(self.key("meta"))
+        if not meta:
+            return None
+        state = CrawlState(
+            incremental=meta.get("incremental") == "1",
+            version=int(meta["version"]) if meta.get("version") else None,
+            book_ids=await self.redis.smembers(self.key("books"))
+        )
+        async for url, status in self.redis.hscan_iter(self.key("urls"), count=1000):
+            if status.startswith(QUEUED):
+                state.frontier.append(CrawlTask(status[len(QUEUED):], url))
+            else:
+                state.visited.append(url)
+        return state
+
+    async def begin(self, incremental: bool, version: Optional[int], seeds: Iterable[CrawlTask]) -> None:
+        """Record a new crawl and its seed pages"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*self._keys)
+            pipe.hset(self.key("meta"), mapping={"incremental": int(incremental), "version": version or ""})
+            for task in seeds:
+                pipe.hset(self.key("urls"), task.url, QUEUED + task.kind)
+            for key in self._keys[:2]:
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    def discover(self, tasks: Iterable[CrawlTask]) -> None:
+        """Queue newly found pages"""
+        for task in tasks:
+            self._queued.setdefault(task.url, QUEUED + task.kind)
+
+    def record(self, url: str, status: str) -> None:
+        """Set the final status of a page"""
+        self._statuses[url] = status
+
+    def record_books(self, book_ids: Iterable[str]) -> None:
+        """Add stored books to the crawl"""
+        self._books.update(book_ids)
+
+    async def maybe_flush(self) -> None:
+        if len(self._statuses) + len(self._queued) + len(self._books) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the buffered changes in one round trip"""
+        statuses, queued, books = self._statuses, self._queued, self._books
+        if not (statuses or queued or books):
+            return
+        self._statuses, self._queued, self._books = {}, {}, set()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for url, status in queued.items():
+                pipe.hsetnx(self.key("urls"), url, status)
+            if statuses:
+                pipe.hset(self.key("urls"), mapping=statuses)
+            if books:
+                pipe.sadd(self.key("books"), *books)
+            for key in self._keys:
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+        self.writes += 1
+
+    async def clear(self) -> None:
+        """Forget the crawl once it completed or was abandoned"""
+        self._statuses, self._queued, self._books = {}, {}, set()
+        await self.redis.delete(*self._keys)
@@ -0,0 +1,174 @@
+import time
+import heapq
+import logging
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Task kinds, ordered by scheduling priority (lower runs first)
+DETAIL = "detail"
+LISTING = "listing"
+_PRIORITY = {DETAIL: 0, LISTING: 1}
+
+
+@dataclass(frozen=True)
+class CrawlTask:
+    """A single unit of crawl work: one URL and the kind of page behind it"""
+    kind: str
+    url: str
+
+
+@dataclass
+class CrawlStats:
+    """Counters collected while the engine runs"""
+    pages_processed: int = 0
+    errors: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class TokenBucket:
+    """Async token bucket: refills `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it"""
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in FIFO order instead of racing for each token
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+TaskHandler = Callable[[CrawlTask], Awaitable[Iterable[CrawlTask]]]
+
+
+class CrawlEngine:
+    """
+    Bounded async work queue drained by a fixed number of workers.
+
+    The handler receives one task and returns the tasks it discovered.
+    Detail pages are scheduled ahead of listing pages, so the frontier stays
+    small and listing fetches overlap with the tail of the previous page's
+    detail fetches. When the queue is full, discovered tasks wait in an
+    overflow heap that workers move into the queue as they take tasks from
+    it: producers never block on the workers (which could deadlock) nor run
+    tasks inline (which nests without limit).
+    """
+
+    def __init__(
+        self,
+        handler: TaskHandler,
+        workers: int,
+        queue_size: int,
+    ):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max(1, queue_size))
+        self._overflow: list = []
+        self.stats = CrawlStats()
+        self._seen: set[str] = set()
+        self._counter = itertools.count()
+        self._pending = 0
+        self._done = asyncio.Event()
+        self._stopped = asyncio.Event()
+
+    def stop(self) -> None:
+        """Ask the engine to stop; in-flight work is cancelled"""
+        self._stopped.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    async def _enqueue(self, task: CrawlTask) -> None:
+        if task.url in self._seen or self.stopped:
+            return
+        self._seen.add(task.url)
+        self._pending += 1
+
+        entry = (_PRIORITY.get(task.kind, 1), next(self._counter), task)
+        if self.queue.full():
+            heapq.heappush(self._overflow, entry)
+        else:
+            self.queue.put_nowait(entry)
+
+    def _refill(self) -> None:
+        """Move overflowed tasks into the queue as it frees up, highest priority first"""
+        while self._overflow and not self.queue.full():
+            self.queue.put_nowait(heapq.heappop(self._overflow))
+
+    async def _run(self, task: CrawlTask) -> None:
+        try:
+            discovered = await self.handler(task)
+            self.stats.pages_processed += 1
+            for new_task in discovered or ():
+                await self._enqueue(new_task)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f"Error processing {task.kind} page {task.url}: {str(e)}", exc_info=True)
+        finally:
+            self._pending -= 1
+            if self._pending == 0:
+                self._done.set()
+
+    async def _worker(self) -> None:
+        while not self.stopped:
+            _, _, task = await self.queue.get()
+            self._refill()
+            await self._run(task)
+
+    async def run(self, seeds: Iterable[CrawlTask], visited: Iterable[str] = ()) -> CrawlStats:
+        """Crawl from the seed tasks until the frontier is empty or stop() is called, skipping `visited` URLs"""
+        self.stats = CrawlStats()
+        self._overflow = []
+        self._seen.update(visited)
+        for task in seeds:
+            await self._enqueue(task)
+        if self._pending == 0:
+            self._done.set()
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        waiters = [asyncio.create_task(self._done.wait()), asyncio.create_task(self._stopped.wait())]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in workers + waiters:
+                task.cancel()
+            await asyncio.gather(*workers, *waiters, return_exceptions=True)
+            self.stats.finished_at = time.monotonic()
+
+        logger.info(
+            f"Crawl finished: {self.stats.pages_processed} pages, {self.stats.errors} errors "
+            f"in {self.stats.elapsed:.2f}s"
+        )
+        return self.stats
@@ -0,0 +1,324 @@
+import time
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from core.config import settings
+from services.crawl_checkpoint import CrawlState
+from services.crawler import CrawlStats, CrawlTask, TaskHandler, DETAIL, LISTING
+from utils.models import RedisManager
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SHARED_CRAWL_KEY_PREFIX = "dcrawl:"  # + crawl ID + :meta, :queue, :tasks, :leases, :seen, :books or :helpers
+ACTIVE_CRAWL_KEY = "dcrawl:active"  # ID of the distributed crawl idle workers should join
+
+# Listing pages first: each one links to the next, and with many workers
+# sharing the frontier that chain, not the detail pages, bounds the crawl
+PRIORITY = {LISTING: 0, DETAIL: 1}
+
+# Claim outcomes
+CLAIMED = "ok"
+WAIT = "wait"  # Nothing queued, but pages leased by other workers may still discover more
+FINISHED = "done"  # Frontier drained, budget spent or crawl stopped
+
+# Requeue the pages of expired leases, then lease up to ARGV[3] queued pages
+# for ARGV[1] seconds, returning {status, books reserved, url, kind, ...}.
+# The worker's heartbeat in the helpers set lasts as long as its leases.
+# KEYS: meta, queue, tasks, leases, helpers
+# ARGV: visibility timeout, worker name ('' for none), count, max books
+CLAIM_SCRIPT = """
+local meta = redis.call('HMGET', KEYS[1], 'stopped', 'reserved')
+if meta[1] ~= '0' then
+    return {'done', 0}
+end
+local reserved = tonumber(meta[2] or '0')
+if reserved >= tonumber(ARGV[4]) then
+    return {'done', reserved}
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local deadline = now + tonumber(ARGV[1])
+if ARGV[2] ~= '' then
+    redis.call('ZADD', KEYS[5], deadline, ARGV[2])
+end
+for _, url in ipairs(redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now)) do
+    redis.call('ZREM', KEYS[4], url)
+    redis.call('ZADD', KEYS[2], redis.call('HGET', KEYS[3], url .. '#p') or 1, url)
+end
+local popped = redis.call('ZPOPMIN', KEYS[2], tonumber(ARGV[3]))
+if #popped == 0 then
+    if redis.call('ZCARD', KEYS[4]) == 0 then
+        return {'done', reserved}
+    end
+    return {'wait', reserved}
+end
+local result = {'ok', reserved}
+for i = 1, #popped, 2 do
+    redis.call('ZADD', KEYS[4], deadline, popped[i])
+    table.insert(result, popped[i])
+    table.insert(result, redis.call('HGET', KEYS[3], popped[i]))
+end
+return result
+"""
+
+# Queue the pages never seen before; the seen set deduplicates across workers
+# KEYS: seen, queue, tasks
+# ARGV: priority, kind, url, priority, kind, url, ...
+ADD_SCRIPT = """
+local added = 0
+for i = 1, #ARGV, 3 do
+    local url = ARGV[i + 2]
+    if redis.call('SADD', KEYS[1], url) == 1 then
+        redis.call('HSET', KEYS[3], url, ARGV[i + 1], url .. '#p', ARGV[i])
+        redis.call('ZADD', KEYS[2], ARGV[i], url)
+        added = added + 1
+    end
+end
+return added
+"""
+
+# Put leased pages back on the queue, for a worker that stops before fetching them
+# KEYS: leases, queue, tasks
+RELEASE_SCRIPT = """
+for _, url in ipairs(ARGV) do
+    if redis.call('ZREM', KEYS[1], url) == 1 then
+        redis.call('ZADD', KEYS[2], redis.call('HGET', KEYS[3], url .. '#p') or 1, url)
+    end
+end
+return #ARGV
+"""
+
+# Take one book from the max_books budget; the new count, or -1 when it is spent
+RESERVE_SCRIPT = """
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved') or '0')
+if reserved >= tonumber(ARGV[1]) then
+    return -1
+end
+return redis.call('HINCRBY', KEYS[1], 'reserved', 1)
+"""
+
+
+class SharedCrawl:
+    """
+    State of a crawl shared by every worker taking part in it, in Redis.
+
+    The frontier is a sorted set of queued URLs (listing pages first). A
+    worker leases the URLs it claims for `crawl_lease_timeout` seconds; the
+    lease of a worker that died expires and its URLs are queued again. The
+    seen set makes each URL enter the frontier once across all workers. The
+    :meta hash holds the scrape mode, the catalogue version written, the
+    books reserved against max_books and error counters. Workers joining the
+    crawl register in :helpers, with a heartbeat renewed on each claim, so
+    the coordinator can wait for them before publishing.
+    """
+
+    def __init__(self, crawl_id: str, name: str = ""):
+        self.crawl_id = crawl_id
+        self.name = name
+        self.redis = RedisManager().client
+        self.lease_timeout = settings.crawl_lease_timeout
+        self.reserved = 0
+
+    def key(self, name: str) -> str:
+        return f"{SHARED_CRAWL_KEY_PREFIX}{self.crawl_id}:{name}"
+
+    @property
+    def _keys(self) -> List[str]:
+        return [self.key(name) for name in ("meta", "queue", "tasks", "leases", "seen", "books", "helpers")]
+
+    async def load(self) -> Optional[CrawlState]:
+        """Mode and catalogue version of the crawl, None if it was not started or is stopped"""
+        meta = await self.redis.hgetall(self.key("meta"))
+        if not meta or meta.get("stopped") == "1":
+            return None
+        # The frontier stays in Redis, a resumed crawl carries on from it
+        return CrawlState(
+            incremental=meta.get("incremental") == "1",
+            version=int(meta["version"]) if meta.get("version") else None
+        )
+
+    async def begin(self, incremental: bool, version: Optional[int], seeds: Iterable[CrawlTask]) -> None:
+        """Start a new crawl from its seed pages"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*self._keys)
+            pipe.hset(self.key("meta"), mapping={
+                "incremental": int(incremental), "version": version or "", "stopped": 0, "reserved": 0
+            })
+            for key in self._keys:
+                pipe.expire(key, settings.checkpoint_ttl)
+            await pipe.execute()
+        await self.add(seeds)
+
+    async def add(self, tasks: Iterable[CrawlTask]) -> int:
+        """Queue the pages no worker has seen yet"""
+        args = []
+        for task in tasks:
+            args += [PRIORITY.get(task.kind, 1), task.kind, task.url]
+        if not args:
+            return 0
+        return await self.redis.eval(ADD_SCRIPT, 3, self.key("seen"), self.key("queue"), self.key("tasks"), *args)
+
+    async def claim(self, count: int) -> Tuple[str, List[CrawlTask]]:
+        """Lease up to `count` queued pages; the status tells an empty frontier from a finished crawl"""
+        result = await self.redis.eval(
+            CLAIM_SCRIPT, 5, *(self.key(name) for name in ("meta", "queue", "tasks", "leases", "helpers")),
+            self.lease_timeout, self.name, count, settings.max_books
+        )
+        status, self.reserved = result[0], int(result[1])
+        tasks = [CrawlTask(kind, url) for url, kind in zip(result[2::2], result[3::2])]
+        return status, tasks
+
+    async def complete(self, tasks: List[CrawlTask]) -> None:
+        """Drop the leases of handled pages"""
+        if tasks:
+            urls = [task.url for task in tasks]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zrem(self.key("leases"), *urls)
+                pipe.hdel(self.key("tasks"), *urls, *(url + "#p" for url in urls))
+                await pipe.execute()
+
+    async def release(self, tasks: List[CrawlTask]) -> None:
+        """Queue leased pages again for other workers"""
+        if tasks:
+            await self.redis.eval(
+                RELEASE_SCRIPT, 3, self.key("leases"), self.key("queue"), self.key("tasks"), *(task.url for task in tasks)
+            )
+
+    async def reserve_book(self) -> int:
+        """Take a book from the max_books budget of the whole crawl; the books reserved, or -1 once it is spent"""
+        reserved = await self.redis.eval(RESERVE_SCRIPT, 1, self.key("meta"), settings.max_books)
+        if reserved > 0:
+            self.reserved = reserved
+        return reserved
+
+    async def record_books(self, book_ids: Iterable[str]) -> None:
+        """Add written books to the crawl"""
+        book_ids = list(book_ids)
+        if book_ids:
+            await self.redis.sadd(self.key("books"), *book_ids)
+
+    async def release_books(self, count: int) -> None:
+        """Give back the budget of books whose write failed, counting them as lost"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(self.key("meta"), "reserved", -count)
+            pipe.hincrby(self.key("meta"), "store_errors", count)
+            await pipe.execute()
+
+    async def add_errors(self, fetch_errors: int) -> None:
+        if fetch_errors:
+            await self.redis.hincrby(self.key("meta"), "fetch_errors", fetch_errors)
+
+    async def totals(self) -> dict:
+        """Books written by all workers and their error counters"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.scard(self.key("books"))
+            pipe.hmget(self.key("meta"), "fetch_errors", "store_errors")
+            books, (fetch_errors, store_errors) = await pipe.execute()
+        return {"books": books, "fetch_errors": int(fetch_errors or 0), "store_errors": int(store_errors or 0)}
+
+    async def book_ids(self) -> set:
+        return await self.redis.smembers(self.key("books"))
+
+    async def stop(self) -> None:
+        """Make every worker leave the crawl at its next claim"""
+        await self.redis.hset(self.key("meta"), "stopped", 1)
+
+    async def leave(self) -> None:
+        """Unregister a helper once its books are written"""
+        if self.name:
+            await self.redis.zrem(self.key("helpers"), self.name)
+
+    async def wait_for_helpers(self, interval: float = 0.2) -> None:
+        """Wait until no live helper takes part in the crawl any more"""
+        while await self.redis.zcount(self.key("helpers"), time.time(), "+inf"):
+            await asyncio.sleep(interval)
+
+    async def clear(self) -> None:
+        await self.redis.delete(*self._keys)
+
+
+class DistributedCrawlEngine:
+    """
+    Drop-in for CrawlEngine that takes its work from a SharedCrawl, so
+    several processes crawl one site together. `workers` coroutines each
+    lease a page, run the handler, queue the pages it discovered and drop
+    the lease. The run ends once the shared frontier is drained, the
+    max_books budget is spent or the crawl was stopped; stop() ends it early
+    and hands the pages leased by this engine back to the others.
+    """
+
+    def __init__(self, handler: TaskHandler, crawl: SharedCrawl, workers: int, poll_interval: float = 0.2):
+        self.handler = handler
+        self.crawl = crawl
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.stats = CrawlStats()
+        self._leased: set = set()
+        self._stopped = asyncio.Event()
+
+    def stop(self) -> None:
+        """Ask the engine to stop; in-flight work is cancelled"""
+        self._stopped.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    async def _run(self, task: CrawlTask) -> None:
+        try:
+            discovered = await self.handler(task)
+            self.stats.pages_processed += 1
+            if discovered:
+                await self.crawl.add(discovered)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f"Error processing {task.kind} page {task.url}: {str(e)}", exc_info=True)
+        await self.crawl.complete([task])
+        self._leased.discard(task)
+
+    async def _worker(self) -> None:
+        while not self.stopped:
+            status, tasks = await self.crawl.claim(1)
+            if status == FINISHED:
+                return
+            if not tasks:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            self._leased.update(tasks)
+            for task in tasks:
+                await self._run(task)
+
+    async def run(self, seeds: Iterable[CrawlTask] = (), visited: Iterable[str] = ()) -> CrawlStats:
+        """Crawl until the shared frontier is drained or stop() is called; `seeds` join the frontier, `visited` is ignored"""
+        self.stats = CrawlStats()
+        await self.crawl.add(seeds)
+
+        workers = asyncio.gather(*(self._worker() for _ in range(self.workers)))
+        stopped = asyncio.create_task(self._stopped.wait())
+        try:
+            await asyncio.wait({workers, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if workers.done():
+                # Raise a Redis error that ended the workers
+                workers.result()
+        finally:
+            workers.cancel()
+            stopped.cancel()
+            await asyncio.gather(workers, stopped, return_exceptions=True)
+            if self._leased:
+                await self.crawl.release(list(self._leased))
+                self._leased.clear()
+            self.stats.finished_at = time.monotonic()
+
+        logger.info(
+            f"Shared crawl {self.crawl.crawl_id}: {self.stats.pages_processed} pages here, "
+            f"{self.stats.errors} errors in {self.stats.elapsed:.2f}s"
+        )
+        return self.stats
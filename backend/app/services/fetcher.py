@@ -0,0 +1,359 @@
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from typing import Deque, Dict, Optional, Union
+
+import httpx
+
+from core.config import settings
+from services.crawler import TokenBucket
+from utils.metrics import FETCH_SECONDS
+from utils.models import RedisManager
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Statuses an origin answers with when it is overloaded or briefly broken
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a host's circuit breaker kept refusing requests until the retries ran out"""
+
+
+def create_client() -> httpx.AsyncClient:
+    """Async client with the connection pool limits and HTTP version of the settings"""
+    return httpx.AsyncClient(
+        headers={'User-Agent': settings.user_agent},
+        timeout=settings.request_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        ),
+        # HTTP/2 needs the h2 package (httpx[http2])
+        http2=settings.http2
+    )
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds a Retry-After header asks to wait, given in seconds or as an HTTP date"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit of one host, adjusted AIMD style.
+
+    A response faster than `latency_target` adds 1/limit, so the limit grows
+    by one per window of successful requests up to `maximum`. An error, a
+    throttled or a slow response multiplies it by `decrease`, down to
+    `minimum`. Failures of requests sent before the last decrease belong to
+    the same episode and do not decrease it again.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float, decrease: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.in_flight = 0
+        self._decreased_at = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        """Wait for a free slot"""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted as the caller got cancelled, hand it on
+                self.release()
+            raise
+
+    def release(self, started: Optional[float] = None, latency: float = 0.0, ok: Optional[bool] = None) -> None:
+        """Free a slot; `ok` (None when the request never completed) and `latency` adjust the limit"""
+        self.in_flight -= 1
+        if ok and latency <= self.latency_target:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif ok is not None and started is not None and started >= self._decreased_at:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._decreased_at = time.monotonic()
+        self._wake()
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. `failure_threshold` consecutive failures open
+    it: no request is sent for `reset_timeout` seconds, then a single trial
+    request goes through. Its success closes the breaker, its failure opens
+    it again. A threshold of 0 disables the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.trial else "open"
+
+    def wait_time(self) -> float:
+        """0 when a request may be sent now (claiming the trial), otherwise seconds to wait"""
+        if self.opened_at is None:
+            return 0.0
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if remaining > 0:
+            return remaining
+        if self.trial:
+            return self.reset_timeout / 10
+        self.trial = True
+        return 0.0
+
+    def record(self, ok: bool, host: str = "") -> None:
+        if ok:
+            if self.opened_at is not None:
+                logger.info(f"Circuit breaker for {host} closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+            return
+        self.failures += 1
+        if self.failure_threshold <= 0:
+            return
+        # Failures of requests that were in flight when it opened do not extend an open breaker
+        if self.trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+            logger.warning(f"Circuit breaker for {host} opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            self.trial = False
+
+
+# Generic cell rate algorithm on the Redis clock: the theoretical arrival time
+# of the next request is stored per host, allowing bursts of ARGV[2].
+# KEYS: limiter key
+# ARGV: requests per second, burst
+# Returns the seconds to wait before trying again, 0 when the request may go.
+RATE_LIMIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = 1 / tonumber(ARGV[1])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or '0'), now)
+local wait = tat - (tonumber(ARGV[2]) - 1) * interval - now
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000) + 1000)
+return '0'
+"""
+RATE_LIMIT_KEY_PREFIX = "ratelimit:"  # + host
+
+
+class RedisRateLimiter:
+    """Per-host rate limit shared by every process through Redis, with the interface of TokenBucket"""
+
+    def __init__(self, host: str, rate: float, capacity: int):
+        self.key = RATE_LIMIT_KEY_PREFIX + host
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.redis = RedisManager().client
+
+    async def acquire(self) -> None:
+        """Wait until the host's shared limit lets a request through"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = float(await self.redis.eval(RATE_LIMIT_SCRIPT, 1, self.key, self.rate, self.capacity))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class HostState:
+    """Flow control of one host"""
+    limit: AdaptiveLimit
+    bucket: Union[TokenBucket, RedisRateLimiter]
+    breaker: CircuitBreaker
+    paused_until: float = 0.0
+
+
+class Fetcher:
+    """
+    HTTP fetch layer of the scrapers, with flow control per host.
+
+    Each host gets an AdaptiveLimit on in-flight requests, a token bucket
+    rate limit and a CircuitBreaker. Throttled (429), 5xx, timed out and
+    failed requests are retried up to `fetch_retries` times after a jittered
+    exponential backoff. A Retry-After header pauses every request to the
+    host for that long, capped at `fetch_backoff_max`. With
+    `shared_rate_limit` the rate limit is a RedisRateLimiter, enforced across
+    every process fetching from the host.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, shared_rate_limit: bool = False):
+        self._owns_client = client is None
+        self.client = client or create_client()
+        self.shared_rate_limit = shared_rate_limit
+        self.hosts: Dict[str, HostState] = {}
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def host(self, url: str) -> HostState:
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            if self.shared_rate_limit:
+                bucket = RedisRateLimiter(host, settings.rate_limit_per_second, settings.rate_limit_burst)
+            else:
+                bucket = TokenBucket(settings.rate_limit_per_second, settings.rate_limit_burst)
+            self.hosts[host] = HostState(
+                limit=AdaptiveLimit(
+                    initial=settings.per_host_concurrency,
+                    minimum=settings.fetch_min_concurrency,
+                    maximum=settings.per_host_concurrency,
+                    latency_target=settings.fetch_latency_target
+                ),
+                bucket=bucket,
+                breaker=CircuitBreaker(settings.breaker_failure_threshold, settings.breaker_reset_timeout)
+            )
+        return self.hosts[host]
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "hosts": {
+                host: {"concurrency": round(state.limit.limit, 2), "breaker": state.breaker.state}
+                for host, state in self.hosts.items()
+            },
+        }
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return random.uniform(0, min(settings.fetch_backoff_max, settings.fetch_backoff_base * 2 ** attempt))
+
+    async def _send(self, state: HostState, url: str, headers: Optional[dict]) -> httpx.Response:
+        """One request under the host's concurrency limit and rate limit, feeding back its outcome"""
+        await state.limit.acquire()
+        started = time.monotonic()
+        sent = started
+        ok = None
+        status = "error"
+        try:
+            await state.bucket.acquire()
+            sent = time.monotonic()
+            self.requests += 1
+            try:
+                response = await self.client.get(url, headers=headers, timeout=settings.request_timeout)
+            except httpx.TransportError:
+                ok = False
+                raise
+            ok = response.status_code not in RETRY_STATUSES
+            status = str(response.status_code)
+            return response
+        finally:
+            latency = time.monotonic() - sent
+            state.limit.release(started, latency, ok)
+            if ok is not None:
+                host = urlsplit(url).netloc
+                state.breaker.record(ok, host)
+                FETCH_SECONDS.observe(latency, host, status)
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> httpx.Response:
+        """
+        GET a URL, returning the response of a 2xx or 304 status.
+
+        Raises httpx.HTTPStatusError at once for other statuses that are not
+        worth retrying (404...). Once the retries are used up it raises the
+        last error: httpx.HTTPStatusError, an httpx.TransportError or
+        CircuitOpenError if the host's breaker refused every attempt.
+        """
+        state = self.host(url)
+        error: Optional[Exception] = None
+        delay = 0.0
+        for attempt in range(settings.fetch_retries + 1):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(delay)
+            pause = state.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            wait = state.breaker.wait_time()
+            if wait > 0:
+                error = CircuitOpenError(f"Circuit breaker for {urlsplit(url).netloc} is open")
+                delay = wait + self._backoff(0)
+                continue
+
+            try:
+                response = await self._send(state, url, headers)
+            except httpx.TransportError as e:
+                logger.warning(f"Request for {url} failed (attempt {attempt + 1}): {str(e) or type(e).__name__}")
+                error = e
+                delay = self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                logger.warning(f"HTTP {response.status_code} for {url} (attempt {attempt + 1})")
+                error = httpx.HTTPStatusError(
+                    f"HTTP {response.status_code} for {url}", request=response.request, response=response
+                )
+                after = retry_after(response)
+                if response.status_code == 429:
+                    self.throttled += 1
+                if after is not None:
+                    # The whole host waits, the jitter spreads the requests resuming together
+                    state.paused_until = max(state.paused_until, time.monotonic() + min(after, settings.fetch_backoff_max))
+                    delay = self._backoff(0)
+                else:
+                    delay = self._backoff(attempt)
+                continue
+
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+        raise error
+
+    async def close(self) -> None:
+        """Close the HTTP client if the fetcher created it"""
+        if self._owns_client:
+            await self.client.aclose()
+            logger.info("HTTP client closed")
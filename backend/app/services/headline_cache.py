@@ -0,0 +1,224 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from utils.models import RedisManager
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[int], Awaitable[List[dict]]]
+
+
+@dataclass
+class CachedHeadlines:
+    """Headlines together with the time they were scraped"""
+    headlines: List[dict]
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class HeadlineCache:
+    """
+    Stale-while-revalidate cache in front of the headline scrapers.
+
+    Entries younger than `ttl` are served as is; entries younger than
+    `ttl + stale` are served while a background refresh runs. Concurrent
+    misses share one in-flight scrape per page count (single-flight). With
+    `use_redis`, entries are stored in Redis and a short lock extends the
+    single-flight across uvicorn workers. A `ttl` of 0 disables caching but
+    keeps the deduplication of concurrent scrapes.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        ttl: float,
+        stale: float,
+        use_redis: bool = False,
+        lock_timeout: float = 30.0
+    ):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.stale = stale
+        self.use_redis = use_redis
+        self.lock_timeout = lock_timeout
+        self._entries: Dict[int, CachedHeadlines] = {}
+        self._inflight: Dict[int, asyncio.Task] = {}
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_fetches = 0
+        self.empty_fetches = 0
+
+    @staticmethod
+    def _key(pages: int) -> str:
+        return f'headlines:{pages}'
+
+    async def _load(self, pages: int, fresh_within: float = 0.0) -> Optional[CachedHeadlines]:
+        entry = self._entries.get(pages)
+        if not self.use_redis or (entry is not None and entry.age <= fresh_within):
+            # A fresh local copy saves the Redis round trip
+            return entry
+        try:
+            raw = await RedisManager().client.get(self._key(pages))
+        except Exception as e:
+            logger.warning(f"Headline cache read failed, using local entry: {str(e)}")
+            return entry
+        if not raw:
+            return entry
+        data = json.loads(raw)
+        shared = CachedHeadlines(headlines=data['headlines'], fetched_at=data['fetched_at'])
+        if entry is None or shared.fetched_at > entry.fetched_at:
+            self._entries[pages] = shared
+            return shared
+        return entry
+
+    async def _store(self, pages: int, entry: CachedHeadlines) -> None:
+        self._entries[pages] = entry
+        if not self.use_redis or self.ttl <= 0:
+            return
+        try:
+            await RedisManager().client.set(
+                self._key(pages),
+                json.dumps({'headlines': entry.headlines, 'fetched_at': entry.fetched_at}),
+                ex=max(1, int(self.ttl + self.stale))
+            )
+        except Exception as e:
+            logger.warning(f"Headline cache write failed: {str(e)}")
+
+    async def _fetch(self, pages: int) -> CachedHeadlines:
+        """
+        Scrape and store the headlines. The backends return [] when the
+        upstream fetch fails: that is not stored, so the next request tries
+        upstream again, and the previous entry (if any) is served meanwhile.
+        """
+        self.upstream_fetches += 1
+        headlines = await self.fetcher(pages)
+        if not headlines:
+            self.empty_fetches += 1
+            logger.warning(f"Headline scrape of {pages} pages found no stories, not caching it")
+            return self._entries.get(pages) or CachedHeadlines(headlines=[], fetched_at=time.time())
+        entry = CachedHeadlines(headlines=headlines, fetched_at=time.time())
+        await self._store(pages, entry)
+        return entry
+
+    async def _fetch_shared(self, pages: int, newer_than: float) -> CachedHeadlines:
+        """Fetch unless another worker holds the lock, in which case wait for its result"""
+        redis = RedisManager().client
+        lock_key = f'{self._key(pages)}:lock'
+        token = uuid.uuid4().hex
+        try:
+            locked = await redis.set(lock_key, token, nx=True, ex=max(1, int(self.lock_timeout)))
+        except Exception as e:
+            logger.warning(f"Headline cache lock failed, fetching locally: {str(e)}")
+            return await self._fetch(pages)
+
+        if locked:
+            try:
+                return await self._fetch(pages)
+            finally:
+                # Only release our own lock
+                if await redis.get(lock_key) == token:
+                    await redis.delete(lock_key)
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await self._load(pages)
+            if entry is not None and entry.fetched_at >= newer_than:
+                return entry
+            if not await redis.exists(lock_key):
+                break
+        return await self._fetch(pages)
+
+    def _refresh(self, pages: int) -> asyncio.Task:
+        """Return the in-flight refresh for `pages`, starting one if needed"""
+        task = self._inflight.get(pages)
+        if task is None:
+            if self.use_redis and self.ttl > 0:
+                task = asyncio.create_task(self._fetch_shared(pages, time.time()))
+            else:
+                task = asyncio.create_task(self._fetch(pages))
+            self._inflight[pages] = task
+            task.add_done_callback(lambda _: self._inflight.pop(pages, None))
+        return task
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background headline refresh failed: {str(task.exception())}")
+
+    def _revalidate(self, pages: int) -> None:
+        # Refresh errors are only logged, the stale entry keeps being served
+        self._refresh(pages).add_done_callback(self._log_failure)
+
+    async def get(self, pages: int = 1, max_age: Optional[float] = None) -> Tuple[List[dict], float]:
+        """
+        Return headlines for `pages` and their age in seconds.
+
+        :param pages: Number of pages to fetch
+        :param max_age: Upper bound on acceptable age; 0 forces a fresh scrape
+        :return: Tuple of (headlines, age in seconds)
+        """
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        if ttl > 0:
+            entry = await self._load(pages, fresh_within=ttl)
+            if entry is not None:
+                age = entry.age
+                if age <= ttl:
+                    self.hits += 1
+                    return entry.headlines, age
+                if max_age is None and age <= ttl + self.stale:
+                    self.stale_hits += 1
+                    self._revalidate(pages)
+                    return entry.headlines, age
+
+        self.misses += 1
+        entry = await asyncio.shield(self._refresh(pages))
+        return entry.headlines, entry.age
+
+    def metrics(self) -> dict:
+        """Snapshot of cache usage"""
+        return {
+            "ttl": self.ttl,
+            "stale": self.stale,
+            "redis": self.use_redis,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "upstream_fetches": self.upstream_fetches,
+            "empty_fetches": self.empty_fetches,
+            "inflight": len(self._inflight),
+        }
+
+
+_cache: Optional[HeadlineCache] = None
+
+
+def get_headline_cache(fetcher: Optional[Fetcher] = None) -> HeadlineCache:
+    """Return the process-wide headline cache, creating it with `fetcher` on first use"""
+    global _cache
+    if _cache is None:
+        if fetcher is None:
+            raise RuntimeError("Headline cache is not initialized")
+        _cache = HeadlineCache(
+            fetcher=fetcher,
+            ttl=settings.headlines_cache_ttl,
+            stale=settings.headlines_cache_stale,
+            use_redis=settings.headlines_cache_redis
+        )
+    return _cache
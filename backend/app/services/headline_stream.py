@@ -0,0 +1,340 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set
+
+from core.config import settings
+from utils.models import RedisManager
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[int], Awaitable[List[dict]]]
+
+HEADLINES_CHANNEL = "headlines:stream"  # Pub/sub channel of the headline diffs
+HEADLINES_SNAPSHOT_KEY = "headlines:stream:snapshot"  # Last published headlines with their sequence number
+HEADLINES_LEADER_KEY = "headlines:stream:leader"  # Token of the API worker scraping for the stream
+SUBSCRIBE_TIMEOUT = 5.0  # Seconds a new client waits for the listener to subscribe before reading the snapshot
+
+# Take the leader lock, or extend it while it holds our token
+# KEYS: leader key
+# ARGV: token, seconds
+LEAD_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder and holder ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+RESIGN_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def story_key(headline: dict) -> str:
+    """Identity of a story across scrapes"""
+    return headline.get("url") or headline.get("title") or ""
+
+
+def diff_headlines(previous: List[dict], current: List[dict]) -> dict:
+    """
+    Changes turning the `previous` headlines into `current`: stories added
+    with their position, keys of removed stories, stories that moved, and
+    changed fields of the others with their score delta. Positions are
+    1-based indexes in the list, the order GET /headlines returns.
+    """
+    before = {story_key(headline): (position, headline) for position, headline in enumerate(previous, 1)}
+    added, moved, updated = [], [], []
+    for position, headline in enumerate(current, 1):
+        key = story_key(headline)
+        old = before.pop(key, None)
+        if old is None:
+            added.append({"position": position, "headline": headline})
+            continue
+        old_position, old_headline = old
+        if position != old_position:
+            moved.append({"key": key, "position": position, "previous": old_position})
+        fields = {name: value for name, value in headline.items() if old_headline.get(name) != value}
+        if fields:
+            change = {"key": key, "fields": fields}
+            if "score" in fields and isinstance(old_headline.get("score"), int) and isinstance(headline.get("score"), int):
+                change["score_delta"] = headline["score"] - old_headline["score"]
+            updated.append(change)
+    return {"added": added, "removed": list(before), "moved": moved, "updated": updated}
+
+
+def sse_event(event: str, data: str, event_id: Optional[int] = None) -> bytes:
+    """One Server-Sent Events frame"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """Events queued for one client; a client falling `queue_size` events behind is resynced with a snapshot"""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.lagged = False
+
+    def put(self, seq: int, frame: bytes) -> bool:
+        try:
+            self.queue.put_nowait((seq, frame))
+            return True
+        except asyncio.QueueFull:
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return False
+
+
+class HeadlineStream:
+    """
+    Push side of the headlines: one scrape every `interval` seconds for all
+    clients of /headlines/stream, however many there are.
+
+    While a process has subscribers it runs a refresher and a pub/sub
+    listener. A leader lock in Redis lets a single refresher across the API
+    workers scrape; it diffs the result against the last snapshot and
+    publishes the changes with a sequence number, storing the new snapshot
+    in the same transaction. Each worker's listener fans every published diff
+    out to its subscribers as one pre-encoded SSE frame. A client gets the
+    snapshot first, then the diffs that follow it; a gap in the sequence
+    (missed message, slow client) sends a fresh snapshot instead. When the
+    leader stops, another worker with subscribers takes over once its lock
+    expires.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        interval: float,
+        pages: int = 1,
+        queue_size: int = 100,
+        keepalive: float = 15.0
+    ):
+        self.fetcher = fetcher
+        self.interval = interval
+        self.pages = pages
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.redis = RedisManager().client
+        self.token = uuid.uuid4().hex
+        self.leader = False
+        self._subscriptions: Set[Subscription] = set()
+        self._refresher: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+        # Set while the listener is subscribed to HEADLINES_CHANNEL
+        self._subscribed = asyncio.Event()
+        # Metrics
+        self.scrapes = 0
+        self.published = 0
+        self.empty_scrapes = 0
+        self.received = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    @property
+    def lock_ttl(self) -> int:
+        # Outlives a slow scrape, expires soon after a leader that died
+        return max(5, int(self.interval * 3))
+
+    def _start(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh())
+
+    async def snapshot(self) -> dict:
+        """Last published headlines: {seq, fetched_at, headlines}"""
+        raw = await self.redis.get(HEADLINES_SNAPSHOT_KEY)
+        if not raw:
+            return {"seq": 0, "fetched_at": None, "headlines": []}
+        return json.loads(raw)
+
+    async def _publish(self) -> None:
+        """
+        Scrape and publish the changes since the last snapshot; an unchanged
+        scrape only refreshes fetched_at. A scrape finding no stories is a
+        failed upstream fetch (the backends return [] on errors): publishing it
+        would remove every story from every client, so the snapshot is kept.
+        """
+        self.scrapes += 1
+        headlines = await self.fetcher(self.pages)
+        if not headlines:
+            self.empty_scrapes += 1
+            logger.warning("Headline stream scrape found no stories, keeping the previous snapshot")
+            return
+        previous = await self.snapshot()
+        diff = diff_headlines(previous["headlines"], headlines)
+        changed = any(diff.values())
+        seq = previous["seq"] + 1 if changed else previous["seq"]
+        fetched_at = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(HEADLINES_SNAPSHOT_KEY, json.dumps({"seq": seq, "fetched_at": fetched_at, "headlines": headlines}))
+            if changed:
+                pipe.publish(HEADLINES_CHANNEL, json.dumps({"seq": seq, "fetched_at": fetched_at, **diff}))
+            await pipe.execute()
+        if changed:
+            self.published += 1
+
+    async def _refresh(self) -> None:
+        while True:
+            if not self._subscriptions:
+                await self._resign()
+                # Checked again with no await before returning, so a new subscriber cannot be missed
+                if not self._subscriptions:
+                    return
+            started = time.monotonic()
+            try:
+                self.leader = bool(await self.redis.eval(LEAD_SCRIPT, 1, HEADLINES_LEADER_KEY, self.token, self.lock_ttl))
+                if self.leader:
+                    await self._publish()
+            except Exception as e:
+                logger.error(f"Headline stream refresh failed: {str(e)}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def _resign(self) -> None:
+        if self.leader:
+            self.leader = False
+            try:
+                await self.redis.eval(RESIGN_SCRIPT, 1, HEADLINES_LEADER_KEY, self.token)
+            except Exception as e:
+                logger.warning(f"Failed to release the headline stream lock: {str(e)}")
+
+    async def _listen(self) -> None:
+        while self._subscriptions:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(HEADLINES_CHANNEL)
+                self._subscribed.set()
+                while self._subscriptions:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._fan_out(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Headline stream listener disconnected: {str(e)}")
+                await asyncio.sleep(1.0)
+            finally:
+                self._subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _fan_out(self, data: str) -> None:
+        """Queue one published diff for every subscriber, encoded once"""
+        self.received += 1
+        seq = json.loads(data)["seq"]
+        frame = sse_event("diff", data, seq)
+        for subscription in self._subscriptions:
+            if subscription.put(seq, frame):
+                self.delivered += 1
+
+    async def events(self, last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        SSE frames for one client until it disconnects: a snapshot (skipped
+        when `last_event_id` shows the client already has it), then diffs,
+        with a keepalive comment every `keepalive` seconds of silence.
+        """
+        subscription = Subscription(self.queue_size)
+        self._subscriptions.add(subscription)
+        self._start()
+        try:
+            # The snapshot is read once the listener is subscribed, so no diff
+            # falls in between. Should subscribing take too long (Redis down),
+            # a diff missed meanwhile shows as a gap and resyncs the client.
+            try:
+                await asyncio.wait_for(self._subscribed.wait(), timeout=SUBSCRIBE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Headline stream listener not subscribed yet, sending the snapshot anyway")
+            snapshot = await self.snapshot()
+            seq = snapshot["seq"]
+            if last_event_id != seq:
+                yield sse_event("snapshot", json.dumps(snapshot), seq)
+            while True:
+                if not subscription.lagged:
+                    try:
+                        event_seq, frame = await asyncio.wait_for(subscription.queue.get(), timeout=self.keepalive)
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+                        continue
+                    if event_seq <= seq:
+                        continue
+                    if event_seq == seq + 1:
+                        seq = event_seq
+                        yield frame
+                        continue
+                # Diffs were missed: start over from the current snapshot
+                self.resyncs += 1
+                subscription.lagged = False
+                snapshot = await self.snapshot()
+                seq = snapshot["seq"]
+                yield sse_event("snapshot", json.dumps(snapshot), seq)
+        finally:
+            self._subscriptions.discard(subscription)
+
+    def metrics(self) -> dict:
+        """Snapshot of stream activity in this worker"""
+        return {
+            "interval": self.interval,
+            "subscribers": len(self._subscriptions),
+            "leader": self.leader,
+            "scrapes": self.scrapes,
+            "published": self.published,
+            "empty_scrapes": self.empty_scrapes,
+            "received": self.received,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs,
+        }
+
+    async def close(self) -> None:
+        """Stop the refresher and listener, giving up the leader lock"""
+        self._subscriptions.clear()
+        for task in (self._refresher, self._listener):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._refresher = self._listener = None
+        await self._resign()
+
+
+_stream: Optional[HeadlineStream] = None
+
+
+def get_headline_stream(fetcher: Optional[Fetcher] = None) -> HeadlineStream:
+    """Return the process-wide headline stream, creating it with `fetcher` on first use"""
+    global _stream
+    if _stream is None:
+        if fetcher is None:
+            raise RuntimeError("Headline stream is not initialized")
+        _stream = HeadlineStream(
+            fetcher=fetcher,
+            interval=settings.headlines_stream_interval,
+            pages=settings.headlines_stream_pages,
+            queue_size=settings.headlines_stream_queue,
+            keepalive=settings.headlines_stream_keepalive
+        )
+    return _stream
+
+
+async def shutdown_headline_stream() -> None:
+    """Stop the headline stream, if one was started"""
+    global _stream
+    if _stream is not None:
+        await _stream.close()
+        _stream = None
@@ -0,0 +1,391 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+from core.config import settings
+from services.distributed_crawl import ACTIVE_CRAWL_KEY
+from utils.models import BookRepository, RedisManager
+
+if TYPE_CHECKING:
+    from services.scrape_book import BookScraper
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+JOBS_STREAM = "jobs:scrape"  # Stream of job IDs read by the worker consumer group
+JOBS_GROUP = "scrape-workers"
+JOBS_STREAM_MAXLEN = 1000  # Approximate number of stream entries kept
+JOB_KEY_PREFIX = "job:"  # Hash holding the state and progress of one job
+QUEUED_JOB_KEY = "jobs:queued:"  # + scrape mode: ID of the job of that mode waiting to start
+SCRAPE_LOCK_KEY = "scrape:lock"  # Token of the worker running a scrape
+SCHEDULE_KEY = "jobs:schedule"  # Expires when the next scheduled scrape is due
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_INT_FIELDS = ("pages", "books", "errors", "resumes")
+_FLOAT_FIELDS = ("rate", "created", "started", "finished")
+_FLAGS = {"1": True, "0": False, "": None}
+
+# Reuse the job of the same mode still waiting in the queue, or create and queue a new one.
+# The waiting job's key is derived from its ID, so this script needs a single Redis node.
+ENQUEUE_SCRIPT = """
+local queued = redis.call('GET', KEYS[1])
+if queued and redis.call('HGET', ARGV[1] .. queued, 'status') == 'queued' then
+    return {queued, 0}
+end
+redis.call('HSET', KEYS[2], 'id', ARGV[2], 'status', 'queued', 'incremental', ARGV[3], 'trigger', ARGV[4], 'created', ARGV[5])
+redis.call('SET', KEYS[1], ARGV[2])
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[6], '*', 'job', ARGV[2])
+return {ARGV[2], 1}
+"""
+
+# Mark a queued job (or with ARGV[5] = 1 a running job whose worker died) as running; 0 if it was cancelled meanwhile
+START_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status ~= 'queued' and not (status == 'running' and ARGV[5] == '1') then
+    return 0
+end
+if status == 'running' then
+    redis.call('HINCRBY', KEYS[1], 'resumes', 1)
+end
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+redis.call('HSET', KEYS[1], 'status', 'running', 'started', ARGV[2], 'worker', ARGV[3], 'incremental', ARGV[4])
+return 1
+"""
+
+# A queued job is cancelled at once, a running one is flagged for its worker
+CANCEL_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if not status then
+    return false
+end
+if status == 'queued' then
+    redis.call('HSET', KEYS[1], 'status', 'cancelled', 'finished', ARGV[1], 'message', 'Cancelled before it started')
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+elseif status == 'running' then
+    redis.call('HSET', KEYS[1], 'cancel', '1')
+end
+return status
+"""
+
+# Extend or release the scrape lock only while it holds our token
+RENEW_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _flag(value: Optional[bool]) -> str:
+    return "" if value is None else str(int(value))
+
+
+def _mode(incremental: Optional[bool]) -> str:
+    return {None: "default", True: "incremental", False: "full"}[incremental]
+
+
+class JobQueue:
+    """
+    Scrape jobs queued on a Redis stream read by a consumer group, each job's
+    state and progress kept in its own hash. A job requested while another
+    one of the same mode is still waiting to start is merged into it, so
+    bursts of /init calls queue a single scrape.
+    """
+
+    def __init__(self):
+        self.redis = RedisManager().client
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    async def enqueue(self, incremental: Optional[bool] = None, trigger: str = "api") -> Tuple[str, bool]:
+        """Queue a scrape job; returns its ID and whether it was created rather than merged into a waiting one"""
+        job_id = uuid.uuid4().hex
+        queued_id, created = await self.redis.eval(
+            ENQUEUE_SCRIPT, 3,
+            QUEUED_JOB_KEY + _mode(incremental), self.key(job_id), JOBS_STREAM,
+            JOB_KEY_PREFIX, job_id, _flag(incremental), trigger, time.time(), JOBS_STREAM_MAXLEN
+        )
+        return queued_id, bool(created)
+
+    async def requeue(self, job_id: str, message: Optional[str] = None) -> None:
+        """Put a job back on the stream; with `message` a started job becomes queued again and counts a resume"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if message:
+                pipe.hset(self.key(job_id), mapping={"status": QUEUED, "message": message})
+                pipe.hincrby(self.key(job_id), "resumes", 1)
+            pipe.xadd(JOBS_STREAM, {"job": job_id}, maxlen=JOBS_STREAM_MAXLEN, approximate=True)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """State and progress of a job, None if it is unknown or expired"""
+        raw = await self.redis.hgetall(self.key(job_id))
+        if not raw:
+            return None
+        job = {
+            "id": raw["id"],
+            "status": raw["status"],
+            "trigger": raw.get("trigger", "api"),
+            "incremental": _FLAGS.get(raw.get("incremental", "")),
+            "worker": raw.get("worker"),
+            "published": _FLAGS.get(raw.get("published", "")),
+            "cancel_requested": raw.get("cancel") == "1",
+            "message": raw.get("message") or None,
+        }
+        job.update({name: int(raw.get(name, 0)) for name in _INT_FIELDS})
+        job.update({name: float(raw[name]) if name in raw else None for name in _FLOAT_FIELDS})
+        job["rate"] = job["rate"] or 0.0
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a queued job, or ask the worker running it to stop; None if the job is unknown"""
+        status = await self.redis.eval(CANCEL_SCRIPT, 1, self.key(job_id), time.time(), settings.job_ttl)
+        if status is None:
+            return None
+        return await self.get(job_id)
+
+    async def start(self, job: dict, worker: str, incremental: bool, resume: bool = False) -> bool:
+        """Mark a queued job, or a running one to resume, as running in the resolved scrape mode; False if it was cancelled first"""
+        return bool(await self.redis.eval(
+            START_SCRIPT, 2, self.key(job["id"]), QUEUED_JOB_KEY + _mode(job["incremental"]),
+            job["id"], time.time(), worker, _flag(incremental), int(resume)
+        ))
+
+    async def report(self, job_id: str, progress: dict) -> bool:
+        """Record the progress of a running job; returns whether its cancellation was requested"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(self.key(job_id), mapping=progress)
+            pipe.hget(self.key(job_id), "cancel")
+            _, cancel = await pipe.execute()
+        return cancel == "1"
+
+    async def finish(self, job_id: str, status: str, **fields) -> None:
+        """Record the outcome of a job, which then expires after job_ttl seconds"""
+        fields = {name: _flag(value) if isinstance(value, bool) or value is None else value for name, value in fields.items()}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.key(job_id), mapping={"status": status, "finished": time.time(), **fields})
+            pipe.expire(self.key(job_id), settings.job_ttl)
+            await pipe.execute()
+
+
+class ScrapeWorker:
+    """
+    Worker process side of the job queue: reads jobs from the consumer
+    group one at a time and runs each scrape under a Redis lock, so scrapes
+    never overlap however many workers run. The lock expires unless renewed
+    every job_progress_interval along with the progress counters, so a
+    crashed worker does not block the others for longer than
+    scrape_lock_ttl. Scrapes are checkpointed under their job ID: a worker
+    that is stopped puts its job back on the queue, and the stream entry of
+    a job whose worker died is claimed by another worker once the lock has
+    expired, both resuming the crawl where it stopped. Workers also queue the
+    periodic scrape (scrape_interval) and, at startup, a first scrape when no
+    catalogue is stored.
+
+    With distributed_crawl the worker holding the lock coordinates a crawl
+    shared through Redis (SharedCrawl, under the job ID) and advertises it
+    in ACTIVE_CRAWL_KEY; idle workers, and workers waiting for the lock,
+    join it instead of waiting.
+    """
+
+    def __init__(self, queue: Optional[JobQueue] = None, name: Optional[str] = None):
+        self.queue = queue or JobQueue()
+        self.redis = self.queue.redis
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.scraper: Optional["BookScraper"] = None
+        self.jobs_run = 0
+        self._helped: Optional[str] = None
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop, interrupting the current scrape so another worker resumes it"""
+        self._stopping.set()
+        if self.scraper and not self.scraper.cancelled:
+            self.scraper.cancel(resumable=True)
+
+    def _new_scraper(self) -> "BookScraper":
+        # Imported here: the API only queues jobs and never loads the scraping stack
+        from services.scrape_book import BookScraper
+
+        self.scraper = BookScraper()
+        return self.scraper
+
+    async def _ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(JOBS_STREAM, JOBS_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _schedule(self) -> None:
+        """Queue the periodic scrape once per interval across all workers"""
+        interval = settings.scrape_interval
+        if interval > 0 and await self.redis.set(SCHEDULE_KEY, self.name, nx=True, ex=interval):
+            job_id, created = await self.queue.enqueue(trigger="schedule")
+            logger.info(f"Scheduled scrape {'queued as' if created else 'merged into'} job {job_id}")
+
+    async def run(self) -> None:
+        """Process jobs until stop() is called"""
+        await self._ensure_group()
+        if settings.scrape_if_empty and not await BookRepository().count_books():
+            job_id, _ = await self.queue.enqueue(trigger="startup")
+            logger.info(f"No catalogue stored, queued job {job_id}")
+        logger.info(f"Worker {self.name} waiting for scrape jobs")
+
+        while not self._stopping.is_set():
+            try:
+                await self._schedule()
+                await self._reclaim()
+                await self._help()
+                entries = await self.redis.xreadgroup(JOBS_GROUP, self.name, {JOBS_STREAM: ">"}, count=1, block=1000)
+                for _, messages in entries or []:
+                    for message_id, fields in messages:
+                        try:
+                            await self.run_job(fields["job"])
+                        finally:
+                            await self.redis.xack(JOBS_STREAM, JOBS_GROUP, message_id)
+            except Exception as e:
+                logger.error(f"Worker loop failed: {str(e)}", exc_info=True)
+                await asyncio.sleep(1)
+        logger.info(f"Worker {self.name} stopped after {self.jobs_run} jobs")
+
+    async def _reclaim(self) -> None:
+        """Resume a job whose worker died: its stream entry is still pending and nobody holds the scrape lock"""
+        if await self.redis.exists(SCRAPE_LOCK_KEY):
+            return
+        claimed = await self.redis.xautoclaim(
+            JOBS_STREAM, JOBS_GROUP, self.name, min_idle_time=settings.scrape_lock_ttl * 1000, count=1
+        )
+        for message_id, fields in claimed[1]:
+            try:
+                # Entries trimmed from the stream come back without fields
+                if fields:
+                    logger.warning(f"Claimed job {fields['job']} of a stopped worker")
+                    await self.run_job(fields["job"], resume=True)
+            finally:
+                await self.redis.xack(JOBS_STREAM, JOBS_GROUP, message_id)
+
+    async def _acquire_lock(self, job_id: str, token: str, statuses: tuple) -> bool:
+        """Wait for the scrape lock; False if the job left `statuses` (finished, cancelled) or the worker is stopping"""
+        while not self._stopping.is_set():
+            if await self.redis.set(SCRAPE_LOCK_KEY, token, nx=True, ex=settings.scrape_lock_ttl):
+                return True
+            job = await self.queue.get(job_id)
+            if job is None or job["status"] not in statuses:
+                return False
+            await self._help()
+            await asyncio.sleep(settings.job_progress_interval)
+        return False
+
+    async def _help(self) -> None:
+        """Join the distributed crawl another worker coordinates, once per crawl"""
+        if not settings.distributed_crawl or self._stopping.is_set():
+            return
+        crawl_id = await self.redis.get(ACTIVE_CRAWL_KEY)
+        if not crawl_id or crawl_id == self._helped:
+            return
+        scraper = self._new_scraper()
+        try:
+            books = await scraper.join(crawl_id, self.name)
+        finally:
+            self.scraper = None
+        if scraper.engine is not None:
+            # Not again once the crawl is drained; a crawl not started yet is joined on a later call
+            self._helped = crawl_id
+            logger.info(f"Helped crawl of job {crawl_id}: {books} books stored")
+
+    async def run_job(self, job_id: str, resume: bool = False) -> None:
+        """Run one queued job (or with `resume` one left running by a dead worker), waiting for any running scrape first"""
+        statuses = (QUEUED, RUNNING) if resume else (QUEUED,)
+        job = await self.queue.get(job_id)
+        if job is None or job["status"] not in statuses:
+            return
+        token = uuid.uuid4().hex
+        if not await self._acquire_lock(job_id, token, statuses):
+            if self._stopping.is_set():
+                # Leave the job to another worker
+                await self.queue.requeue(job_id)
+            return
+        try:
+            incremental = settings.incremental_scrape if job["incremental"] is None else job["incremental"]
+            if await self.queue.start(job, self.name, incremental, resume):
+                await self._scrape(job_id, incremental, token)
+        finally:
+            await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, SCRAPE_LOCK_KEY, token)
+
+    async def _scrape(self, job_id: str, incremental: bool, token: str) -> None:
+        logger.info(f"Running {'incremental' if incremental else 'full'} scrape job {job_id}")
+        scraper = self._new_scraper()
+        distributed = settings.distributed_crawl
+        if distributed:
+            task = asyncio.create_task(scraper.scrape(incremental=incremental, distributed=job_id))
+            self._helped = job_id
+        else:
+            task = asyncio.create_task(scraper.scrape(incremental=incremental, checkpoint=job_id))
+        message = None
+        try:
+            while not task.done():
+                if distributed:
+                    await self.redis.set(ACTIVE_CRAWL_KEY, job_id, ex=settings.scrape_lock_ttl)
+                await asyncio.wait({task}, timeout=settings.job_progress_interval)
+                if task.done():
+                    break
+                try:
+                    if not await self.redis.eval(RENEW_LOCK_SCRIPT, 1, SCRAPE_LOCK_KEY, token, settings.scrape_lock_ttl):
+                        message = "Lost the scrape lock"
+                        logger.error(f"Job {job_id} lost the scrape lock, cancelling it")
+                        scraper.cancel()
+                    if await self.queue.report(job_id, scraper.progress()) and not scraper.cancelled:
+                        logger.info(f"Cancelling job {job_id}")
+                        scraper.cancel()
+                except Exception as e:
+                    logger.warning(f"Failed to report progress of job {job_id}: {str(e)}")
+            await task
+        finally:
+            self.scraper = None
+            self.jobs_run += 1
+            if distributed:
+                await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, ACTIVE_CRAWL_KEY, job_id)
+
+        if scraper.resumable and not scraper.error:
+            await self.queue.requeue(job_id, message="Interrupted, resumes from its checkpoint")
+            logger.info(f"Job {job_id} interrupted at {scraper.progress()}, queued again")
+            return
+        if scraper.error or message:
+            status, message = FAILED, scraper.error or message
+        elif scraper.cancelled:
+            status, message = CANCELLED, "Cancelled"
+        else:
+            status = DONE
+        await self.queue.finish(
+            job_id, status,
+            **scraper.progress(),
+            published=None if incremental else scraper.published,
+            message=message or ""
+        )
+        logger.info(f"Job {job_id} {status}: {scraper.progress()}")
@@ -0,0 +1,295 @@
+import re
+import codecs
+import logging
+from urllib.parse import urljoin
+from typing import Dict, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Only this much of a body is fed to chardet when no charset is declared
+DETECTION_SAMPLE_SIZE = 4096
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+
+def _normalize_charset(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.decode('ascii', 'ignore') if isinstance(name, bytes) else name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Resolve the charset of an HTML body.
+
+    Order: the HTTP Content-Type charset, a <meta charset> in the head, a
+    strict UTF-8 decode, and only then chardet on a small sample.
+    """
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        charset = _normalize_charset(match.group(1)) if match else None
+        if charset:
+            return charset
+
+    match = _META_CHARSET.search(content[:2048])
+    charset = _normalize_charset(match.group(1)) if match else None
+    if charset:
+        return charset
+
+    try:
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    # Imported on first use, most pages declare their charset or are UTF-8
+    import chardet
+
+    return _normalize_charset(chardet.detect(content[:DETECTION_SAMPLE_SIZE])['encoding']) or 'utf-8'
+
+
+def decode_html(content: bytes, content_type: Optional[str] = None) -> str:
+    """Decode an HTML body with the resolved charset"""
+    return content.decode(detect_charset(content, content_type), errors='replace')
+
+
+def _parse_price(price_text: str) -> Optional[float]:
+    # Remove currency symbol and convert to float
+    price_text = price_text.strip().lstrip('£€$')
+    try:
+        return float(price_text)
+    except ValueError:
+        logger.error(f"Invalid price format: {price_text}")
+        return None
+
+
+class BookPageParser:
+    """
+    Base class for HTML parser backends.
+
+    Backends turn raw response bytes into compact records: parse_listing
+    returns {"books": [...], "next": [...]} and parse_book returns the book
+    fields as a dict, or None when the page is not a usable book page.
+    """
+    name = "base"
+
+    def parse_listing(self, content: bytes, content_type: Optional[str], page_url: str) -> dict:
+        raise NotImplementedError
+
+    def parse_book(self, content: bytes, content_type: Optional[str], book_url: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def _book_record(self, book_url: str, title: str, price_text: str, category: str, image_src: Optional[str]) -> Optional[dict]:
+        price_value = _parse_price(price_text)
+        if price_value is None:
+            return None
+        return {
+            "title": title.strip(),
+            "category": category.strip().lower(),
+            "price": price_value,
+            "image_url": urljoin(book_url, image_src) if image_src else ""
+        }
+
+
+class SoupParser(BookPageParser):
+    """BeautifulSoup with the stdlib html.parser, the original implementation"""
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def _make_soup(self, content: bytes, content_type: Optional[str]):
+        return self._soup(decode_html(content, content_type), 'html.parser')
+
+    def parse_listing(self, content: bytes, content_type: Optional[str], page_url: str) -> dict:
+        soup = self._make_soup(content, content_type)
+        book_urls = []
+        for book in soup.find_all('article', class_='product_pod'):
+            link = book.find('h3').find('a')
+            if link and 'href' in link.attrs:
+                book_urls.append(urljoin(page_url, link['href']))
+
+        next_pages = []
+        next_button = soup.select_one('li.next a')
+        if next_button and 'href' in next_button.attrs:
+            next_pages.append(urljoin(page_url, next_button['href']))
+
+        return {"books": book_urls, "next": next_pages}
+
+    def parse_book(self, content: bytes, content_type: Optional[str], book_url: str) -> Optional[dict]:
+        soup = self._make_soup(content, content_type)
+        title = soup.select_one('h1')
+        price = soup.select_one('p.price_color')
+        category = soup.select_one('ul.breadcrumb li:nth-child(3) a')
+        image_element = soup.select_one('div.item.active img')
+
+        if not all([title, price, category, image_element]):
+            logger.warning(f"Missing required elements for book at {book_url}")
+            return None
+
+        return self._book_record(book_url, title.text, price.text, category.text, image_element.get('src'))
+
+
+def xpath_has_class(name: str) -> str:
+    """XPath predicate matching elements carrying a CSS class"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlParser(BookPageParser):
+    """lxml with XPath expressions compiled once per process"""
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html
+        self._etree = etree
+        self._html = html
+        self._parsers: Dict[str, object] = {}
+        self.book_links = etree.XPath(f"//article[{xpath_has_class('product_pod')}]/descendant::h3[1]/descendant::a[1]/@href")
+        self.next_link = etree.XPath(f"(//li[{xpath_has_class('next')}]//a/@href)[1]")
+        self.title = etree.XPath("(//h1)[1]")
+        self.price = etree.XPath(f"(//p[{xpath_has_class('price_color')}])[1]")
+        self.category = etree.XPath(f"(//ul[{xpath_has_class('breadcrumb')}]/li[3]//a)[1]")
+        self.image = etree.XPath(f"(//div[{xpath_has_class('item')} and {xpath_has_class('active')}]//img)[1]")
+
+    def _parser(self, charset: str):
+        if charset not in self._parsers:
+            self._parsers[charset] = self._html.HTMLParser(encoding=charset)
+        return self._parsers[charset]
+
+    def _tree(self, content: bytes, content_type: Optional[str]):
+        return self._etree.fromstring(content, self._parser(detect_charset(content, content_type)))
+
+    def parse_listing(self, content: bytes, content_type: Optional[str], page_url: str) -> dict:
+        tree = self._tree(content, content_type)
+        return {
+            "books": [urljoin(page_url, href) for href in self.book_links(tree)],
+            "next": [urljoin(page_url, href) for href in self.next_link(tree)]
+        }
+
+    def _extract(self, tree, book_url: str) -> Optional[dict]:
+        found = [self.title(tree), self.price(tree), self.category(tree), self.image(tree)]
+        if not all(found):
+            logger.warning(f"Missing required elements for book at {book_url}")
+            return None
+        title, price, category, image = (nodes[0] for nodes in found)
+        return self._book_record(
+            book_url, "".join(title.itertext()), "".join(price.itertext()),
+            "".join(category.itertext()), image.get('src')
+        )
+
+    def parse_book(self, content: bytes, content_type: Optional[str], book_url: str) -> Optional[dict]:
+        return self._extract(self._tree(content, content_type), book_url)
+
+
+class StreamingLxmlParser(LxmlParser):
+    """
+    lxml pull parser that stops feeding the document once the book fields
+    are complete, so descriptions, tables and footers are never parsed.
+    Listing pages need the whole document and use the regular lxml path.
+    """
+    name = "lxml-stream"
+    chunk_size = 2048
+
+    def parse_book(self, content: bytes, content_type: Optional[str], book_url: str) -> Optional[dict]:
+        parser = self._etree.HTMLPullParser(events=('end',), encoding=detect_charset(content, content_type))
+        missing = {"title", "price", "category", "image"}
+        for offset in range(0, len(content), self.chunk_size):
+            parser.feed(content[offset:offset + self.chunk_size])
+            for _, element in parser.read_events():
+                missing.discard(self._field(element))
+            if not missing:
+                break
+        # close() only finishes the chunks fed so far
+        return self._extract(parser.close(), book_url)
+
+    @staticmethod
+    def _field(element) -> Optional[str]:
+        """Name of the book field an element completes, if any"""
+        tag = element.tag
+        if tag == "h1":
+            return "title"
+        if tag not in ("p", "ul", "div"):
+            return None
+        classes = (element.get('class') or '').split()
+        if tag == "p" and "price_color" in classes:
+            return "price"
+        if tag == "ul" and "breadcrumb" in classes:
+            return "category"
+        if tag == "div" and "item" in classes and "active" in classes:
+            return "image"
+        return None
+
+
+class SelectolaxParser(BookPageParser):
+    """selectolax (lexbor) with CSS selectors; only available when installed"""
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def _tree(self, content: bytes, content_type: Optional[str]):
+        return self._parser(decode_html(content, content_type))
+
+    def parse_listing(self, content: bytes, content_type: Optional[str], page_url: str) -> dict:
+        tree = self._tree(content, content_type)
+        book_urls = []
+        for book in tree.css('article.product_pod'):
+            link = book.css_first('h3 a')
+            if link and link.attributes.get('href'):
+                book_urls.append(urljoin(page_url, link.attributes['href']))
+        next_button = tree.css_first('li.next a')
+        next_pages = [urljoin(page_url, next_button.attributes['href'])] if next_button and next_button.attributes.get('href') else []
+        return {"books": book_urls, "next": next_pages}
+
+    def parse_book(self, content: bytes, content_type: Optional[str], book_url: str) -> Optional[dict]:
+        tree = self._tree(content, content_type)
+        title = tree.css_first('h1')
+        price = tree.css_first('p.price_color')
+        category = tree.css_first('ul.breadcrumb li:nth-child(3) a')
+        image_element = tree.css_first('div.item.active img')
+
+        if not all([title, price, category, image_element]):
+            logger.warning(f"Missing required elements for book at {book_url}")
+            return None
+
+        return self._book_record(book_url, title.text(), price.text(), category.text(), image_element.attributes.get('src'))
+
+
+PARSER_BACKENDS = {
+    parser.name: parser
+    for parser in (SoupParser, LxmlParser, StreamingLxmlParser, SelectolaxParser)
+}
+
+_instances: Dict[str, BookPageParser] = {}
+
+
+def get_parser(name: str) -> BookPageParser:
+    """Return the (per-process) parser instance for a backend name"""
+    if name not in _instances:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown HTML parser backend: {name}")
+        _instances[name] = PARSER_BACKENDS[name]()
+    return _instances[name]
+
+
+def available_backends() -> list[str]:
+    """Backends whose libraries are importable in this environment"""
+    names = []
+    for name in PARSER_BACKENDS:
+        try:
+            get_parser(name)
+            names.append(name)
+        except ImportError:
+            continue
+    return names
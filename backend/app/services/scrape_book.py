@@ -1,13 +1,17 @@
 import time
+import asyncio
 import logging
+import hashlib
 import httpx
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
-import chardet
 from core.config import settings
-from utils.models import Book, BookRepository
-from typing import Optional, List, Tuple
-import asyncio
+from utils.metrics import BOOKS_SKIPPED, BOOKS_STORED, ERRORS, PAGES, PARSE_SECONDS
+from utils.models import Book, BookRepository, PageCache, PageFingerprint
+from services.parse_pool import get_parse_pool, BOOK_PAGE, LISTING_PAGE
+from services.crawler import CrawlEngine, CrawlTask, DETAIL, LISTING
+from services.fetcher import CircuitOpenError, Fetcher
+from services.crawl_checkpoint import CrawlCheckpoint, CrawlState, DONE, FAILED, SKIPPED
+from services.distributed_crawl import DistributedCrawlEngine, SharedCrawl
+from typing import Optional, List, Tuple, Union
 
 # Configure logging
 logging.basicConfig(
@@ -16,153 +20,620 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class BookWriteBuffer:
+    """
+    Write-behind buffer batching scraped books into BookRepository.store_books.
+
+    Books are flushed when `batch_size` are pending, when the oldest one has
+    waited `flush_interval` seconds, and on close(). A batch write runs in its
+    own task, so cancelling the caller (the crawl engine cancels in-flight
+    work when it stops) does not lose the batch; close() waits for every
+    write. Written batches are reported through `on_write`, and a failed
+    flush reports the books it lost through `on_error`.
+    """
+
+    def __init__(self, repository: BookRepository, batch_size: int, flush_interval: float, on_error=None, on_write=None):
+        self.repository = repository
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.on_write = on_write
+        self._pending: List[Book] = []
+        self._oldest = 0.0
+        self._flusher: Optional[asyncio.Task] = None
+        self._writes: set[asyncio.Task] = set()
+        self.books_written = 0
+        self.batches_written = 0
+
+    async def add(self, book: Book) -> None:
+        """Queue a book, flushing the buffer once it is full"""
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending.append(book)
+        if self._flusher is None and self.flush_interval > 0:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def _write(self, batch: List[Book]) -> None:
+        try:
+            await self.repository.store_books(batch, batch_size=len(batch))
+            self.books_written += len(batch)
+            self.batches_written += 1
+            if self.on_write:
+                self.on_write(batch)
+        except Exception as e:
+            logger.error(f"Failed to store {len(batch)} books: {str(e)}")
+            if self.on_error:
+                self.on_error(batch)
+
+    async def flush(self) -> None:
+        """Write every pending book in one batch"""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        write = asyncio.create_task(self._write(batch))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+        await asyncio.shield(write)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval / 2)
+            if self._pending and time.monotonic() - self._oldest >= self.flush_interval:
+                await self.flush()
+
+    async def close(self) -> None:
+        """Stop the periodic flush and write what is left"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._writes:
+            await asyncio.gather(*self._writes)
+
 class BookScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        book_repository: Optional[BookRepository] = None
+    ):
         """Initialize the scraper with an async HTTP client"""
-        self.client = httpx.AsyncClient()
+        self.fetcher = Fetcher(client)
+        self.client = self.fetcher.client
         self.client.headers.update({'User-Agent': settings.user_agent})
-        self.book_repository = BookRepository()
+        self.book_repository = book_repository or BookRepository()
+        self.parse_pool = get_parse_pool()
+        self.page_cache = PageCache()
+        self.engine: Optional[Union[CrawlEngine, DistributedCrawlEngine]] = None
+        self.incremental = False
+        self.books_collected = 0
+        self.fetch_errors = 0
+        self.pages_unchanged = 0
+        self.seen_book_ids: set[str] = set()
+        self.store_errors = 0
+        self.write_buffer: Optional[BookWriteBuffer] = None
+        self.gc_task: Optional[asyncio.Task] = None
+        self.cancelled = False
+        self.resumable = False
+        self.published = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        self.shared: Optional[SharedCrawl] = None
+        self._book_urls: dict[str, str] = {}
+        self._unstored_pages: List[str] = []
+
+    def cancel(self, resumable: bool = False) -> None:
+        """
+        Stop the running scrape; a cancelled scrape publishes and prunes
+        nothing. With `resumable` its checkpoint and the catalogue version it
+        was writing are kept for a later scrape with the same checkpoint.
+        """
+        self.cancelled = True
+        self.resumable = resumable
+        if self.engine:
+            self.engine.stop()
 
-    async def _get_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch a page and return BeautifulSoup object"""
+    def progress(self) -> dict:
+        """Counters of the running or last scrape"""
+        stats = self.engine.stats if self.engine else None
+        books = self.write_buffer.books_written if self.write_buffer else 0
+        if self.shared:
+            # Books of the whole distributed crawl
+            books = max(books, self.shared.reserved)
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "pages": stats.pages_processed if stats else 0,
+            "books": books,
+            "errors": self.fetch_errors + self.store_errors + (stats.errors if stats else 0),
+            "rate": round(books / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def _on_store_error(self, books: List[Book]) -> None:
+        """Release the slots of books a batched write lost, their pages stay queued in the checkpoint"""
+        self.store_errors += len(books)
+        ERRORS.inc("store", amount=len(books))
+        self.books_collected -= len(books)
+        self.seen_book_ids.difference_update(book.id for book in books)
+        for book in books:
+            url = self._book_urls.pop(book.id, None)
+            if url:
+                # Their fingerprints are stored, the next scrape must not take them as unchanged
+                self._unstored_pages.append(url)
+
+    def _on_stored(self, books: List[Book]) -> None:
+        """Checkpoint the pages of books once they are written"""
+        BOOKS_STORED.inc(amount=len(books))
+        for book in books:
+            url = self._book_urls.pop(book.id, None)
+            if url:
+                self._mark(url, DONE)
+        if self.checkpoint:
+            self.checkpoint.record_books(book.id for book in books)
+
+    async def _forget_unstored_pages(self) -> None:
+        """Drop the fingerprints of book pages whose write was lost"""
+        if not self._unstored_pages:
+            return
+        try:
+            await self.page_cache.delete(self._unstored_pages)
+        except Exception as e:
+            logger.error(f"Failed to drop page fingerprints: {str(e)}")
+        self._unstored_pages = []
+
+    def _mark(self, url: str, status: str) -> None:
+        if self.checkpoint:
+            self.checkpoint.record(url, status)
+
+    async def _fetch(self, url: str, headers: Optional[dict] = None) -> Optional[httpx.Response]:
+        """Fetch a page through the fetcher's retries, returning the response for 2xx and 304 statuses"""
         try:
-            response = await self.client.get(url, timeout=settings.request_timeout)
-            response.raise_for_status()
+            return await self.fetcher.get(url, headers)
 
-            detected_encoding = chardet.detect(response.content)['encoding'] or 'utf-8'
-            return BeautifulSoup(response.content.decode(detected_encoding, errors='replace'), 'html.parser')
-        
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error {e.response.status_code} when fetching {url}")
         except httpx.RequestError as e:
             logger.error(f"Request failed for {url}: {str(e)}")
+        except CircuitOpenError as e:
+            logger.error(f"Giving up on {url}: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error fetching page {url}: {str(e)}")
+        self.fetch_errors += 1
+        ERRORS.inc("fetch")
         return None
 
-    async def _extract_book_details(self, book_url: str) -> Optional[Book]:
-        """Extract book details from a book page"""
-        soup = await self._get_page(book_url)
-        if not soup:
-            return None
+    async def _load(self, url: str, kind: str) -> Tuple[Optional[dict], bool]:
+        """
+        Fetch and parse a page, going through the page fingerprint cache.
 
-        try:
-            # Find required elements
-            title = soup.select_one('h1')
-            price = soup.select_one('p.price_color')
-            category = soup.select_one('ul.breadcrumb li:nth-child(3) a')
-            image_element = soup.select_one('div.item.active img')
-
-            if not all([title, price, category, image_element]):
-                logger.warning(f"Missing required elements for book at {book_url}")
-                return None
-
-            # Extract and parse price - remove currency symbol and convert to float
-            price_text = price.text.strip().lstrip('£€$')
+        Parsing happens in the parse pool, off the event loop. In incremental
+        mode the request carries the stored validators; a 304 or an identical
+        body hash returns the cached parse result without parsing.
+        Fingerprints are recorded in both modes so a full scrape seeds the next
+        incremental one.
+
+        Returns the parse result, None if the page failed, and whether it is
+        the cached one of an unchanged page.
+        """
+        cached = await self.page_cache.get(url) if self.incremental else None
+        response = await self._fetch(url, cached.conditional_headers() if cached else None)
+        if response is None:
+            PAGES.inc(kind, "failed")
+            return None, False
+
+        if cached and response.status_code == 304:
+            self.pages_unchanged += 1
+            PAGES.inc(kind, "unchanged")
+            return cached.data, True
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        unchanged = bool(cached and cached.content_hash == content_hash)
+        if unchanged:
+            self.pages_unchanged += 1
+            PAGES.inc(kind, "unchanged")
+            data = cached.data
+        else:
             try:
-                price_value = float(price_text)
-            except ValueError:
-                logger.error(f"Invalid price format: {price_text}")
-                return None
-
-            # Extract image URL
-            image_url = urljoin(book_url, image_element['src']) if image_element and 'src' in image_element.attrs else ""
-
-            return Book(
-                title=title.text.strip(),
-                category=category.text.strip().lower(),
-                price=str(price_value),
-                image_url=image_url
-            )
-        except Exception as e:
-            logger.error(f"Failed to parse book at {book_url}: {str(e)}", exc_info=True)
-            return None
+                with PARSE_SECONDS.time(kind):
+                    data = await self.parse_pool.parse(kind, response.content, response.headers.get('content-type'), url)
+            except Exception as e:
+                logger.error(f"Failed to parse page {url}: {str(e)}", exc_info=True)
+                ERRORS.inc("parse")
+                data = None
+            if data is None:
+                PAGES.inc(kind, "failed")
+                return None, False
+            PAGES.inc(kind, "parsed")
+
+        await self.page_cache.put(url, PageFingerprint(
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+            content_hash=content_hash,
+            data=data
+        ))
+        return data, unchanged
+
+    async def _extract_book_details(self, book_url: str) -> Tuple[Optional[Book], bool]:
+        """Extract book details from a book page, and whether the page is unchanged"""
+        data, unchanged = await self._load(book_url, BOOK_PAGE)
+        return (Book(**data) if data else None), unchanged
 
     async def _process_book(self, book_url: str) -> bool:
-        """Process a single book"""
-        book_details = await self._extract_book_details(book_url)
+        """
+        Process a single book. The book of an unchanged page is already
+        stored by the scrape that recorded its fingerprint, so in incremental
+        mode it is only kept from pruning, not written again.
+        """
+        book_details, unchanged = await self._extract_book_details(book_url)
         if not book_details:
+            self._mark(book_url, FAILED)
             return False
 
         try:
             price = float(book_details.price)
             if price >= settings.max_price:
                 logger.info(f"Skipping book {book_details.title} - price {price} exceeds maximum {settings.max_price}")
+                BOOKS_SKIPPED.inc("max_price")
+                self._mark(book_url, SKIPPED)
+                return False
+
+            # Reserve a slot before awaiting Redis so concurrent workers never overshoot max_books
+            if self.shared:
+                reserved = await self.shared.reserve_book()
+                if reserved < 0:
+                    return False
+            elif self.books_collected >= settings.max_books:
                 return False
+            else:
+                reserved = self.books_collected + 1
+            self.books_collected += 1
+            if reserved >= settings.max_books and self.engine:
+                self.engine.stop()
 
-            return bool(await self.book_repository.store_book(book_details))
+            # The ID is derived from the content, so it is known before the batched write lands
+            book_details.id = book_details.generate_id()
+            self.seen_book_ids.add(book_details.id)
+            if unchanged:
+                self._mark(book_url, DONE)
+                if self.checkpoint:
+                    self.checkpoint.record_books([book_details.id])
+                return True
+            self._book_urls[book_details.id] = book_url
+            await self.write_buffer.add(book_details)
+            return True
         except ValueError:
             logger.error(f"Invalid price format for book {book_details.title}: {book_details.price}")
+            self._mark(book_url, FAILED)
             return False
         except Exception as e:
             logger.error(f"Error storing book {book_details.title}: {str(e)}")
+            self._mark(book_url, FAILED)
             return False
 
-    async def _process_page(self, page_url: str) -> Tuple[int, List[str]]:
-        """Process a single page of books"""
-        soup = await self._get_page(page_url)
-        if not soup:
-            return 0, []
+    async def _process_page(self, page_url: str) -> Optional[Tuple[List[str], List[str]]]:
+        """Process a single listing page, returning its book links and next pages, or None if it failed"""
+        data, _ = await self._load(page_url, LISTING_PAGE)
+        if not data:
+            return None
+        logger.info(f"Found {len(data['books'])} books on page {page_url}")
+        return data["books"], data["next"]
 
-        books = soup.find_all('article', class_='product_pod')
-        logger.info(f"Found {len(books)} books on page {page_url}")
+    async def _handle_task(self, task: CrawlTask) -> List[CrawlTask]:
+        """Crawl engine handler: fetch one page and return the pages it links to"""
+        if task.kind == DETAIL:
+            await self._process_book(task.url)
+            discovered = []
+        else:
+            logger.info(f"Processing page: {task.url}")
+            links = await self._process_page(task.url)
+            if links is None:
+                self._mark(task.url, FAILED)
+                discovered = []
+            else:
+                book_urls, next_pages = links
+                discovered = (
+                    [CrawlTask(DETAIL, url) for url in book_urls]
+                    + [CrawlTask(LISTING, url) for url in next_pages]
+                )
+                if self.checkpoint:
+                    self.checkpoint.discover(discovered)
+                    self.checkpoint.record(task.url, DONE)
+        if self.checkpoint:
+            await self.checkpoint.maybe_flush()
+        return discovered
 
-        # Process books concurrently
-        tasks = []
-        for book in books:
-            link = book.find('h3').find('a')
-            if link and 'href' in link.attrs:
-                book_url = urljoin(page_url, link['href'])
-                tasks.append(self._process_book(book_url))
+    async def _resume_state(self) -> Optional[CrawlState]:
+        """State of the checkpointed or shared crawl if it can be resumed, otherwise it is discarded"""
+        store = self.shared or self.checkpoint
+        state = await store.load()
+        if state is None:
+            return None
+        live = (await self.book_repository.pinned()).version
+        reason = None
+        if state.incremental != self.incremental:
+            reason = "it ran in another scrape mode"
+        elif not self.incremental and (not state.version or state.version <= live):
+            reason = f"catalogue version {state.version} can no longer be published"
+        if reason is None:
+            return state
 
-        results = await asyncio.gather(*tasks)
-        successful_books = sum(results)
+        logger.warning(f"Discarding checkpoint {store.crawl_id}: {reason}")
+        if state.version and state.version != live:
+            await BookRepository(self.book_repository.storage_format, state.version).drop_version()
+        await store.clear()
+        return None
 
-        # Get next page
-        next_pages = []
-        next_button = soup.select_one('li.next a')
-        if next_button and 'href' in next_button.attrs:
-            next_pages.append(urljoin(page_url, next_button['href']))
+    def _reset(self, incremental: bool) -> None:
+        """Reset the counters of a new scrape"""
+        self.incremental = incremental
+        self.books_collected = 0
+        self.fetch_errors = 0
+        self.pages_unchanged = 0
+        self.seen_book_ids = set()
+        self.store_errors = 0
+        self.write_buffer = None
+        self.engine = None
+        self.published = False
+        self.error = None
+        self.started_at = time.monotonic()
+        self.checkpoint = None
+        self.shared = None
+        self._book_urls = {}
+        self._unstored_pages = []
 
-        return successful_books, next_pages
+    def _new_engine(self) -> Union[CrawlEngine, DistributedCrawlEngine]:
+        if self.shared:
+            return DistributedCrawlEngine(self._handle_task, self.shared, workers=settings.crawl_workers)
+        return CrawlEngine(
+            handler=self._handle_task,
+            workers=settings.crawl_workers,
+            queue_size=settings.crawl_queue_size
+        )
 
-    async def scrape(self) -> int:
-        """Scrape books from the website"""
-        logger.info("Starting book scraping")
+    async def _report_shared(self) -> None:
+        """Add the books and errors of this worker to the shared crawl"""
+        lost, self.store_errors = self.store_errors, 0
+        errors = self.fetch_errors + (self.engine.stats.errors if self.engine else 0)
+        self.fetch_errors = 0
+        await self.shared.record_books(self.seen_book_ids)
+        if lost:
+            await self.shared.release_books(lost)
+        await self.shared.add_errors(errors)
 
-        books_collected = 0
+    async def _settle_shared(self) -> None:
+        """Stop the shared crawl, wait for its helpers and take over the totals of all workers"""
+        await self.shared.stop()
+        await self.shared.wait_for_helpers()
+        totals = await self.shared.totals()
+        self.books_collected = self.shared.reserved = totals["books"]
+        self.fetch_errors = totals["fetch_errors"]
+        self.store_errors = totals["store_errors"]
+        if self.incremental:
+            self.seen_book_ids = await self.shared.book_ids()
 
+    async def _publish(self, repository: BookRepository) -> bool:
+        """Make the catalogue version written by a full scrape live if the scrape completed"""
+        if self.cancelled:
+            logger.warning("Scrape cancelled, keeping the live catalogue")
+            return False
+        if self.store_errors or self.books_collected < settings.min_books:
+            logger.warning(
+                f"Scrape incomplete ({self.books_collected} books, {self.store_errors} lost writes), "
+                f"keeping the live catalogue"
+            )
+            return False
+        if not await repository.publish_version():
+            logger.warning(f"A newer catalogue is already live, discarding version {repository.version}")
+            return False
+        logger.info(f"Catalogue version {repository.version} is live")
+        return True
+
+    async def _collect_versions(self, repository: BookRepository, published: bool) -> None:
+        """Delete the versions replaced by a published scrape once readers are done with them, or the unpublished one"""
         try:
-            await self.book_repository.clear_all()
-            logger.info("Database cleared")
+            if published:
+                await asyncio.sleep(settings.catalogue_gc_delay)
+                removed = await repository.collect_versions()
+            else:
+                removed = await repository.drop_version()
+            logger.info(f"Removed {removed} keys of unused catalogue versions")
+        except Exception as e:
+            logger.error(f"Failed to remove unused catalogue versions: {str(e)}")
+
+    async def scrape(
+        self,
+        incremental: Optional[bool] = None,
+        checkpoint: Optional[str] = None,
+        distributed: Optional[str] = None
+    ) -> int:
+        """
+        Scrape books from the website.
 
-            pages_to_process = [settings.book_base_url + "index.html"]
-            processed_pages = set()
+        A full scrape writes a new catalogue version while the current one
+        keeps being served, and switches readers to it atomically once at
+        least `min_books` books were stored; otherwise the live catalogue is
+        left alone. Replaced and abandoned versions are deleted in the
+        background. An incremental scrape updates the live version in place:
+        it sends conditional requests, skips pages that did not change,
+        finally removes the books missing from this crawl and publishes a new
+        cache version token. Either way the search caches of the API workers
+        are invalidated. After cancel() the crawl stops early and nothing is
+        published or pruned.
 
-            while books_collected < settings.max_books and pages_to_process:
-                current_page = pages_to_process.pop(0)
-                if current_page in processed_pages:
-                    continue
+        With `checkpoint` the crawl progress is saved in Redis under that ID
+        (CrawlCheckpoint). A scrape given the ID of an unfinished crawl
+        resumes it: pages already done are not fetched again, the books
+        already stored count towards max_books, and a full scrape keeps
+        writing the catalogue version it started. The checkpoint is deleted
+        when the scrape ends, unless it was cancelled as resumable.
 
-                processed_pages.add(current_page)
-                logger.info(f"Processing page: {current_page}")
+        With `distributed` the crawl is shared (SharedCrawl) under that ID
+        instead: its frontier, seen set, max_books budget and rate limits
+        live in Redis, and workers calling join() with the ID crawl it
+        alongside this coordinator, into the same catalogue version. The
+        coordinator waits for them before publishing or pruning. The shared
+        frontier is itself the checkpoint.
+        """
+        self._reset(settings.incremental_scrape if incremental is None else incremental)
+        logger.info(f"Starting {'incremental' if self.incremental else 'full'} book scraping")
 
-                new_books, next_pages = await self._process_page(current_page)
-                books_collected += new_books
-                pages_to_process.extend(p for p in next_pages if p not in processed_pages)
+        if distributed:
+            self.shared = SharedCrawl(distributed)
+            self.fetcher.shared_rate_limit = True
+        elif checkpoint:
+            self.checkpoint = CrawlCheckpoint(checkpoint)
+        repository = None
+        seeds = [CrawlTask(LISTING, settings.book_base_url + "index.html")]
+        visited: List[str] = []
 
-                if books_collected >= settings.max_books:
-                    break
+        try:
+            state = await self._resume_state() if self.checkpoint or self.shared else None
+            if self.incremental:
+                repository = self.book_repository
+            elif state:
+                repository = BookRepository(self.book_repository.storage_format, state.version)
+                logger.info(f"Resuming catalogue version {repository.version}")
+            else:
+                repository = await self.book_repository.create_version()
+                logger.info(f"Writing catalogue version {repository.version}")
+
+            if state and self.shared:
+                seeds = []
+                logger.info(f"Resuming shared crawl {distributed}")
+            elif state:
+                seeds, visited = state.frontier, state.visited
+                self.books_collected = len(state.book_ids)
+                self.seen_book_ids = set(state.book_ids)
+                logger.info(
+                    f"Resuming crawl {checkpoint}: {len(visited)} pages done, {len(seeds)} queued, "
+                    f"{self.books_collected} books stored"
+                )
+            elif self.checkpoint or self.shared:
+                await (self.checkpoint or self.shared).begin(self.incremental, repository.version, seeds)
+
+            self.write_buffer = BookWriteBuffer(
+                repository,
+                batch_size=settings.store_batch_size,
+                flush_interval=settings.store_flush_interval,
+                on_error=self._on_store_error,
+                on_write=self._on_stored
+            )
 
-                logger.info(f"Successfully collected {books_collected} books so far")
-                await asyncio.sleep(settings.request_delay)  # Be polite
+            self.engine = self._new_engine()
+            if self.cancelled:
+                self.engine.stop()
+            stats = await self.engine.run(seeds, visited)
+            await self.write_buffer.close()
+            if self.shared:
+                await self._report_shared()
+                if not self.resumable:
+                    await self._settle_shared()
 
-            logger.info(f"Finished scraping. Total books collected: {books_collected}")
-            return books_collected
+            if self.incremental:
+                # Only prune after a clean crawl, a failed fetch or write must not delete its book
+                if self.fetch_errors or stats.errors or self.store_errors or self.cancelled:
+                    logger.warning("Crawl had errors or was cancelled, skipping removal of missing books")
+                else:
+                    removed = await self.book_repository.prune_books(self.seen_book_ids)
+                    logger.info(f"Removed {removed} books missing from the site")
+                logger.info(f"{self.pages_unchanged} pages unchanged since the last scrape")
+            else:
+                self.published = await self._publish(repository)
+
+            logger.info(f"Finished scraping. Total books collected: {self.books_collected}")
+            logger.info(
+                f"Sent {self.fetcher.requests} requests: {self.fetcher.retries} retries, "
+                f"{self.fetcher.throttled} throttled"
+            )
+            return self.books_collected
 
         except Exception as e:
             logger.error(f"Unexpected error during scraping: {str(e)}", exc_info=True)
-            return books_collected
+            self.error = str(e)
+            return self.books_collected
         finally:
-            await self.client.aclose()
-            logger.info("HTTP client closed")
\ No newline at end of file
+            if self.write_buffer is not None:
+                await self.write_buffer.close()
+            await self._forget_unstored_pages()
+            if self.checkpoint:
+                try:
+                    if self.resumable:
+                        await self.checkpoint.flush()
+                    else:
+                        await self.checkpoint.clear()
+                except Exception as e:
+                    logger.error(f"Failed to update crawl checkpoint: {str(e)}")
+            if self.shared and not self.resumable:
+                try:
+                    # Helpers must be done writing before the abandoned version is dropped
+                    await self.shared.stop()
+                    await self.shared.wait_for_helpers()
+                    await self.shared.clear()
+                except Exception as e:
+                    logger.error(f"Failed to clear shared crawl: {str(e)}")
+            if self.incremental:
+                try:
+                    # API workers drop their cached searches
+                    await self.book_repository.publish_change()
+                except Exception as e:
+                    logger.error(f"Failed to publish catalogue change: {str(e)}")
+            elif repository is not None and not self.resumable:
+                self.gc_task = asyncio.create_task(self._collect_versions(repository, self.published))
+            await self.fetcher.close()
+
+    async def join(self, crawl_id: str, name: str) -> int:
+        """
+        Help crawl the distributed scrape started by scrape(distributed=crawl_id).
+
+        Pages are leased from the shared frontier and books written into the
+        catalogue version of the crawl until it is drained, its max_books
+        budget is spent or the coordinator stops it. Publishing and pruning
+        are left to the coordinator. Returns the books this worker stored.
+        """
+        self._reset(False)
+        self.shared = SharedCrawl(crawl_id, name)
+        self.fetcher.shared_rate_limit = True
+        try:
+            state = await self.shared.load()
+            if state is None:
+                return 0
+            self.incremental = state.incremental
+            repository = self.book_repository
+            if not self.incremental:
+                repository = BookRepository(self.book_repository.storage_format, state.version)
+            logger.info(f"Joining shared crawl {crawl_id} as {name}")
+
+            self.write_buffer = BookWriteBuffer(
+                repository,
+                batch_size=settings.store_batch_size,
+                flush_interval=settings.store_flush_interval,
+                on_error=self._on_store_error,
+                on_write=self._on_stored
+            )
+            self.engine = self._new_engine()
+            if self.cancelled:
+                self.engine.stop()
+            await self.engine.run()
+            await self.write_buffer.close()
+            logger.info(f"Left shared crawl {crawl_id} after storing {self.books_collected} books")
+            return self.books_collected
+
+        except Exception as e:
+            logger.error(f"Unexpected error helping shared crawl {crawl_id}: {str(e)}", exc_info=True)
+            self.error = str(e)
+            return self.books_collected
+        finally:
+            if self.write_buffer is not None:
+                await self.write_buffer.close()
+            await self._forget_unstored_pages()
+            try:
+                await self._report_shared()
+                await self.shared.leave()
+            except Exception as e:
+                logger.error(f"Failed to report to shared crawl {crawl_id}: {str(e)}")
+            await self.fetcher.close()
@@ -7,10 +7,10 @@ import time
 import logging
 import concurrent.futures
 from core.config import settings
+from services.webdriver_pool import WebDriverPool, WebDriverPoolTimeout, get_webdriver_pool
+from utils.metrics import WEBDRIVER_COMMAND_SECONDS
 from typing import List, Dict, Optional
 from functools import partial
-import os
-import urllib3
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,19 +18,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Configure urllib3 to use a larger connection pool
-urllib3.PoolManager(maxsize=30)
+# Extracts every story of a listing page in one WebDriver round trip. The
+# marker comment lets recorded/fake WebDriver endpoints recognise the script.
+EXTRACT_STORIES_MARKER = "/* hn-extract-stories */"
+EXTRACT_STORIES_JS = EXTRACT_STORIES_MARKER + """
+return Array.prototype.map.call(document.querySelectorAll('tr.athing'), function (row) {
+    var link = row.querySelector('td.title a');
+    if (!link) { return null; }
+    var sub = row.nextElementSibling;
+    var text = function (root, selector) {
+        var el = root && root.querySelector(selector);
+        return el ? el.textContent : '';
+    };
+    var comments = '';
+    var links = sub ? sub.querySelectorAll('a') : [];
+    for (var i = links.length - 1; i >= 0; i--) {
+        if (/comment|discuss/.test(links[i].textContent)) { comments = links[i].textContent; break; }
+    }
+    return {
+        title: link.textContent,
+        url: link.href,
+        score: text(sub, 'span.score'),
+        rank: text(row, 'span.rank'),
+        age: text(sub, 'span.age'),
+        comments: comments
+    };
+});
+"""
+
+def _digits(text: Optional[str]) -> Optional[int]:
+    digits = ''.join(filter(str.isdigit, text or ''))
+    return int(digits) if digits else None
+
+# Shared by every HackerNewsScraper instance, one thread per pooled session
+_page_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+def _get_page_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _page_executor
+    if _page_executor is None:
+        _page_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.webdriver_pool_size,
+            thread_name_prefix="hn-page"
+        )
+    return _page_executor
 
 class HackerNewsScraper:
-    def __init__(self):
+    def __init__(self, pool: Optional[WebDriverPool] = None):
         self.driver: Optional[webdriver.Remote] = None
-        # Use ThreadPoolExecutor with optimal workers based on your system
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(
-            max_workers=min(5, (os.cpu_count() or 1) * 2)
-        )
+        self.thread_pool = _get_page_executor()
         self.driver_options = self._get_driver_options()
+        self.pool = pool or get_webdriver_pool(HackerNewsScraper._create_driver_instance)
 
-    def _get_driver_options(self) -> webdriver.ChromeOptions:
+    @staticmethod
+    def _get_driver_options() -> webdriver.ChromeOptions:
         """Configure and return Chrome options"""
         options = webdriver.ChromeOptions()
         options.add_argument('--no-sandbox')
@@ -56,12 +96,16 @@ class HackerNewsScraper:
             logger.error(f"Failed to connect to Selenium: {str(e)}")
             raise
 
-    def _create_driver_instance(self) -> webdriver.Remote:
+    @staticmethod
+    def _create_driver_instance() -> webdriver.Remote:
         """Create a new driver instance with configured options"""
-        return webdriver.Remote(
+        driver = webdriver.Remote(
             command_executor=settings.selenium_command_executor,
-            options=self.driver_options
+            options=HackerNewsScraper._get_driver_options()
         )
+        driver.set_page_load_timeout(30)
+        driver.set_script_timeout(30)
+        return driver
 
     def _scrape_story_row(self, row) -> Optional[Dict[str, any]]:
         """Scrape a single story row"""
@@ -89,54 +133,73 @@ class HackerNewsScraper:
             logger.warning("Failed to extract story details from row")
             return None
 
+    @staticmethod
+    def _story_from_script(item: Dict[str, any]) -> Dict[str, any]:
+        """Map one record returned by EXTRACT_STORIES_JS to a headline"""
+        return {
+            "title": (item.get("title") or "").strip(),
+            "score": _digits(item.get("score")) or 0,
+            "url": item.get("url") or "",
+            "rank": _digits(item.get("rank")),
+            "age": (item.get("age") or "").strip() or None,
+            "comments": _digits(item.get("comments")) or 0
+        }
+
+    def _scrape_rows_with_script(self, driver) -> List[Dict[str, any]]:
+        """Extract every story with a single execute_script round trip"""
+        with WEBDRIVER_COMMAND_SECONDS.time("execute_script"):
+            items = driver.execute_script(EXTRACT_STORIES_JS) or []
+        return [self._story_from_script(item) for item in items if item]
+
+    def _scrape_rows_with_elements(self, driver) -> List[Dict[str, any]]:
+        """Extract stories with per-row WebDriver element lookups"""
+        with WEBDRIVER_COMMAND_SECONDS.time("find_elements"):
+            rows = driver.find_elements(By.CSS_SELECTOR, "tr.athing")
+
+        # Process rows in parallel using thread pool
+        with concurrent.futures.ThreadPoolExecutor() as row_executor:
+            return list(filter(None, row_executor.map(
+                self._scrape_story_row,
+                rows,
+                timeout=10
+            )))
+
     def _scrape_page(self, page: int) -> List[Dict[str, any]]:
         """
-        Scrape a single page of Hacker News
+        Scrape a single page of Hacker News on a session leased from the pool
         :param page: Page number to scrape
         :return: List of stories from this page
         """
-        thread_driver = None
         try:
-            thread_driver = self._create_driver_instance()
-            thread_driver.set_page_load_timeout(30)
-            thread_driver.set_script_timeout(30)
-
-            url = f"{settings.hnews_site_url}?p={page}" if page > 1 else settings.hnews_site_url
-            logger.debug(f"Fetching page {page}: {url}")
-
-            try:
-                thread_driver.get(url)
-                # Wait for main content to load
-                WebDriverWait(thread_driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "tr.athing"))
-                )
-            except TimeoutException:
-                logger.warning(f"Timeout loading page {page}, trying to continue")
-                return []
-
-            # Find all story rows
-            rows = thread_driver.find_elements(By.CSS_SELECTOR, "tr.athing")
-            logger.info(f"Found {len(rows)} stories on page {page}")
-
-            # Process rows in parallel using thread pool
-            with concurrent.futures.ThreadPoolExecutor() as row_executor:
-                stories = list(filter(None, row_executor.map(
-                    self._scrape_story_row,
-                    rows,
-                    timeout=10
-                )))
-
-            return stories
+            with self.pool.lease() as thread_driver:
+                url = f"{settings.hnews_site_url}?p={page}" if page > 1 else settings.hnews_site_url
+                logger.debug(f"Fetching page {page}: {url}")
 
+                try:
+                    with WEBDRIVER_COMMAND_SECONDS.time("get"):
+                        thread_driver.get(url)
+                        # Wait for main content to load
+                        WebDriverWait(thread_driver, 10).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "tr.athing"))
+                        )
+                except TimeoutException:
+                    logger.warning(f"Timeout loading page {page}, trying to continue")
+                    return []
+
+                if settings.hnews_selenium_extraction == "script":
+                    stories = self._scrape_rows_with_script(thread_driver)
+                else:
+                    stories = self._scrape_rows_with_elements(thread_driver)
+                logger.info(f"Found {len(stories)} stories on page {page}")
+
+                return stories
+
+        except WebDriverPoolTimeout as e:
+            logger.error(f"Error scraping page {page}: {str(e)}")
+            return []
         except Exception as e:
             logger.error(f"Error scraping page {page}: {str(e)}", exc_info=True)
             return []
-        finally:
-            if thread_driver:
-                try:
-                    thread_driver.quit()
-                except Exception as e:
-                    logger.error(f"Error closing thread driver: {str(e)}")
 
     def fetch_top_stories(self, pages: int = 1) -> List[Dict[str, any]]:
         """
@@ -177,6 +240,4 @@ class HackerNewsScraper:
                 self.driver = None
                 logger.info("Selenium driver closed successfully")
             except Exception as e:
-                logger.error(f"Error closing Selenium driver: {str(e)}")
-        # Shutdown the thread pool
-        self.thread_pool.shutdown(wait=True)
\ No newline at end of file
+                logger.error(f"Error closing Selenium driver: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,158 @@
+import time
+import asyncio
+import logging
+from urllib.parse import urljoin, urlsplit
+from typing import Dict, List, Optional
+
+import httpx
+from lxml import etree, html
+
+from core.config import settings
+from services.parsers import detect_charset, xpath_has_class
+from utils.metrics import FETCH_SECONDS, PARSE_SECONDS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Same lookups the Selenium scraper performs per row, compiled once
+_STORY_ROWS = etree.XPath(f"//tr[{xpath_has_class('athing')}]")
+_TITLE_LINK = etree.XPath(f"(.//td[{xpath_has_class('title')}]//a)[1]")
+_SCORE = etree.XPath(f"following-sibling::tr[1]//span[{xpath_has_class('score')}]")
+_RANK = etree.XPath(f".//span[{xpath_has_class('rank')}]")
+_AGE = etree.XPath(f"following-sibling::tr[1]//span[{xpath_has_class('age')}]")
+_SUBTEXT_LINKS = etree.XPath("following-sibling::tr[1]//a")
+
+
+def _digits(text: Optional[str]) -> Optional[int]:
+    digits = ''.join(filter(str.isdigit, text or ''))
+    return int(digits) if digits else None
+
+
+def _text(elements: list) -> str:
+    return ''.join(elements[0].itertext()).strip() if elements else ''
+
+
+def parse_stories(content: bytes, content_type: Optional[str], page_url: str) -> List[Dict[str, any]]:
+    """
+    Parse every story of a Hacker News listing page in a single pass.
+
+    Each `tr.athing` row gives the title link and rank; the score, age and
+    comment count come from the following subtext row, score and comments
+    defaulting to 0 (job posts have neither), as the Selenium backend
+    returns them. Relative links (Ask HN, etc.) are resolved against the page
+    URL, as a browser does.
+    """
+    parser = html.HTMLParser(encoding=detect_charset(content, content_type))
+    tree = etree.fromstring(content, parser)
+    if tree is None:
+        return []
+
+    stories = []
+    for row in _STORY_ROWS(tree):
+        links = _TITLE_LINK(row)
+        if not links:
+            logger.warning("Failed to extract story details from row")
+            continue
+        link = links[0]
+
+        comments = ''
+        for subtext_link in reversed(_SUBTEXT_LINKS(row)):
+            text = ''.join(subtext_link.itertext())
+            if 'comment' in text or 'discuss' in text:
+                comments = text
+                break
+
+        stories.append({
+            "title": ''.join(link.itertext()).strip(),
+            "score": _digits(_text(_SCORE(row))) or 0,
+            "url": urljoin(page_url, link.get("href", "")),
+            "rank": _digits(_text(_RANK(row))),
+            "age": _text(_AGE(row)) or None,
+            "comments": _digits(comments) or 0
+        })
+    return stories
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_hn_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client used for Hacker News requests"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers={'User-Agent': settings.user_agent},
+            timeout=settings.request_timeout,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        )
+    return _client
+
+
+async def close_hn_client() -> None:
+    """Close the pooled Hacker News client"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class HackerNewsHttpScraper:
+    """Fetches Hacker News listing pages over pooled async HTTP, no browser involved"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Resolved per request, so a shared scraper follows the pooled client across restarts
+        return self._client or get_hn_client()
+
+    async def _scrape_page(self, page: int) -> List[Dict[str, any]]:
+        """
+        Scrape a single page of Hacker News
+        :param page: Page number to scrape
+        :return: List of stories from this page, empty when it could not be fetched
+        """
+        url = f"{settings.hnews_site_url}?p={page}" if page > 1 else settings.hnews_site_url
+        logger.debug(f"Fetching page {page}: {url}")
+
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.client.get(url)
+            status = str(response.status_code)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            # As the Selenium backend does, a failed page yields no stories
+            # rather than failing the others (and the Selenium fallback)
+            logger.error(f"Error scraping page {page}: {str(e)}")
+            return []
+        finally:
+            FETCH_SECONDS.observe(time.perf_counter() - started, urlsplit(url).netloc, status)
+        with PARSE_SECONDS.time("hn_listing"):
+            stories = parse_stories(response.content, response.headers.get('content-type'), str(response.url))
+        logger.info(f"Found {len(stories)} stories on page {page}")
+        return stories
+
+    async def fetch_top_stories(self, pages: int = 1) -> List[Dict[str, any]]:
+        """
+        Fetch top stories from Hacker News, all pages concurrently
+        :param pages: Number of pages to scrape (default: 1)
+        :return: List of dictionaries containing title, score, and URL for each story
+        """
+        if not (1 <= pages <= 10):  # Reasonable limit
+            raise ValueError("Pages must be between 1 and 10")
+
+        all_stories = []
+        for page_stories in await asyncio.gather(*(self._scrape_page(page) for page in range(1, pages + 1))):
+            all_stories.extend(page_stories)
+
+        # Sort stories by score (descending)
+        all_stories.sort(key=lambda x: x['score'], reverse=True)
+        logger.info(f"Total {len(all_stories)} stories fetched")
+        return all_stories
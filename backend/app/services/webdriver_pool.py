@@ -0,0 +1,247 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from core.config import settings
+from utils.metrics import WEBDRIVER_SESSION_SECONDS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class WebDriverPoolTimeout(Exception):
+    """No WebDriver session became available within the acquire timeout"""
+
+
+class WebDriverPoolClosed(Exception):
+    """The pool has been shut down"""
+
+
+@dataclass
+class PooledSession:
+    """A live WebDriver session and its bookkeeping"""
+    driver: Any
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class WebDriverPool:
+    """
+    Process-wide pool of warm WebDriver sessions with lease/return semantics.
+
+    Sessions are created lazily up to `size`, health-checked before being
+    handed out, and recycled after `max_uses` leases. The pool is thread-safe
+    since Selenium calls run in worker threads.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int,
+        max_uses: int,
+        acquire_timeout: float,
+        health_check: Optional[Callable[[Any], None]] = None
+    ):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.acquire_timeout = acquire_timeout
+        self.health_check = health_check or (lambda driver: driver.title)
+        self._idle: List[PooledSession] = []
+        self._total = 0
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        # Metrics
+        self.sessions_created = 0
+        self.sessions_recycled = 0
+        self.sessions_failed = 0
+        self.acquires = 0
+        self.acquire_timeouts = 0
+        self._acquire_wait_total = 0.0
+
+    def _create(self) -> PooledSession:
+        started = time.monotonic()
+        driver = self.factory()
+        elapsed = time.monotonic() - started
+        self.sessions_created += 1
+        WEBDRIVER_SESSION_SECONDS.observe(elapsed)
+        logger.info(f"Created WebDriver session in {elapsed:.2f}s")
+        return PooledSession(driver=driver)
+
+    def _quit(self, session: PooledSession) -> None:
+        try:
+            session.driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing WebDriver session: {str(e)}")
+
+    def _is_healthy(self, session: PooledSession) -> bool:
+        try:
+            self.health_check(session.driver)
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy WebDriver session: {str(e)}")
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledSession:
+        """Lease a session, waiting up to `timeout` seconds for one to free up"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            session = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise WebDriverPoolClosed("WebDriver pool is closed")
+                    if self._idle:
+                        session = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        # Reserve the slot, the session is created outside the lock
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.acquire_timeouts += 1
+                        raise WebDriverPoolTimeout(f"No WebDriver session available after {timeout:.1f}s")
+                    self._condition.wait(remaining)
+
+            if session is None:
+                try:
+                    session = self._create()
+                except Exception:
+                    with self._condition:
+                        self._total -= 1
+                        self.sessions_failed += 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_healthy(session):
+                self._quit(session)
+                with self._condition:
+                    self._total -= 1
+                    self.sessions_failed += 1
+                    self._condition.notify()
+                continue
+
+            with self._condition:
+                session.uses += 1
+                self._in_use += 1
+                self.acquires += 1
+                self._acquire_wait_total += time.monotonic() - started
+            return session
+
+    def release(self, session: PooledSession, discard: bool = False) -> None:
+        """Return a leased session; broken or worn-out sessions are quit"""
+        recycle = discard or self._closed or session.uses >= self.max_uses
+        with self._condition:
+            self._in_use -= 1
+            if recycle:
+                self._total -= 1
+                if not discard:
+                    self.sessions_recycled += 1
+            else:
+                self._idle.append(session)
+            self._condition.notify()
+        if recycle:
+            self._quit(session)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Context manager yielding a driver; the session is discarded if the body raises"""
+        session = self.acquire(timeout)
+        discard = False
+        try:
+            yield session.driver
+        except Exception:
+            discard = True
+            raise
+        finally:
+            self.release(session, discard=discard)
+
+    def warm(self, count: int) -> None:
+        """Create up to `count` idle sessions ahead of the first request"""
+        for _ in range(count):
+            with self._condition:
+                if self._closed or self._total >= self.size:
+                    return
+                self._total += 1
+            try:
+                session = self._create()
+            except Exception:
+                with self._condition:
+                    self._total -= 1
+                    self.sessions_failed += 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._idle.append(session)
+                self._condition.notify()
+
+    def metrics(self) -> dict:
+        """Snapshot of pool usage"""
+        with self._condition:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "sessions_created": self.sessions_created,
+                "sessions_recycled": self.sessions_recycled,
+                "sessions_failed": self.sessions_failed,
+                "acquires": self.acquires,
+                "acquire_timeouts": self.acquire_timeouts,
+                "avg_acquire_wait_ms": (self._acquire_wait_total / self.acquires * 1000) if self.acquires else 0.0,
+            }
+
+    def close(self) -> None:
+        """Quit idle sessions; leased sessions are quit when they are returned"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            self._quit(session)
+        logger.info("WebDriver pool closed")
+
+
+_pool: Optional[WebDriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_webdriver_pool(factory: Optional[Callable[[], Any]] = None) -> WebDriverPool:
+    """Return the process-wide WebDriver pool, creating it with `factory` on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if factory is None:
+                raise RuntimeError("WebDriver pool is not initialized")
+            _pool = WebDriverPool(
+                factory=factory,
+                size=settings.webdriver_pool_size,
+                max_uses=settings.webdriver_max_uses,
+                acquire_timeout=settings.webdriver_acquire_timeout
+            )
+        return _pool
+
+
+def peek_webdriver_pool() -> Optional[WebDriverPool]:
+    """Return the process-wide pool if one has been created"""
+    return _pool
+
+
+def shutdown_webdriver_pool() -> None:
+    """Close the process-wide WebDriver pool if it was created"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
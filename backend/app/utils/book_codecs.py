@@ -0,0 +1,131 @@
+import json
+from typing import Dict, List, Optional, Sequence, Union
+
+# Storage layouts for book:<id> records
+JSON = "json"        # String holding the book as JSON (the original layout)
+HASH = "hash"        # Hash with one-letter fields: t(itle), p(rice), c(ategory ID), i(mage URL)
+MSGPACK = "msgpack"  # String holding a msgpack array [category ID, title, price, image URL]
+
+STORAGE_FORMATS = (JSON, HASH, MSGPACK)
+
+# Fields of a book record, in the order of the Book model
+BOOK_FIELDS = ("id", "title", "category", "price", "image_url")
+_HASH_FIELDS = {"title": b"t", "price": b"p", "category": b"c", "image_url": b"i"}
+
+# Interned categories: lowercase name -> ID and ID -> display name, outside the
+# category: prefix of the per-category keys so no category name collides
+CATEGORY_IDS_KEY = "categories:ids"
+CATEGORY_NAMES_KEY = "categories:names"
+CATEGORY_NEXT_ID_KEY = "categories:next_id"
+
+
+def _msgpack():
+    import msgpack
+    return msgpack
+
+
+def check_format(storage_format: str) -> str:
+    """Validate a storage format name, making sure its library is importable"""
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown book storage {storage_format!r}, expected one of {', '.join(STORAGE_FORMATS)}")
+    if storage_format == MSGPACK:
+        _msgpack()
+    return storage_format
+
+
+def check_fields(fields: Sequence[str]) -> List[str]:
+    """Validate a projection, returning its fields without duplicates"""
+    unknown = [field for field in fields if field not in BOOK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown book fields {', '.join(unknown)}, expected some of {', '.join(BOOK_FIELDS)}")
+    return list(dict.fromkeys(fields))
+
+
+def hash_fields(fields: Sequence[str]) -> List[bytes]:
+    """Fields of a hash record to HMGET for a projection on `fields` (the ID is in the key)"""
+    return [_HASH_FIELDS[field] for field in fields if field in _HASH_FIELDS]
+
+
+def record_args(storage_format: str, book) -> list:
+    """
+    Script arguments describing the record of `book`. The category ID is
+    interned by the store script, so msgpack records are sent without their
+    array header and first element, which the script prepends.
+    """
+    if storage_format == JSON:
+        return [book.model_dump_json()]
+    if storage_format == HASH:
+        return ["t", book.title, "p", repr(book.price), "i", book.image_url]
+    packb = _msgpack().packb
+    return [packb(book.title) + packb(book.price) + packb(book.image_url)]
+
+
+def category_names(raw: Dict[bytes, bytes]) -> Dict[int, str]:
+    """Decode the CATEGORY_NAMES_KEY hash read through a binary client"""
+    return {int(category_id): name.decode() for category_id, name in raw.items()}
+
+
+def decode_book(book_key: Union[str, bytes], raw: Union[bytes, Dict[bytes, bytes], None],
+                names: Dict[int, str]) -> Optional[dict]:
+    """Book dict from a record in any storage format, as read by a binary client"""
+    if not raw:
+        return None
+    if isinstance(book_key, bytes):
+        book_key = book_key.decode()
+    book_id = book_key.split(":", 1)[1]
+
+    if isinstance(raw, dict):
+        return {
+            "id": book_id,
+            "title": raw[b"t"].decode(),
+            "price": float(raw[b"p"]),
+            "category": names.get(int(raw[b"c"]), ""),
+            "image_url": raw[b"i"].decode(),
+        }
+    if raw[:1] == b"{":
+        return json.loads(raw)
+    category_id, title, price, image_url = _msgpack().unpackb(raw)
+    return {
+        "id": book_id,
+        "title": title,
+        "price": price,
+        "category": names.get(category_id, ""),
+        "image_url": image_url,
+    }
+
+
+def book_document(book_key: Union[str, bytes], raw: Union[bytes, Dict[bytes, bytes], None],
+                  names: Dict[int, str]) -> Union[bytes, dict, None]:
+    """Like decode_book, but a JSON record is returned undecoded, as its bytes"""
+    if isinstance(raw, bytes) and raw[:1] == b"{":
+        return raw
+    return decode_book(book_key, raw, names)
+
+
+def project_book(book_key: Union[str, bytes], raw: Union[bytes, Dict[bytes, bytes], List[Optional[bytes]], None],
+                 names: Dict[int, str], fields: Sequence[str]) -> Optional[dict]:
+    """
+    `fields` of a book, from a record in any storage format or from the
+    values of an HMGET of hash_fields(fields) on a hash record, which only
+    decodes the fields asked for.
+    """
+    if isinstance(book_key, bytes):
+        book_key = book_key.decode()
+    if not isinstance(raw, list):
+        book = decode_book(book_key, raw, names)
+        return {field: book.get(field) for field in fields} if book else None
+    if raw and all(value is None for value in raw):
+        return None
+
+    values = dict(zip(hash_fields(fields), raw))
+    book = {}
+    for field in fields:
+        if field == "id":
+            book["id"] = book_key.split(":", 1)[1]
+        elif field == "price":
+            book["price"] = float(values[b"p"])
+        elif field == "category":
+            book["category"] = names.get(int(values[b"c"]), "")
+        else:
+            book[field] = values[_HASH_FIELDS[field]].decode()
+    return book
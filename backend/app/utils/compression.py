@@ -0,0 +1,147 @@
+import zlib
+from typing import Optional, Set
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional (pip install brotli, or the brotli extra), responses are only gzipped without it
+    brotli = None
+
+GZIP_LEVEL = 6  # Level 9 costs several times the CPU for a few percent on JSON
+BROTLI_QUALITY = 4  # Quality suited to compressing on the fly
+
+# Streams whose events must reach the client as they are produced
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+
+def accepted_encodings(header: str) -> Set[str]:
+    """Codings of an Accept-Encoding header, leaving out those refused with q=0"""
+    codings = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip()
+        if quality.startswith("q=") and quality[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if coding.strip():
+            codings.add(coding.strip())
+    return codings
+
+
+class GzipEncoder:
+    content_encoding = "gzip"
+
+    def __init__(self, level: int = GZIP_LEVEL) -> None:
+        # wbits 31: deflate with a gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def encode(self, body: bytes, more_body: bool) -> bytes:
+        data = self.compressor.compress(body)
+        # Each chunk of a streamed response goes out as soon as it is produced
+        return data + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    content_encoding = "br"
+
+    def __init__(self, quality: int = BROTLI_QUALITY) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def encode(self, body: bytes, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionResponder:
+    """
+    Compress one response with `encoder`, or leave it as is without one.
+
+    The start message is held until the first body chunk shows whether the
+    response is worth compressing: a complete body under `minimum_size`
+    bytes, a response that already has a Content-Encoding and Server-Sent
+    Events go out unchanged. Compressed streamed responses lose their
+    Content-Length; every response that could have been compressed gets
+    Vary: Accept-Encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, encoder: Optional[object]) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoder = encoder
+        self.send: Optional[Send] = None
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.started = False
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.started:
+            if self.compressing:
+                message["body"] = self.encoder.encode(message.get("body", b""), message.get("more_body", False))
+            await self.send(message)
+            return
+
+        self.started = True
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.passthrough or (len(body) < self.minimum_size and not more_body):
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoder is not None:
+            self.compressing = True
+            message["body"] = self.encoder.encode(body, more_body)
+            headers["Content-Encoding"] = self.encoder.content_encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+        await self.send(self.start)
+        await self.send(message)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes with brotli or gzip,
+    as the client's Accept-Encoding allows, brotli first when the brotli
+    package is installed (gzip only otherwise). Server-Sent Events and
+    responses that already have a Content-Encoding are sent as they are.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoder = BrotliEncoder()
+        elif "gzip" in accepted:
+            encoder = GzipEncoder()
+        else:
+            encoder = None
+        await CompressionResponder(self.app, self.minimum_size, encoder)(scope, receive, send)
@@ -0,0 +1,51 @@
+import json
+from typing import Any, Iterable, Union
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library encoder is used without it
+    orjson = None
+
+# A JSON value, or one already serialized
+Document = Union[bytes, Any]
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_array(items: Iterable[Document]) -> bytes:
+    """JSON array of the items, embedding serialized (bytes) items as they are"""
+    return b"[" + b",".join(item if isinstance(item, bytes) else dumps(item) for item in items) + b"]"
+
+
+def json_object(content: dict, **arrays: Iterable[Document]) -> bytes:
+    """
+    Serialize `content` with extra array fields spliced in through
+    json_array, so records read from Redis as JSON are never decoded.
+    """
+    body = dumps(content)
+    parts = [body[:-1]]
+    for name, items in arrays.items():
+        parts.append(b"," if len(parts) > 1 or len(body) > 2 else b"")
+        parts.append(dumps(name) + b":" + json_array(items))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with dumps; bytes content is taken as a serialized
+    body and sent as is. Returning it from a route also skips FastAPI's
+    response_model validation, so routes only use it for data they trust.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,229 @@
+import time
+import asyncio
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from sub-millisecond Redis calls to slow pages and WebDriver sessions
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format; disabled, observations are no-ops"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.metrics: List["_Metric"] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(enabled=settings.metrics_enabled)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        # Observed from the event loop and from WebDriver threads
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label values"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative `le` buckets per label values, with their sum"""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: a count per bucket, the +Inf one last, then the sum
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of the block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        names = self.labelnames + ("le",)
+        lines = []
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def timed(histogram: Histogram, *labels: str):
+    """Decorator observing the duration of every call of a coroutine function"""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *labels)
+        return wrapper
+    return decorator
+
+
+# Scraper
+FETCH_SECONDS = Histogram("scraper_fetch_seconds", "HTTP fetch latency of the scrapers per host and status", ("host", "status"))
+PARSE_SECONDS = Histogram("scraper_parse_seconds", "HTML parse time per page type, parse pool round trip included", ("page_type",))
+PAGES = Counter("scraper_pages", "Pages handled by the book scraper per page type and outcome", ("page_type", "outcome"))
+BOOKS_STORED = Counter("scraper_books_stored", "Books written to the catalogue")
+BOOKS_SKIPPED = Counter("scraper_books_skipped", "Books scraped but not stored, per reason", ("reason",))
+ERRORS = Counter("scraper_errors", "Scraper errors per stage", ("stage",))
+# Storage
+REPOSITORY_SECONDS = Histogram("redis_repository_seconds", "BookRepository call latency per method, Redis round trips included", ("method",))
+# Selenium
+WEBDRIVER_SESSION_SECONDS = Histogram("webdriver_session_create_seconds", "Time to create a WebDriver session")
+WEBDRIVER_COMMAND_SECONDS = Histogram("webdriver_command_seconds", "WebDriver command round trip time per command", ("command",))
+# API
+HTTP_REQUEST_SECONDS = Histogram("http_request_seconds", "API request latency per route, method and status", ("method", "route", "status"))
+
+
+class MetricsMiddleware:
+    """
+    Observe every HTTP request in HTTP_REQUEST_SECONDS under its route
+    template (/jobs/{job_id}), so IDs in paths do not multiply the series;
+    paths no route matched share the "unmatched" label.
+    """
+
+    def __init__(self, app: ASGIApp, histogram: Histogram = HTTP_REQUEST_SECONDS) -> None:
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.histogram.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(
+                time.perf_counter() - started, scope["method"], getattr(route, "path", "unmatched"), status
+            )
+
+
+async def serve_metrics(port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY) -> asyncio.AbstractServer:
+    """
+    Serve the metrics of a process without an API (the scrape workers) on
+    `port`: every GET answers with the Prometheus text format.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = registry.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: " + CONTENT_TYPE.encode()
+                + b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host=host, port=port)
@@ -1,11 +1,85 @@
 from redis.asyncio import Redis
 from core.config import settings
+from utils.book_codecs import (
+    CATEGORY_IDS_KEY, CATEGORY_NAMES_KEY, CATEGORY_NEXT_ID_KEY, HASH, JSON,
+    book_document, category_names, check_fields, check_format, decode_book, hash_fields, project_book, record_args
+)
+from utils.metrics import REPOSITORY_SECONDS, timed
 from pydantic import BaseModel
-from typing import Optional, List
-import json
+from typing import AsyncIterator, Optional, List, Iterable, Sequence, Tuple, Union
+import asyncio
+import itertools
+import functools
+import re
+import math
+import uuid
+import string
 import hashlib
 import logging
 
+# Sort orders offered by BookRepository.get_books, each backed by a ZSET of book
+# keys over the whole catalogue and one per category
+SORT_INDEXES = {
+    "price": "books:by_price",
+    "title": "books:by_title",
+}
+
+def sort_index_key(sort: str, category: Optional[str] = None) -> str:
+    """ZSET holding the books of `category` (or all books) ordered by `sort`"""
+    return f"category:{category.lower()}:by_{sort}" if category else SORT_INDEXES[sort]
+
+_TITLE_ALPHABET = {char: index + 1 for index, char in enumerate(string.digits + string.ascii_lowercase)}
+_TITLE_SCORE_CHARS = 10  # 37**10 stays below 2**53, so scores are exact floats
+
+def title_score(title: str) -> float:
+    """
+    Sort score preserving the alphabetical order of the first ten letters or
+    digits of a title (case and punctuation ignored, ties broken by book key).
+    """
+    chars = [char for char in title.lower() if char in _TITLE_ALPHABET][:_TITLE_SCORE_CHARS]
+    score = 0
+    for index in range(_TITLE_SCORE_CHARS):
+        score = score * 37 + (_TITLE_ALPHABET[chars[index]] if index < len(chars) else 0)
+    return float(score)
+
+def sort_index_entries(book_key: str, book: "Book") -> List[Tuple[str, dict]]:
+    """(ZSET key, {member: score}) pairs indexing one book for every sort order"""
+    scores = {"price": book.price, "title": title_score(book.title)}
+    return [
+        (sort_index_key(sort, category), {book_key: scores[sort]})
+        for sort in SORT_INDEXES
+        for category in (None, book.category)
+    ]
+
+# Inverted index on titles: one ZSET of book keys per token, scored by the
+# token's share of the title, plus a lexicographic ZSET of all tokens for
+# prefix matching
+TITLE_TOKENS_KEY = "title:tokens"
+TITLE_PREFIX_EXPANSIONS = 50  # Tokens a trailing prefix may expand to
+TITLE_PREFIX_WEIGHT = 0.5  # Relevance of a prefix match relative to an exact one
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+_STOPWORDS = frozenset({"an", "and", "the", "of", "in", "on", "to", "for", "with", "at", "by", "from"})
+
+def title_tokens(text: str) -> List[str]:
+    """Distinct searchable tokens of a title or query, in order"""
+    return list(dict.fromkeys(
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ))
+
+def title_token_key(token: str) -> str:
+    return f"title:tok:{token}"
+
+def title_index_entries(book_key: str, book: "Book") -> List[Tuple[str, dict]]:
+    """(ZSET key, {member: score}) pairs adding one book to the title index"""
+    tokens = title_tokens(book.title)
+    if not tokens:
+        return []
+    weight = 1 / len(tokens)
+    entries = [(title_token_key(token), {book_key: weight}) for token in tokens]
+    entries.append((TITLE_TOKENS_KEY, {token: 0 for token in tokens}))
+    return entries
+
 class Book(BaseModel):
     """Model representing a book with its details"""
     id: Optional[str] = None
@@ -34,6 +108,7 @@ class RedisManager:
     """Singleton class to manage Redis connection"""
     _instance = None
     _redis_client = None
+    _raw_client = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -52,70 +127,835 @@ class RedisManager:
     def client(self) -> Redis:
         return self._redis_client
 
-class BookRepository:
-    """Repository class for Book operations"""
+    @property
+    def raw_client(self) -> Redis:
+        """Client returning bytes, for binary book records"""
+        if self._raw_client is None:
+            kwargs = dict(self._redis_client.connection_pool.connection_kwargs)
+            kwargs["decode_responses"] = False
+            self._raw_client = Redis(**kwargs)
+        return self._raw_client
+
+    async def warm(self, connections: int = 1) -> None:
+        """Open `connections` pooled connections ahead of the first requests"""
+        # Book records are read through the raw client, everything else through the decoding one
+        clients = (self.client, self.raw_client)
+        await asyncio.gather(*(client.ping() for client in clients for _ in range(max(1, connections))))
+
+    async def close(self) -> None:
+        """Close the pooled connections; a later command reconnects"""
+        await self._redis_client.aclose()
+        if self._raw_client is not None:
+            await self._raw_client.aclose()
+
+class PageFingerprint(BaseModel):
+    """Validators and parsed result of a fetched page, used by incremental scrapes"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: str
+    data: dict
+
+    def conditional_headers(self) -> dict:
+        """Headers turning the next request for this page into a conditional one"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class PageCache:
+    """Per-URL page fingerprints stored in Redis"""
     def __init__(self):
         self.redis = RedisManager().client
 
-    async def store_book(self, book: Book) -> str:
-        """Store book in Redis"""
+    async def get(self, url: str) -> Optional[PageFingerprint]:
+        """Return the stored fingerprint for url, if any"""
+        raw = await self.redis.get(f'page:{url}')
+        if not raw:
+            return None
+        try:
+            return PageFingerprint.model_validate_json(raw)
+        except ValueError as e:
+            logging.warning(f"Discarding invalid page fingerprint for {url}: {str(e)}")
+            return None
+
+    async def put(self, url: str, fingerprint: PageFingerprint) -> None:
+        """Store the fingerprint for url"""
+        await self.redis.set(f'page:{url}', fingerprint.model_dump_json())
+
+    async def delete(self, urls: Iterable[str]) -> None:
+        """Drop the fingerprints of urls, their next fetch is parsed again"""
+        keys = [f'page:{url}' for url in urls]
+        if keys:
+            await self.redis.delete(*keys)
+
+# Stores one book and its index entries unless the book key already exists
+# (or replaces it when overwriting), interning the category for the compact
+# storage formats.
+# KEYS: book, category set, categories, books:all, category IDs, category
+#       names, next category ID, then one ZSET per index entry
+# ARGV: format, category, category display name, overwrite flag, book member
+#       (the book key without its version prefix), number of record
+#       arguments, the record arguments, then a score and a member per index
+#       entry
+STORE_BOOK_SCRIPT = """
+local format, category, display, overwrite, member = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local n = tonumber(ARGV[6])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    if overwrite ~= '1' then
+        return 0
+    end
+    redis.call('DEL', KEYS[1])
+end
+if format == 'json' then
+    redis.call('SET', KEYS[1], ARGV[7])
+else
+    local cid = redis.call('HGET', KEYS[5], category)
+    if not cid then
+        cid = redis.call('INCR', KEYS[7])
+        redis.call('HSET', KEYS[5], category, cid)
+        redis.call('HSET', KEYS[6], cid, display)
+    end
+    cid = tonumber(cid)
+    if format == 'hash' then
+        redis.call('HSET', KEYS[1], 'c', cid, unpack(ARGV, 7, 6 + n))
+    else
+        -- msgpack fixarray of 4, then the category ID as a msgpack uint
+        local id
+        if cid < 128 then
+            id = string.char(cid)
+        elseif cid < 256 then
+            id = string.char(204, cid)
+        elseif cid < 65536 then
+            id = string.char(205, math.floor(cid / 256), cid % 256)
+        elseif cid < 4294967296 then
+            id = string.char(206, math.floor(cid / 16777216) % 256, math.floor(cid / 65536) % 256,
+                math.floor(cid / 256) % 256, cid % 256)
+        else
+            return redis.error_reply('category ID ' .. cid .. ' exceeds the msgpack uint32 range')
+        end
+        redis.call('SET', KEYS[1], string.char(148) .. id .. ARGV[7])
+    end
+end
+redis.call('SADD', KEYS[2], member)
+redis.call('SADD', KEYS[3], category)
+redis.call('SADD', KEYS[4], member)
+local j = 7 + n
+for i = 8, #KEYS do
+    redis.call('ZADD', KEYS[i], ARGV[j], ARGV[j + 1])
+    j = j + 2
+end
+return 1
+"""
+
+STORAGE_FORMAT_KEY = "books:format"  # Storage format of the stored records, absent means json
+
+TEMP_KEY_PREFIX = "tmp:books:"  # Intermediate search results
+STREAM_RESULT_TTL = 600  # Seconds the matches of an abandoned stream are kept
+
+# Catalogue changes are announced by replacing the version token and publishing
+# it, so in-process caches of every worker can drop what they hold
+CATALOGUE_VERSION_KEY = "catalogue:version"
+CATALOGUE_CHANNEL = "catalogue:changed"
+
+# Catalogue namespaces: a full scrape writes every catalogue key under its own
+# v{n}: prefix and goes live by moving CATALOGUE_CURRENT_KEY to n. Version 0
+# is the unprefixed namespace of catalogues written before versioning.
+CATALOGUE_CURRENT_KEY = "catalogue:current"
+CATALOGUE_NEXT_KEY = "catalogue:next"
+CATALOGUE_VERSIONS_KEY = "catalogue:versions"  # Replaced versions whose keys are left to collect
+_LEGACY_PATTERNS = ("book:*", "category:*", "categories:*", "title:*", "books:by_*")
+_LEGACY_KEYS = ("categories", "books:all", STORAGE_FORMAT_KEY)
+
+def version_prefix(version: int) -> str:
+    """Key prefix of catalogue version `version`"""
+    return f"v{version}:" if version else ""
+
+# Makes a catalogue version live unless a newer one was published meanwhile,
+# and announces the change with a new cache version token.
+# KEYS: current version, replaced versions, version token
+# ARGV: version, new token, channel
+# Returns the replaced version, or -1 when the version is not newer.
+PUBLISH_VERSION_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local version = tonumber(ARGV[1])
+if version <= current then
+    return -1
+end
+redis.call('SET', KEYS[1], version)
+redis.call('SADD', KEYS[2], current)
+redis.call('SET', KEYS[3], ARGV[2])
+redis.call('PUBLISH', ARGV[3], ARGV[2])
+return current
+"""
+
+def _on_version(method):
+    """
+    Run a BookRepository method on its pinned catalogue version, or on the
+    live one, observing its latency (version lookup included) in
+    REPOSITORY_SECONDS under the method name.
+    """
+    @functools.wraps(method)
+    @timed(REPOSITORY_SECONDS, method.__name__)
+    async def wrapper(self, *args, **kwargs):
+        if self.version is None:
+            self = await self.pinned()
+        return await method(self, *args, **kwargs)
+    return wrapper
+
+async def _no_batches() -> AsyncIterator[List[dict]]:
+    return
+    yield
+
+class BookRepository:
+    """
+    Repository class for Book operations.
+
+    Without `version` every call works on the live catalogue version, resolved
+    per call, so a reader sees one complete version even when it is replaced
+    meanwhile. With `version` the repository is pinned to that namespace.
+    """
+    def __init__(self, storage_format: Optional[str] = None, version: Optional[int] = None):
+        self.redis = RedisManager().client
+        self.storage_format = check_format(storage_format or settings.book_storage)
+        self.version = version
+        self.prefix = version_prefix(version or 0)
+        self._store_script = self.redis.register_script(STORE_BOOK_SCRIPT)
+        self._publish_script = self.redis.register_script(PUBLISH_VERSION_SCRIPT)
+        self._view: Optional["BookRepository"] = None
+
+    def key(self, name: str) -> str:
+        """Redis key of catalogue key `name` in this repository's version"""
+        return self.prefix + name
+
+    def _index_key(self, sort: str, category: Optional[str] = None) -> str:
+        return self.key(sort_index_key(sort, category))
+
+    async def pinned(self) -> "BookRepository":
+        """This repository if pinned, otherwise one pinned to the live version"""
+        if self.version is not None:
+            return self
+        version = int(await self.redis.get(CATALOGUE_CURRENT_KEY) or 0)
+        if self._view is None or self._view.version != version:
+            self._view = BookRepository(self.storage_format, version)
+        return self._view
+
+    async def create_version(self) -> "BookRepository":
+        """Repository pinned to a new, empty catalogue version that readers do not see yet"""
+        version = await self.redis.incr(CATALOGUE_NEXT_KEY)
+        repository = BookRepository(self.storage_format, version)
+        await self.redis.set(repository.key(STORAGE_FORMAT_KEY), self.storage_format)
+        return repository
+
+    async def publish_version(self) -> bool:
+        """
+        Atomically make this pinned version the live catalogue. Returns False,
+        leaving the live version alone, when a newer version is already live.
+        """
+        replaced = await self._publish_script(
+            keys=[CATALOGUE_CURRENT_KEY, CATALOGUE_VERSIONS_KEY, CATALOGUE_VERSION_KEY],
+            args=[self.version, uuid.uuid4().hex, CATALOGUE_CHANNEL]
+        )
+        return replaced >= 0
+
+    async def _delete_version(self, version: int, batch_size: int = 1000) -> int:
+        """UNLINK every key of catalogue version `version`, SCAN batch by SCAN batch"""
+        if version:
+            patterns, keys = [f"{version_prefix(version)}*"], []
+        else:
+            patterns, keys = _LEGACY_PATTERNS, list(_LEGACY_KEYS)
+        removed = 0
+        for pattern in patterns:
+            async for batch in self._scan_batches(batch_size, pattern=pattern):
+                removed += await self.redis.unlink(*batch)
+        if keys:
+            removed += await self.redis.unlink(*keys)
+        await self.redis.srem(CATALOGUE_VERSIONS_KEY, version)
+        return removed
+
+    async def drop_version(self) -> int:
+        """Delete the keys of this pinned version, which must not be live"""
+        if self.version is None or self.version == int(await self.redis.get(CATALOGUE_CURRENT_KEY) or 0):
+            raise ValueError("Only a pinned version that is not live can be dropped")
+        return await self._delete_version(self.version)
+
+    async def collect_versions(self) -> int:
+        """Delete the keys of every version replaced by the live one, returns the number of keys removed"""
+        current = int(await self.redis.get(CATALOGUE_CURRENT_KEY) or 0)
+        removed = 0
+        for version in sorted(int(version) for version in await self.redis.smembers(CATALOGUE_VERSIONS_KEY)):
+            if version < current:
+                removed += await self._delete_version(version)
+        return removed
+
+    def _store_call(self, book: Book, overwrite: bool = False) -> Tuple[List[str], list]:
+        """KEYS and ARGV storing one book through STORE_BOOK_SCRIPT"""
         book.id = book.generate_id()
         book_key = f'book:{book.id}'
-        
-        # Check if book already exists
-        if await self.redis.exists(book_key):
-            return book.id
-        
-        # Store book data and add to category index in a single transaction
-        async with self.redis.pipeline() as pipe:
-            await pipe.set(book_key, book.model_dump_json()).execute()
-            await pipe.sadd(f"category:{book.category.lower()}", book_key).execute()
-            await pipe.sadd("categories",book.category.lower()).execute()
+        category = book.category.lower()
+        record = record_args(self.storage_format, book)
+        keys = [self.key(key) for key in (
+            book_key, f"category:{category}", "categories", "books:all",
+            CATEGORY_IDS_KEY, CATEGORY_NAMES_KEY, CATEGORY_NEXT_ID_KEY
+        )]
+        args = [self.storage_format, category, book.category, int(overwrite), book_key, len(record), *record]
+        for index, mapping in sort_index_entries(book_key, book) + title_index_entries(book_key, book):
+            for member, score in mapping.items():
+                keys.append(self.key(index))
+                args.extend((score, member))
+        return keys, args
+
+    async def _read_books(
+        self,
+        book_keys: List[str],
+        raw_json: bool = False,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Union[bytes, dict, None]]:
+        """
+        Read and decode book records in one round trip, whatever format they
+        are stored in. Records in another layout than the configured one (in
+        the middle of a migration) cost a second round trip. With `raw_json`
+        records stored as JSON are returned as their bytes, undecoded. With
+        `fields` only those fields are returned: hash records are read with an
+        HMGET of just those fields, and the category names only when needed.
+        """
+        raw = RedisManager().raw_client
+        hashes = self.storage_format == HASH
+        record_keys = [self.key(key) for key in book_keys]
+        if fields is not None and not hash_fields(fields):
+            # The ID is part of the key, no record to read
+            return [{"id": key.split(":", 1)[1]} for key in book_keys]
+        with_names = fields is None or "category" in fields
+        async with raw.pipeline(transaction=False) as pipe:
+            if hashes:
+                for key in record_keys:
+                    if fields is None:
+                        pipe.hgetall(key)
+                    else:
+                        pipe.hmget(key, hash_fields(fields))
+            else:
+                pipe.mget(record_keys)
+            if with_names:
+                pipe.hgetall(self.key(CATEGORY_NAMES_KEY))
+            # HGETALL on a string record fails with WRONGTYPE, it is read again below
+            values = await pipe.execute(raise_on_error=False)
+        names = values.pop() if with_names else {}
+        values = values if hashes else values[0]
+
+        missing = [
+            position for position, value in enumerate(values)
+            if not value or isinstance(value, Exception) or (isinstance(value, list) and all(v is None for v in value))
+        ]
+        if missing:
+            async with raw.pipeline(transaction=False) as pipe:
+                if hashes:
+                    pipe.mget([record_keys[position] for position in missing])
+                else:
+                    for position in missing:
+                        pipe.hgetall(record_keys[position])
+                found = await pipe.execute(raise_on_error=False)
+            for position, value in zip(missing, found[0] if hashes else found):
+                values[position] = None if isinstance(value, Exception) else value
 
+        names = category_names(names)
+        decode = book_document if raw_json else decode_book
+        books = []
+        for key, value in zip(book_keys, values):
+            try:
+                if fields is not None:
+                    books.append(project_book(key, value, names, fields))
+                else:
+                    books.append(decode(key, value, names))
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Error processing book {key}: {str(e)}")
+                books.append(None)
+        return books
+
+    @_on_version
+    async def store_book(self, book: Book) -> str:
+        """Store book in Redis, with all its index entries, in a single round trip"""
+        keys, args = self._store_call(book)
+        await self._store_script(keys=keys, args=args)
         return book.id
 
-    async def get_books(self, category: Optional[str] = None) -> List[Book]:
-        """Retrieve BOOK TITLES from Redis, optionally filtered by category"""
-        try:
-            # 1. Get book keys
-            book_keys = (
-                [book_id for book_id in await self.redis.smembers(f"category:{category.lower()}")]
-                if category
-                else [key for key in await self.redis.keys('book:*')]
-            )
-            
-            if not book_keys:
-                return []
+    @_on_version
+    async def store_books(self, books: Iterable[Book], batch_size: int = 500, overwrite: bool = False) -> List[str]:
+        """
+        Store many books, one pipeline of STORE_BOOK_SCRIPT calls per batch.
 
-            # 2. Get data in pipeline
-            async with self.redis.pipeline() as pipe:
-                for key in book_keys:
-                    await pipe.get(key)
-                book_data_list = await pipe.execute()
+        Each book is deduplicated and indexed atomically by the script, so a
+        batch costs one round trip however many books and indexes it touches.
+        With `overwrite`, existing records are rewritten in the configured
+        format. Returns the book IDs in input order, including books already stored.
+        """
+        ids = []
+        books = iter(books)
+        while batch := list(itertools.islice(books, batch_size)):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for book in batch:
+                    keys, args = self._store_call(book, overwrite)
+                    await self._store_script(keys=keys, args=args, client=pipe)
+                await pipe.execute()
+            ids.extend(book.id for book in batch)
+        return ids
 
-            # 3. Extract books
-            books = []
-            for key, book_data in zip(book_keys, book_data_list):
-                if book_data:
+    @_on_version
+    async def rebuild_indexes(self, batch_size: int = 1000) -> int:
+        """
+        Rebuild books:all, the sort indexes and the title index from the stored books, for data
+        written before the indexes existed. Uses SCAN, so Redis is never blocked.
+        """
+        indexed = 0
+        async for keys in self._scan_batches(batch_size, pattern=self.key('book:*')):
+            keys = [key[len(self.prefix):] for key in keys]
+            records = await self._read_books(keys)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, record in zip(keys, records):
+                    if not record:
+                        continue
                     try:
-                        book_dict = json.loads(book_data)
-                        books.append(book_dict)
-                    except (json.JSONDecodeError, KeyError) as e:
-                        logging.warning(f"Error processing book {key}: {str(e)}")
+                        book = Book(**record)
+                    except ValueError as e:
+                        logging.warning(f"Skipping invalid book {key}: {str(e)}")
                         continue
-            
-            return books
+                    pipe.sadd(self.key("books:all"), key)
+                    for index, mapping in sort_index_entries(key, book) + title_index_entries(key, book):
+                        pipe.zadd(self.key(index), mapping)
+                    indexed += 1
+                await pipe.execute()
+        return indexed
 
-        except Exception as e:
-            logging.error(f"Error in get_books: {str(e)}")
-            return []
+    @_on_version
+    async def ensure_indexes(self) -> None:
+        """Build the sort and title indexes once if books exist without them"""
+        if await self.redis.exists(self._index_key("price"), self.key(TITLE_TOKENS_KEY)) == 2:
+            return
+        indexed = await self.rebuild_indexes()
+        if indexed:
+            logging.info(f"Indexed {indexed} existing books")
+
+    @_on_version
+    async def migrate_storage(self, batch_size: int = 1000) -> int:
+        """
+        Rewrite every stored book in the configured storage format, batch by
+        batch. Readers handle both layouts meanwhile. Returns the number of
+        books rewritten.
+        """
+        migrated = 0
+        async for keys in self._scan_batches(batch_size, set_key=self.key("books:all")):
+            books = []
+            for key, record in zip(keys, await self._read_books(keys)):
+                if not record:
+                    continue
+                try:
+                    books.append(Book(**record))
+                except ValueError as e:
+                    logging.warning(f"Skipping invalid book {key}: {str(e)}")
+            await self.store_books(books, batch_size=batch_size, overwrite=True)
+            migrated += len(books)
+        await self.redis.set(self.key(STORAGE_FORMAT_KEY), self.storage_format)
+        return migrated
+
+    @_on_version
+    async def ensure_storage_format(self) -> None:
+        """Migrate the catalogue once if it is stored in another format than configured"""
+        current = await self.redis.get(self.key(STORAGE_FORMAT_KEY)) or JSON
+        if current == self.storage_format:
+            return
+        # One migration at a time across workers
+        if not await self.redis.set("books:migration:lock", self.storage_format, nx=True, ex=3600):
+            return
+        try:
+            logging.info(f"Migrating books from {current} to {self.storage_format} storage")
+            migrated = await self.migrate_storage()
+            logging.info(f"Migrated {migrated} books to {self.storage_format} storage")
+        finally:
+            await self.redis.delete("books:migration:lock")
+
+    async def _scan_batches(self, batch_size: int, pattern: Optional[str] = None, set_key: Optional[str] = None):
+        """Batches of keys matching `pattern`, or members of `set_key`, without blocking Redis"""
+        keys = (
+            self.redis.sscan_iter(set_key, count=batch_size)
+            if set_key
+            else self.redis.scan_iter(match=pattern, count=batch_size)
+        )
+        batch = []
+        async for key in keys:
+            batch.append(key)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @_on_version
+    async def prune_books(self, keep_ids: Iterable[str]) -> int:
+        """Remove every indexed book whose ID is not in keep_ids, returns the number removed"""
+        keep_keys = {f'book:{book_id}' for book_id in keep_ids}
+        stale_keys = [key for key in await self.redis.smembers(self.key("books:all")) if key not in keep_keys]
+        if not stale_keys:
+            return 0
+
+        # Title tokens of the stale books, to take them out of the title index
+        tokens = set()
+        for record in await self._read_books(stale_keys):
+            if record:
+                tokens.update(title_tokens(record["title"]))
+        tokens = list(tokens)
+
+        categories = list(await self.redis.smembers(self.key("categories")))
+        async with self.redis.pipeline() as pipe:
+            for token in tokens:
+                pipe.zrem(self.key(title_token_key(token)), *stale_keys)
+            for category in categories:
+                pipe.srem(self.key(f"category:{category}"), *stale_keys)
+                for sort in SORT_INDEXES:
+                    pipe.zrem(self._index_key(sort, category), *stale_keys)
+            pipe.srem(self.key("books:all"), *stale_keys)
+            for sort in SORT_INDEXES:
+                pipe.zrem(self._index_key(sort), *stale_keys)
+            pipe.delete(*[self.key(key) for key in stale_keys])
+            for category in categories:
+                pipe.scard(self.key(f"category:{category}"))
+            results = await pipe.execute()
+
+        # Drop categories and title tokens that no longer hold any book
+        sizes = results[-len(categories):] if categories else []
+        empty = [category for category, size in zip(categories, sizes) if not size]
+        if empty:
+            await self.redis.srem(self.key("categories"), *empty)
+        if tokens:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for token in tokens:
+                    pipe.zcard(self.key(title_token_key(token)))
+                unused = [token for token, size in zip(tokens, await pipe.execute()) if not size]
+            if unused:
+                await self.redis.zrem(self.key(TITLE_TOKENS_KEY), *unused)
+
+        return len(stale_keys)
+
+    async def _title_terms(self, tokens: List[str]) -> List[List[Tuple[str, float]]]:
+        """
+        Resolve query tokens to title index keys weighted by inverse document
+        frequency. Every token but the last must match exactly; the last one
+        is a prefix (search as you type). A token matching nothing yields [].
+        """
+        *exact, prefix = tokens
+        prefix_bytes = prefix.encode()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(self._index_key("price"))
+            pipe.zrange(
+                self.key(TITLE_TOKENS_KEY), b"[" + prefix_bytes, b"[" + prefix_bytes + b"\xff",
+                bylex=True, offset=0, num=TITLE_PREFIX_EXPANSIONS
+            )
+            results = await pipe.execute()
+        catalogue_size, expansions = results
+
+        term_tokens = [[token] for token in exact] + [expansions]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for candidates in term_tokens:
+                for token in candidates:
+                    pipe.zcard(self.key(title_token_key(token)))
+            sizes = iter(await pipe.execute())
+
+        terms = []
+        for candidates in term_tokens:
+            weighted = []
+            for token in candidates:
+                size = next(sizes)
+                if size:
+                    idf = math.log(1 + catalogue_size / size)
+                    if candidates is expansions and token != prefix:
+                        idf *= TITLE_PREFIX_WEIGHT
+                    weighted.append((self.key(title_token_key(token)), idf))
+            terms.append(weighted)
+        return terms
+
+    async def _prepare_search(
+        self, query: Optional[str], sort: Optional[str], order: Optional[str]
+    ) -> Optional[Tuple[List[List[Tuple[str, float]]], str, str]]:
+        """
+        Validate the sort and order of a search and resolve its title query.
+        Returns the title terms, sort and order, or None when the query
+        cannot match any book.
+        """
+        tokens = title_tokens(query) if query else []
+        if query and not tokens:
+            return None
+        sort = sort or ("relevance" if tokens else "price")
+        if sort == "relevance" and not tokens:
+            raise ValueError("Sorting by relevance requires a title query")
+        if sort not in SORT_INDEXES and sort != "relevance":
+            raise ValueError(f"Unknown sort {sort!r}, expected relevance, {' or '.join(SORT_INDEXES)}")
+        order = order or ("desc" if sort == "relevance" else "asc")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown order {order!r}, expected asc or desc")
+
+        terms = await self._title_terms(tokens) if tokens else []
+        if any(not term for term in terms):
+            return None
+        return terms, sort, order
+
+    def _queue_matches(
+        self,
+        pipe,
+        temp_keys: List[str],
+        terms: List[List[Tuple[str, float]]],
+        categories: List[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        sort: str
+    ) -> str:
+        """
+        Queue on `pipe` the commands building a ZSET of the books passing the
+        filters, scored by `sort` (or relevance), and return its key. That is
+        an index itself when nothing needs filtering; temporary keys are
+        appended to `temp_keys` for the caller to delete.
+        """
+        by_price = min_price is not None or max_price is not None
+        low = "-inf" if min_price is None else min_price
+        high = "+inf" if max_price is None else max_price
+        sources = categories or [None]
+
+        def temp_key() -> str:
+            temp_keys.append(f"{TEMP_KEY_PREFIX}{uuid.uuid4().hex}")
+            return temp_keys[-1]
+
+        if not terms:
+            if by_price:
+                # Only books in range are copied, so the work is bounded by the matches
+                ranges = []
+                for category in sources:
+                    ranges.append(temp_key())
+                    pipe.zrangestore(ranges[-1], self._index_key("price", category), low, high, byscore=True)
+                index = ranges[0]
+                if len(ranges) > 1:
+                    index = temp_key()
+                    pipe.zunionstore(index, ranges)
+                if sort != "price":
+                    matched, index = index, temp_key()
+                    # Weight 0 keeps the scores of the sort index for the intersection
+                    pipe.zinterstore(index, {matched: 0, self._index_key(sort): 1})
+                return index
+            if len(sources) > 1:
+                index = temp_key()
+                pipe.zunionstore(index, [self._index_key(sort, category) for category in sources])
+                return index
+            return self._index_key(sort, sources[0])
+
+        # Exact terms first: their intersection bounds every later step
+        *exact, expansions = terms
+        matched, matched_weight = None, 1
+        weights = {}
+        for (key, idf), in exact:
+            weights[key] = weights.get(key, 0) + idf
+        if len(weights) == 1:
+            # A single token set is used in place, scaled where it is read
+            (matched, matched_weight), = weights.items()
+        elif weights:
+            matched = temp_key()
+            pipe.zinterstore(matched, weights)
+
+        # The trailing prefix counts once, with its best expansion
+        if matched is None and len(expansions) == 1:
+            matched = expansions[0][0]
+        elif matched is None:
+            matched = temp_key()
+            pipe.zunionstore(matched, dict(expansions), aggregate="MAX")
+        else:
+            # Intersecting per expansion costs at most the size of the
+            # smaller set each time, unlike a union of the expansions
+            partial = []
+            for key, idf in expansions:
+                partial.append(temp_key())
+                pipe.zinterstore(partial[-1], {matched: matched_weight, key: idf})
+            matched = partial[0]
+            if len(partial) > 1:
+                matched = temp_key()
+                pipe.zunionstore(matched, partial, aggregate="MAX")
+
+        if categories or by_price:
+            # Filter the matches against each category's price index,
+            # keeping the relevance scores
+            kept = []
+            for category in sources:
+                kept.append(temp_key())
+                if by_price:
+                    priced = temp_key()
+                    pipe.zinterstore(priced, {matched: 0, self._index_key("price", category): 1})
+                    if min_price is not None:
+                        pipe.zremrangebyscore(priced, "-inf", f"({min_price}")
+                    if max_price is not None:
+                        pipe.zremrangebyscore(priced, f"({max_price}", "+inf")
+                    pipe.zinterstore(kept[-1], {priced: 0, matched: 1})
+                else:
+                    pipe.zinterstore(kept[-1], {matched: 1, self._index_key("price", category): 0})
+            matched = kept[0]
+            if len(kept) > 1:
+                matched = temp_key()
+                pipe.zunionstore(matched, kept)
+
+        if sort == "relevance":
+            return matched
+        index = temp_key()
+        pipe.zinterstore(index, {matched: 0, self._index_key(sort): 1})
+        return index
+
+    @_on_version
+    async def get_books(
+        self,
+        categories: Optional[Sequence[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        query: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        sort: Optional[str] = None,
+        order: Optional[str] = None,
+        raw_json: bool = False,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Union[bytes, dict]], int]:
+        """
+        Retrieve one page of books from Redis, optionally filtered by a title
+        query, categories (any of) and an inclusive price range.
+
+        Filtering and ordering run in Redis on the sort indexes: a price range
+        is a ZRANGEBYSCORE on the price index of each category, several
+        categories are a ZUNIONSTORE, and a price range sorted by title is
+        intersected with the title index. A title query intersects the token
+        sets of the inverted index and filters the matches
+        against the category price indexes, scoring each match by the sum of
+        the matched tokens' share of the title weighted by their rarity; its
+        results default to relevance order. Only matching keys and the
+        requested page of records cross the network. Returns the page and the
+        total number of matches; with `raw_json` books stored as JSON are
+        returned as their serialized bytes. `fields` projects each book on
+        those fields (see _read_books), leaving raw_json aside.
+        """
+        fields = check_fields(fields) if fields is not None else None
+        search = await self._prepare_search(query, sort, order)
+        if search is None:
+            return [], 0
+        terms, sort, order = search
+
+        categories = list(dict.fromkeys(category.lower() for category in categories or [] if category))
+        by_price = min_price is not None or max_price is not None
+        low = "-inf" if min_price is None else min_price
+        high = "+inf" if max_price is None else max_price
+        desc = order == "desc"
+        temp_keys = []
+
+        # 1. Page of book keys, computed in a single MULTI so temporary keys never leak
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if not terms and by_price and sort == "price" and len(categories) <= 1:
+                # Straight range read on one price index
+                index = self._index_key("price", categories[0] if categories else None)
+                total_at = len(pipe.command_stack)
+                pipe.zcount(index, low, high)
+                pipe.zrange(
+                    index, high if desc else low, low if desc else high,
+                    desc=desc, byscore=True, offset=offset, num=limit
+                )
+            else:
+                index = self._queue_matches(pipe, temp_keys, terms, categories, min_price, max_price, sort)
+                total_at = len(pipe.command_stack)
+                pipe.zcard(index)
+                pipe.zrange(index, offset, offset + limit - 1, desc=desc)
+
+            if temp_keys:
+                pipe.delete(*temp_keys)
+            results = await pipe.execute()
+        total, book_keys = results[total_at], results[total_at + 1]
+
+        if not book_keys:
+            return [], total
+
+        # 2. Book records in a single round trip
+        return [book for book in await self._read_books(book_keys, raw_json, fields) if book], total
+
+    @_on_version
+    async def stream_books(
+        self,
+        categories: Optional[Sequence[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        query: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        order: Optional[str] = None,
+        batch_size: int = 1000,
+        raw_json: bool = False,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[int, AsyncIterator[List[Union[bytes, dict]]]]:
+        """
+        Every book matching a search, in the order get_books pages through
+        them, as batches of records.
+
+        The matches are computed once in Redis (filtered searches into a
+        temporary ZSET that expires after STREAM_RESULT_TTL seconds unless
+        the stream is closed first), then read `batch_size` keys at a time by
+        rank, each batch costing one ZRANGE and one record read. Memory stays
+        bounded by one batch whatever the number of matches. The stream keeps
+        reading the catalogue version it started on. Returns the number of
+        books the stream will yield and the batches, `raw_json` and `fields`
+        as in get_books.
+        """
+        fields = check_fields(fields) if fields is not None else None
+        search = await self._prepare_search(query, sort, order)
+        if search is None:
+            return 0, _no_batches()
+        terms, sort, order = search
+
+        categories = list(dict.fromkeys(category.lower() for category in categories or [] if category))
+        temp_keys = []
+        async with self.redis.pipeline(transaction=True) as pipe:
+            index = self._queue_matches(pipe, temp_keys, terms, categories, min_price, max_price, sort)
+            if index in temp_keys:
+                temp_keys.remove(index)
+                pipe.expire(index, STREAM_RESULT_TTL)
+            if temp_keys:
+                pipe.delete(*temp_keys)
+            total_at = len(pipe.command_stack)
+            pipe.zcard(index)
+            total = (await pipe.execute())[total_at]
+        end = total if limit is None else min(total, offset + limit)
+        result_key = index if index.startswith(TEMP_KEY_PREFIX) else None
+
+        async def batches():
+            try:
+                for start in range(offset, end, batch_size):
+                    book_keys = await self.redis.zrange(index, start, min(end, start + batch_size) - 1, desc=order == "desc")
+                    if not book_keys:
+                        break
+                    yield [book for book in await self._read_books(book_keys, raw_json, fields) if book]
+            finally:
+                if result_key:
+                    await self.redis.delete(result_key)
+
+        return max(0, end - offset), batches()
+
+    async def publish_change(self) -> str:
+        """Give the catalogue a new version token and announce it to the API workers"""
+        version = uuid.uuid4().hex
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(CATALOGUE_VERSION_KEY, version)
+            pipe.publish(CATALOGUE_CHANNEL, version)
+            await pipe.execute()
+        return version
 
+    @_on_version
+    async def count_books(self) -> int:
+        """Number of books in the catalogue"""
+        return await self.redis.scard(self.key("books:all"))
 
+    @_on_version
     async def get_categories(self) -> list[str]:
         """Retrieve all categories from Redis set.
         """
         try:
-            categories = await self.redis.smembers("categories")
+            categories = await self.redis.smembers(self.key("categories"))
             return list(categories) if categories else []
             
         except Exception as e:
@@ -125,4 +965,5 @@ class BookRepository:
 
     async def clear_all(self):
         """Clear all book data from Redis"""
-        await self.redis.flushdb()
\ No newline at end of file
+        await self.redis.flushdb()
+        await self.redis.set(STORAGE_FORMAT_KEY, self.storage_format)
\ No newline at end of file
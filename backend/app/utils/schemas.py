@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class BookBase(BaseModel):
     title: str
@@ -19,18 +20,47 @@ class Headline(BaseModel):
     title: str
     score: int
     url: str
+    rank: Optional[int] = None
+    age: Optional[str] = None
+    comments: Optional[int] = None
 
 class BookSearchResponse(BaseModel):
     status: str = "success"
     count: int
+    total: int = 0  # Matches across all pages
+    limit: int = 0
+    offset: int = 0
     books: list[Book]
 
 class HeadlinesResponse(BaseModel):
     status: str = "success"
     count: int
     headlines: list[Headline]
+    data_age: float = 0.0  # Seconds since the headlines were scraped
 
 class CategoriesResponse(BaseModel):
     status: str = "success"
     count: int
     categories : list[str]
+
+class Job(BaseModel):
+    id: str
+    status: str  # queued, running, done, failed or cancelled
+    trigger: str = "api"  # api, schedule or startup
+    incremental: Optional[bool] = None  # Requested mode until the job starts, then the mode it runs in
+    worker: Optional[str] = None
+    created: Optional[float] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    pages: int = 0  # Pages crawled
+    books: int = 0  # Books stored
+    errors: int = 0
+    rate: float = 0.0  # Books stored per second
+    resumes: int = 0  # Times the job was interrupted and resumed from its checkpoint
+    published: Optional[bool] = None  # Whether a full scrape made its catalogue live
+    cancel_requested: bool = False
+    message: Optional[str] = None
+
+class JobResponse(BaseModel):
+    status: str = "success"
+    job: Job
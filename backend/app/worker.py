@@ -0,0 +1,50 @@
+"""
+Scrape job worker, run next to the API: python worker.py
+
+Runs the scrape jobs queued by POST /init, the periodic scrapes
+(SCRAPE_INTERVAL) and a first scrape when no catalogue is stored. Any number
+of workers may run; the scrape lock lets only one of them scrape at a time.
+With DISTRIBUTED_CRAWL=true the other workers help crawl the running scrape
+instead of waiting for it.
+SIGTERM stops the worker: ScrapeWorker.stop() interrupts the running scrape
+with scraper.cancel(resumable=True) and its job is requeued, so a worker
+resumes it from its checkpoint; the live catalogue is kept meanwhile.
+With WORKER_METRICS_PORT set, Prometheus metrics are served on that port.
+"""
+import signal
+import asyncio
+import logging
+
+from core.config import settings
+from services.jobs import ScrapeWorker
+from services.parse_pool import shutdown_parse_pool
+from utils.metrics import serve_metrics
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    worker = ScrapeWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    metrics_server = None
+    if settings.metrics_enabled and settings.worker_metrics_port > 0:
+        metrics_server = await serve_metrics(settings.worker_metrics_port)
+        logger.info(f"Serving metrics on port {settings.worker_metrics_port}")
+    try:
+        await worker.run()
+    finally:
+        if metrics_server:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
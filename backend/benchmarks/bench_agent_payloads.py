@@ -0,0 +1,141 @@
+"""
+Bytes on the wire and latency of the agent's typical queries, as full
+responses and trimmed with ``fields=``, ``limit`` and ``shape=columns``,
+each uncompressed, gzipped and brotli compressed.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_agent_payloads --books 10000
+
+The synthetic catalogue is stored in each ``--storage`` layout and the
+queries are sent through the ASGI app in process with the catalogue cache
+off, so every search reads Redis and a projection reaches BookRepository.
+Headlines come from the stub Hacker News through the headline cache. Bytes
+are the response body as sent (compressed when negotiated); latency is the
+server side p50 and p95 over ``--rounds`` calls, compression included.
+``est. ms`` adds the time those bytes take on a ``--link-mbps`` link, the
+end-to-end cost for an agent calling the API over the network. Every
+variant must carry the same values as the full response.
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import ServerThread, percentile, seed_books, use_local_redis
+from benchmarks.stubs import HackerNewsSite
+
+import main
+from core.config import settings
+from services import catalogue_cache, headline_cache
+from utils import compression
+
+# Typical agent calls: a filtered search, a cheapest-first browse and the top stories
+QUERIES = {
+    "search": ("/books/search", {"q": "kaka", "category": "science,history", "max_price": 40, "limit": 50}),
+    "browse": ("/books/search", {"category": "fiction", "sort": "price", "limit": 100}),
+    "headlines": ("/headlines", {}),
+}
+TRIMMED = {
+    "search": {"fields": "title,price"},
+    "browse": {"fields": "title,price"},
+    "headlines": {"fields": "title,url,score", "limit": 10},
+}
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def variants(query: str) -> list:
+    trimmed = TRIMMED[query]
+    return [("full", {}), ("fields", trimmed), ("columns", {**trimmed, "shape": "columns"})]
+
+
+def rows_of(body: dict, items: str) -> list:
+    """Items of a response as rows, whichever shape it came in"""
+    values = body[items]
+    if isinstance(values, dict):
+        return [dict(zip(values, row)) for row in zip(*values.values())]
+    return values
+
+
+async def measure(client: httpx.AsyncClient, path: str, params: dict, encoding: str, rounds: int) -> dict:
+    headers = {"Accept-Encoding": encoding}
+    timings, size, body = [], 0, None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = await client.get(path, params=params, headers=headers)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+        size, body = response.num_bytes_downloaded, response.json()
+    return {"bytes": size, "p50_ms": percentile(timings, 50) * 1000, "p95_ms": percentile(timings, 95) * 1000, "body": body}
+
+
+async def run_queries(client: httpx.AsyncClient, storage: str, rounds: int, headlines: bool) -> list:
+    rows = []
+    for query, (path, params) in QUERIES.items():
+        if path == "/headlines" and not headlines:
+            continue
+        items = "books" if path == "/books/search" else "headlines"
+        reference = None
+        for variant, extra in variants(query):
+            for encoding in ENCODINGS:
+                if encoding == "br" and compression.brotli is None:
+                    continue
+                result = await measure(client, path, {**params, **extra}, encoding, rounds)
+                got = rows_of(result.pop("body"), items)
+                if reference is None:
+                    reference = got
+                fields = extra.get("fields", "").split(",") if extra else None
+                expected = reference[:extra.get("limit", len(reference))]
+                if fields:
+                    expected = [{name: row.get(name) for name in fields} for row in expected]
+                assert got == expected, f"{query} {variant} {encoding} returned different values"
+                rows.append({"storage": storage, "query": query, "variant": variant, "encoding": encoding, "items": len(got), **result})
+    return rows
+
+
+async def scenario(books: int, storages: list, rounds: int) -> list:
+    settings.catalogue_cache_books = 0
+    settings.headlines_cache_ttl = 300
+    headline_cache._cache = None
+    await catalogue_cache.shutdown_catalogue_cache()
+    transport = httpx.ASGITransport(app=main.app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+        for index, storage in enumerate(storages):
+            settings.book_storage = storage
+            await seed_books(books)
+            # Warm the headline cache, so the timings are the response rather than the scrape
+            await client.get("/headlines")
+            # Headlines do not depend on the book storage, they are measured once
+            rows.extend(await run_queries(client, storage, rounds, headlines=index == 0))
+    return rows
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--storage", default="json,hash", help="Comma separated BOOK_STORAGE layouts")
+    parser.add_argument("--rounds", type=int, default=200, help="Calls per query and variant")
+    parser.add_argument("--link-mbps", type=float, default=10.0, help="Link speed of the end-to-end estimate")
+    args = parser.parse_args()
+
+    use_local_redis()
+    settings.hnews_backend = "http"
+    settings.hnews_selenium_fallback = False
+    with ServerThread(HackerNewsSite()) as server:
+        settings.hnews_site_url = server.url + "news"
+        rows = asyncio.run(scenario(args.books, args.storage.split(","), args.rounds))
+
+    print(f"{args.books} books, compression from {settings.response_compression_min_size} bytes, {args.link_mbps:g} Mbit/s link")
+    print(f"{'storage':<8} {'query':<10} {'variant':<8} {'encoding':<9} {'items':>5} {'bytes':>7} {'vs full':>8} {'p50 ms':>7} {'p95 ms':>7} {'est. ms':>8}")
+    full = {(r["storage"], r["query"]): r["bytes"] for r in rows if r["variant"] == "full" and r["encoding"] == "identity"}
+    for r in rows:
+        transfer_ms = r["bytes"] * 8 / (args.link_mbps * 1e6) * 1000
+        print(
+            f"{r['storage']:<8} {r['query']:<10} {r['variant']:<8} {r['encoding']:<9} {r['items']:>5} {r['bytes']:>7} "
+            f"{r['bytes'] / full[(r['storage'], r['query'])]:>7.0%} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} "
+            f"{r['p50_ms'] + transfer_ms:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,88 @@
+"""
+Price-range and multi-category searches answered in Redis versus the previous
+approach of downloading the category (or the whole catalogue) and filtering
+on the client.
+
+    python -m benchmarks.bench_book_facets --sizes 10000,100000,1000000 --queries 20
+
+Uses BENCH_REDIS_URL when set (recommended for large sizes) or fakeredis.
+The fetch-all path is skipped above ``--legacy-max`` books.
+"""
+import json
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import percentile, seed_books, use_local_redis
+
+from utils.models import BookRepository
+
+# (name, filters) pairs, e.g. "science books under 15"
+CASES = [
+    ("science <15", {"categories": ["science"], "max_price": 15}),
+    ("2 cats 20-30 title", {"categories": ["science", "history"], "min_price": 20, "max_price": 30, "sort": "title"}),
+    ("all <11", {"max_price": 11}),
+]
+
+
+async def fetch_all_and_filter(repository: BookRepository, limit: int, categories=None, min_price=None,
+                               max_price=None, sort="price") -> list:
+    """Download every candidate record, then filter, sort and page on the client"""
+    if categories:
+        keys = set()
+        for category in categories:
+            keys |= await repository.redis.smembers(f"category:{category}")
+        keys = list(keys)
+    else:
+        keys = list(await repository.redis.keys('book:*'))
+    books = [json.loads(raw) for raw in await repository.redis.mget(keys) if raw] if keys else []
+    books = [
+        book for book in books
+        if (min_price is None or book["price"] >= min_price) and (max_price is None or book["price"] <= max_price)
+    ]
+    books.sort(key=lambda book: book[sort].lower() if sort == "title" else book[sort])
+    return books[:limit]
+
+
+async def measure(call, queries: int) -> dict:
+    timings = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"p50": percentile(timings, 50), "p99": percentile(timings, 99)}
+
+
+async def scenario(sizes: list, queries: int, limit: int, legacy_max: int) -> list:
+    repository = BookRepository()
+    rows = []
+    for size in sizes:
+        await seed_books(size)
+        for name, filters in CASES:
+            _, total = await repository.get_books(limit=limit, **filters)
+            if size <= legacy_max:
+                legacy = await measure(lambda: fetch_all_and_filter(repository, limit, **filters), queries)
+                rows.append({"size": size, "case": name, "path": "fetch+filter", "matches": total, **legacy})
+            indexed = await measure(lambda: repository.get_books(limit=limit, **filters), queries)
+            rows.append({"size": size, "case": name, "path": "redis", "matches": total, **indexed})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--legacy-max", type=int, default=100000)
+    args = parser.parse_args()
+
+    use_local_redis()
+    rows = asyncio.run(scenario([int(size) for size in args.sizes.split(",")], args.queries, args.limit, args.legacy_max))
+
+    print(f"{'books':>8} {'case':<19} {'path':<13} {'matches':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in rows:
+        print(f"{r['size']:>8} {r['case']:<19} {r['path']:<13} {r['matches']:>8} {r['p50']:>9.2f} {r['p99']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Latency and memory of ``/books/search`` queries as the catalogue grows: the
+previous KEYS + GET-everything listing versus the indexed, paginated
+``BookRepository.get_books``.
+
+    python -m benchmarks.bench_book_queries --sizes 100,10000,100000 --queries 50
+
+Uses BENCH_REDIS_URL when set (recommended for large sizes) or fakeredis.
+The legacy path is skipped above ``--legacy-max`` books.
+"""
+import time
+import asyncio
+import argparse
+import tracemalloc
+
+from benchmarks.common import percentile, seed_books, use_local_redis
+
+from utils.models import BookRepository
+
+
+async def legacy_get_books(repository: BookRepository, category=None) -> list:
+    """The KEYS-based get_books before the sort indexes"""
+    book_keys = (
+        list(await repository.redis.smembers(f"category:{category.lower()}"))
+        if category
+        else list(await repository.redis.keys('book:*'))
+    )
+    if not book_keys:
+        return []
+    async with repository.redis.pipeline() as pipe:
+        for key in book_keys:
+            pipe.get(key)
+        return [value for value in await pipe.execute() if value]
+
+
+async def measure(call, queries: int) -> dict:
+    timings = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    result = await call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+        "peak_kb": peak / 1024,
+        "rows": len(result[0] if isinstance(result, tuple) else result),
+    }
+
+
+async def scenario(sizes: list, queries: int, limit: int, legacy_max: int) -> list:
+    repository = BookRepository()
+    rows = []
+    for size in sizes:
+        await seed_books(size)
+        cases = {
+            "all": (lambda: legacy_get_books(repository),
+                    lambda: repository.get_books(limit=limit)),
+            "category": (lambda: legacy_get_books(repository, "science"),
+                         lambda: repository.get_books(categories=["science"], limit=limit, sort="title")),
+            "deep page": (None,
+                          lambda: repository.get_books(limit=limit, offset=size // 2, sort="price", order="desc")),
+        }
+        for case, (legacy, indexed) in cases.items():
+            if legacy is not None and size <= legacy_max:
+                rows.append({"size": size, "case": case, "path": "legacy", **await measure(legacy, queries)})
+            rows.append({"size": size, "case": case, "path": "indexed", **await measure(indexed, queries)})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--legacy-max", type=int, default=100000)
+    args = parser.parse_args()
+
+    use_local_redis()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rows = asyncio.run(scenario(sizes, args.queries, args.limit, args.legacy_max))
+
+    print(f"{'books':>8} {'case':<10} {'path':<8} {'p50 ms':>9} {'p99 ms':>9} {'peak KB':>10} {'rows':>7}")
+    for r in rows:
+        print(
+            f"{r['size']:>8} {r['case']:<10} {r['path']:<8} {r['p50']:>9.2f} {r['p99']:>9.2f} "
+            f"{r['peak_kb']:>10.0f} {r['rows']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Redis memory per book and encode/decode throughput of the book storage
+formats (json, hash, msgpack).
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_book_storage --books 100000 --codec-books 1000000
+
+For each format the catalogue is stored through BookRepository, then
+``MEMORY USAGE`` is sampled over ``--sample`` book keys and ``used_memory`` is
+compared with an empty database. Encode/decode throughput runs in process
+over ``--codec-books`` records, cycling through records read back from Redis
+so each layout decodes its real bytes. MEMORY USAGE needs a real Redis.
+"""
+import time
+import asyncio
+import argparse
+import itertools
+
+from benchmarks.common import synthetic_book, use_local_redis
+
+from utils.book_codecs import STORAGE_FORMATS, CATEGORY_NAMES_KEY, category_names, decode_book, record_args
+from utils.models import Book, BookRepository, RedisManager
+
+
+async def measure(storage_format: str, books: list, sample: int, codec_books: int) -> dict:
+    repository = BookRepository(storage_format)
+    redis, raw = repository.redis, RedisManager().raw_client
+    await repository.clear_all()
+    empty = (await redis.info("memory"))["used_memory"]
+    await repository.store_books(books, batch_size=2000)
+    used = (await redis.info("memory"))["used_memory"] - empty
+
+    keys = [f"book:{book.id}" for book in books[:sample]]
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+        per_key = await pipe.execute()
+
+    # Raw records as the read path gets them
+    async with raw.pipeline(transaction=False) as pipe:
+        for key in keys:
+            if storage_format == "hash":
+                pipe.hgetall(key)
+            else:
+                pipe.get(key)
+        pipe.hgetall(CATEGORY_NAMES_KEY)
+        *records, names = await pipe.execute()
+    names = category_names(names)
+
+    started = time.perf_counter()
+    for book in itertools.islice(itertools.cycle(books), codec_books):
+        record_args(storage_format, book)
+    encode = codec_books / (time.perf_counter() - started)
+
+    pairs = list(zip(keys, records))
+    started = time.perf_counter()
+    for key, record in itertools.islice(itertools.cycle(pairs), codec_books):
+        decode_book(key, record, names)
+    decode = codec_books / (time.perf_counter() - started)
+
+    return {
+        "format": storage_format,
+        "memory_usage": sum(per_key) / len(per_key),
+        "used_per_book": used / len(books),
+        "encode": encode,
+        "decode": decode,
+    }
+
+
+async def scenario(count: int, sample: int, codec_books: int, formats: list) -> list:
+    books = [Book(**synthetic_book(index)) for index in range(count)]
+    for book in books:
+        book.id = book.generate_id()
+    return [await measure(storage_format, books, min(sample, count), codec_books) for storage_format in formats]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=100000, help="Books stored per format")
+    parser.add_argument("--sample", type=int, default=2000, help="Keys sampled with MEMORY USAGE")
+    parser.add_argument("--codec-books", type=int, default=1000000, help="Records encoded/decoded per format")
+    parser.add_argument("--formats", default=",".join(STORAGE_FORMATS))
+    args = parser.parse_args()
+
+    use_local_redis()
+    rows = asyncio.run(scenario(args.books, args.sample, args.codec_books, args.formats.split(",")))
+
+    print(f"{'format':<8} {'MEMORY USAGE B':>15} {'used_memory B/book':>19} {'encode/s':>10} {'decode/s':>10}")
+    for r in rows:
+        print(
+            f"{r['format']:<8} {r['memory_usage']:>15.1f} {r['used_per_book']:>19.1f} "
+            f"{r['encode']:>10.0f} {r['decode']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Throughput of /books/search and /books/categories with and without the
+in-process catalogue cache, and invalidation of the cache by a re-scrape.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_catalogue_cache --books 100000
+
+Requests go through the ASGI app in process (no sockets), ``--concurrency``
+at a time, cycling over a hot set of searches; Redis round trips are
+counted as packed writes on the Redis connections. The invalidation check
+scrapes a local stub site, warms the cache, changes prices on the site,
+scrapes again and fails unless the API serves the new prices within two
+version check intervals.
+"""
+import time
+import asyncio
+import argparse
+import itertools
+
+import httpx
+from redis.asyncio.connection import Connection
+
+from benchmarks.common import ServerThread, seed_books, use_local_redis
+from benchmarks.stubs import BooksSite, book_title
+
+import main
+from core.config import settings
+from services import catalogue_cache
+from services.scrape_book import BookScraper
+from utils.models import CATALOGUE_VERSION_KEY
+
+_round_trips = 0
+_send_packed_command = Connection.send_packed_command
+
+
+async def _counting_send(self, command, check_health=True):
+    global _round_trips
+    _round_trips += 1
+    return await _send_packed_command(self, command, check_health)
+
+
+Connection.send_packed_command = _counting_send
+
+# Hot set of (path, params) requests
+REQUESTS = [
+    ("/books/search", {}),
+    ("/books/search", {"category": "science"}),
+    ("/books/search", {"category": "science,history", "max_price": 20}),
+    ("/books/search", {"q": "kaka", "limit": 10}),
+    ("/books/search", {"sort": "title", "offset": 50}),
+    ("/books/categories", {}),
+]
+
+
+async def reset_cache(books: int) -> None:
+    await catalogue_cache.shutdown_catalogue_cache()
+    settings.catalogue_cache_books = books
+    cache = catalogue_cache.get_catalogue_cache()
+    if cache.enabled:
+        # Let the watcher subscribe before measuring
+        await cache.get_categories()
+        while not cache.metrics()["live"]:
+            await asyncio.sleep(0.01)
+
+
+async def throughput(client: httpx.AsyncClient, requests: int, concurrency: int) -> dict:
+    global _round_trips
+    pending = itertools.islice(itertools.cycle(REQUESTS), requests)
+
+    async def worker():
+        for path, params in pending:
+            response = await client.get(path, params=params)
+            response.raise_for_status()
+
+    # Warm up, then measure
+    for path, params in REQUESTS:
+        await client.get(path, params=params)
+    _round_trips = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"rate": requests / elapsed, "round_trips": _round_trips / requests}
+
+
+async def check_invalidation(client: httpx.AsyncClient, site: BooksSite) -> float:
+    """Seconds between the end of a re-scrape and the API serving its prices"""
+    async def price() -> float:
+        books = (await client.get("/books/search", params={"limit": 500})).json()["books"]
+        return next((book["price"] for book in books if book["title"] == book_title(1)), None)
+
+    cache = catalogue_cache.get_catalogue_cache()
+    await BookScraper().scrape(incremental=False)
+    # Wait for the watcher to catch up with the first scrape, then warm the cache
+    while cache.version != await cache.repository.redis.get(CATALOGUE_VERSION_KEY):
+        await asyncio.sleep(0.01)
+    before = await price()
+    hits = cache.hits
+    assert await price() == before and cache.hits > hits, "the warm query was not cached"
+
+    site.price_overrides[1] = before + 1
+    await BookScraper().scrape(incremental=False)
+    finished = time.perf_counter()
+    deadline = finished + 2 * settings.catalogue_cache_check_interval
+    while True:
+        current = await price()
+        if current == before + 1:
+            break
+        if time.perf_counter() > deadline:
+            raise AssertionError(f"Cache still serves price {current} instead of {before + 1} after the re-scrape")
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - finished
+
+
+async def scenario(books: int, requests: int, concurrency: int, cache_books: int, site_url: str, site: BooksSite):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        await seed_books(books)
+        rows = []
+        for label, size in (("off", 0), ("on", cache_books)):
+            await reset_cache(size)
+            rows.append({"cache": label, **await throughput(client, requests, concurrency)})
+
+        settings.book_base_url = site_url
+        delay = await check_invalidation(client, site)
+        await catalogue_cache.shutdown_catalogue_cache()
+    return rows, delay
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--cache-books", type=int, default=20000)
+    parser.add_argument("--site-books", type=int, default=100, help="Books on the stub site for the invalidation check")
+    args = parser.parse_args()
+
+    use_local_redis()
+    site = BooksSite(books=args.site_books)
+    settings.max_books = args.site_books
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 1000
+
+    with ServerThread(site) as server:
+        rows, delay = asyncio.run(scenario(
+            args.books, args.requests, args.concurrency, args.cache_books, server.url, site
+        ))
+
+    print(f"{'cache':<6} {'req/s':>8} {'RT/request':>11}")
+    for r in rows:
+        print(f"{r['cache']:<6} {r['rate']:>8.0f} {r['round_trips']:>11.3f}")
+    print(f"invalidation after re-scrape: ok, new prices served {delay * 1000:.0f} ms after the scrape finished")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,149 @@
+"""
+What readers see while the catalogue is re-scraped: a full scrape into a new
+catalogue version, then a scrape that fails halfway.
+
+    python -m benchmarks.bench_catalogue_swap --books 1000 --readers 8
+
+A first scrape of the local stub site publishes the initial catalogue. Then
+``--readers`` tasks call BookRepository.get_books continuously while a second
+full scrape (every price changed, so every book is new) runs, and again
+while a third scrape runs against a site failing after ``--fail-after``
+requests. Every read must return the whole old or the whole new catalogue.
+After the failed scrape the previous version must still be live, and each
+abandoned or replaced version must be deleted. Uses BENCH_REDIS_URL when set,
+or fakeredis.
+"""
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import ServerThread, use_local_redis
+from benchmarks.stubs import BooksSite, book_price
+
+from core.config import settings
+from services.scrape_book import BookScraper
+from utils.models import CATALOGUE_CURRENT_KEY, BookRepository, version_prefix
+
+
+class FlakySite:
+    """Wrap a stub site, answering 503 once `fail_after` requests were served"""
+
+    def __init__(self, site: BooksSite):
+        self.site = site
+        self.fail_after = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.fail_after is not None and self.site.requests >= self.fail_after:
+            await send({"type": "http.response.start", "status": 503, "headers": [(b"content-length", b"0")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self.site(scope, receive, send)
+
+
+async def scrape_while_reading(readers: int, expected: set) -> dict:
+    repository = BookRepository()
+    scraper = BookScraper()
+    totals, pages = [], []
+    done = asyncio.Event()
+
+    async def reader(index: int):
+        while not done.is_set():
+            books, total = await repository.get_books(limit=20, offset=index * 20)
+            totals.append(total)
+            pages.append(len(books))
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(reader(index)) for index in range(readers)]
+    started = time.perf_counter()
+    books = await scraper.scrape(incremental=False)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*tasks)
+
+    if scraper.gc_task:
+        await scraper.gc_task
+    return {
+        "books": books,
+        "seconds": elapsed,
+        "reads": len(totals),
+        "min_total": min(totals),
+        "max_total": max(totals),
+        "unexpected": sum(1 for total in totals if total not in expected),
+        "empty_pages": pages.count(0),
+        "live": int(await repository.redis.get(CATALOGUE_CURRENT_KEY) or 0),
+    }
+
+
+async def leftover_keys(version: int) -> int:
+    redis = BookRepository().redis
+    return len([key async for key in redis.scan_iter(match=f"{version_prefix(version)}*", count=1000)])
+
+
+async def scenario(site: BooksSite, flaky: FlakySite, readers: int, fail_after: int) -> list:
+    repository = BookRepository()
+    await repository.redis.flushdb()
+    await BookScraper().scrape(incremental=False)
+    first = int(await repository.redis.get(CATALOGUE_CURRENT_KEY))
+    size = await repository.count_books()
+    rows = []
+
+    # Every price changes, so the new catalogue shares no book with the old one
+    for book_id in range(1, site.books + 1):
+        site.price_overrides[book_id] = book_price(book_id) + 0.01
+    site.reset_counters()
+    row = await scrape_while_reading(readers, {size})
+    row["case"] = "full re-scrape"
+    row["old_keys_left"] = await leftover_keys(first)
+    rows.append(row)
+
+    second = row["live"]
+    for book_id in range(1, site.books + 1):
+        site.price_overrides[book_id] = book_price(book_id) + 0.02
+    site.reset_counters()
+    flaky.fail_after = fail_after
+    row = await scrape_while_reading(readers, {size})
+    row["case"] = "failed scrape"
+    row["old_keys_left"] = await leftover_keys(second + 1)
+    rows.append(row)
+    flaky.fail_after = None
+
+    assert rows[0]["live"] == first + 1 and not rows[0]["old_keys_left"], "re-scrape was not swapped in cleanly"
+    assert rows[1]["live"] == second and not rows[1]["old_keys_left"], "failed scrape changed the live catalogue"
+    assert not any(row["unexpected"] or row["empty_pages"] for row in rows), "a reader saw a partial catalogue"
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--fail-after", type=int, default=None, help="Requests the site serves before failing (default: a third of the books)")
+    args = parser.parse_args()
+
+    site = BooksSite(books=args.books, latency=args.latency)
+    flaky = FlakySite(site)
+    use_local_redis()
+    settings.max_books = args.books
+    settings.min_books = args.books // 2
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 1000
+    settings.per_host_concurrency = 16
+    settings.catalogue_gc_delay = 0.5
+
+    with ServerThread(flaky) as server:
+        settings.book_base_url = server.url
+        rows = asyncio.run(scenario(site, flaky, args.readers, args.fail_after or args.books // 3))
+
+    print(f"{'case':<15} {'books':>6} {'seconds':>8} {'reads':>7} {'min total':>10} {'max total':>10} "
+          f"{'partial':>8} {'empty':>6} {'live':>5} {'old keys':>9}")
+    for r in rows:
+        print(
+            f"{r['case']:<15} {r['books']:>6} {r['seconds']:>8.2f} {r['reads']:>7} {r['min_total']:>10} "
+            f"{r['max_total']:>10} {r['unexpected']:>8} {r['empty_pages']:>6} v{r['live']:<4} {r['old_keys_left']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Crawl throughput of the CrawlEngine-backed BookScraper versus the previous
+serial loop (one listing page at a time, gather its detail pages, sleep).
+
+    python -m benchmarks.bench_crawl --books 5000 --latency 0.02
+
+Both modes fetch through the same rate limiter; ``--delay`` reproduces the
+old per-page ``request_delay`` sleep for the legacy loop.
+"""
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import ServerThread, use_local_redis
+from benchmarks.stubs import BooksSite
+
+from core.config import settings
+from services.scrape_book import BookScraper, BookWriteBuffer
+
+
+async def legacy_scrape(scraper: BookScraper, delay: float) -> int:
+    """The serial page-by-page loop BookScraper.scrape() used before the crawl engine"""
+    await scraper.book_repository.clear_all()
+    scraper.write_buffer = BookWriteBuffer(
+        scraper.book_repository, settings.store_batch_size, settings.store_flush_interval
+    )
+    pages_to_process = [settings.book_base_url + "index.html"]
+    processed_pages = set()
+
+    while scraper.books_collected < settings.max_books and pages_to_process:
+        current_page = pages_to_process.pop(0)
+        if current_page in processed_pages:
+            continue
+        processed_pages.add(current_page)
+
+        book_urls, next_pages = await scraper._process_page(current_page)
+        await asyncio.gather(*(scraper._process_book(url) for url in book_urls))
+        pages_to_process.extend(p for p in next_pages if p not in processed_pages)
+
+        if scraper.books_collected >= settings.max_books:
+            break
+        await asyncio.sleep(delay)
+
+    await scraper.write_buffer.close()
+    await scraper.client.aclose()
+    return scraper.books_collected
+
+
+async def run_mode(mode: str, site: BooksSite, delay: float) -> dict:
+    site.requests = 0
+    scraper = BookScraper()
+    started = time.perf_counter()
+    if mode == "legacy":
+        books = await legacy_scrape(scraper, delay)
+    else:
+        books = await scraper.scrape()
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "pages": site.requests,
+        "books_stored": books,
+        "seconds": elapsed,
+        "pages_per_sec": site.requests / elapsed if elapsed else 0.0,
+    }
+
+
+async def run_modes(modes: list, site: BooksSite, delay: float) -> list:
+    return [await run_mode(mode, site, delay) for mode in modes]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=2000, help="Books in the synthetic catalogue")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub server latency per request (s)")
+    parser.add_argument("--workers", type=int, default=settings.crawl_workers)
+    parser.add_argument("--host-concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=500.0, help="Per-host token bucket rate (req/s)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Legacy loop sleep between listing pages (s)")
+    parser.add_argument("--modes", default="legacy,engine")
+    args = parser.parse_args()
+
+    site = BooksSite(books=args.books, latency=args.latency)
+    use_local_redis()
+    settings.max_books = args.books
+    settings.max_price = 1000.0
+    settings.crawl_workers = args.workers
+    settings.per_host_concurrency = args.host_concurrency
+    settings.rate_limit_per_second = args.rate
+    settings.rate_limit_burst = max(1, int(args.rate))
+
+    with ServerThread(site) as server:
+        settings.book_base_url = server.url
+        print(f"{'mode':<8} {'pages':>7} {'books':>7} {'seconds':>9} {'pages/s':>9}")
+        results = asyncio.run(run_modes(args.modes.split(","), site, args.delay))
+        for result in results:
+            print(
+                f"{result['mode']:<8} {result['pages']:>7} {result['books_stored']:>7} "
+                f"{result['seconds']:>9.2f} {result['pages_per_sec']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
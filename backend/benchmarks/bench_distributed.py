@@ -0,0 +1,145 @@
+"""
+Scaling of a full scrape job crawled by 1, 2, 4 and 8 worker processes
+sharing one frontier in Redis (DISTRIBUTED_CRAWL).
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_distributed --books 1200 --max-books 1000
+
+Each run starts ``--workers`` ScrapeWorker processes, queues one job and
+times it from start to finish. The stub site answers every page after
+``--latency`` seconds and each worker keeps ``--concurrency`` requests in
+flight, so a single worker is bound by the origin's latency rather than
+by CPU, as it is against the real site. Checked on every run: the
+published catalogue holds exactly ``--max-books`` books (the budget is
+global) and the site received each page once, give or take the detail
+pages in flight when the budget ran out. ``--rate-limit`` caps the
+requests per second to the site across all workers. Needs a real Redis in
+BENCH_REDIS_URL, shared by the worker processes.
+"""
+import os
+import asyncio
+import argparse
+import multiprocessing
+
+from benchmarks.common import ServerThread, use_local_redis
+from benchmarks.stubs import BooksSite
+
+from core.config import settings
+from services.jobs import DONE, JobQueue
+from utils.models import BookRepository, RedisManager
+
+
+def _worker(index: int, overrides: dict, ready, stop) -> None:
+    from services.jobs import ScrapeWorker
+    from services.parse_pool import shutdown_parse_pool
+
+    use_local_redis()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+    async def run() -> None:
+        worker = ScrapeWorker(name=f"bench-{index}")
+        task = asyncio.create_task(worker.run())
+        ready.put(index)
+        await asyncio.to_thread(stop.wait)
+        worker.stop()
+        await task
+
+    try:
+        asyncio.run(run())
+    finally:
+        shutdown_parse_pool()
+
+
+async def run_job(site: BooksSite) -> dict:
+    queue = JobQueue()
+    job_id, _ = await queue.enqueue(incremental=False, trigger="bench")
+    while True:
+        job = await queue.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            break
+        await asyncio.sleep(0.05)
+    return {
+        "job": job,
+        "books": await BookRepository().count_books(),
+        "requests": site.requests,
+    }
+
+
+async def run_workers(workers: int, site: BooksSite, overrides: dict) -> dict:
+    await RedisManager().client.flushdb()
+    site.reset_counters()
+    context = multiprocessing.get_context("spawn")
+    ready, stop = context.Queue(), context.Event()
+    processes = [context.Process(target=_worker, args=(index, overrides, ready, stop)) for index in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for _ in processes:
+            await asyncio.to_thread(ready.get, timeout=120)
+        result = await run_job(site)
+    finally:
+        stop.set()
+        for process in processes:
+            await asyncio.to_thread(process.join, 60)
+            if process.is_alive():
+                process.terminate()
+    job = result["job"]
+    result.update(workers=workers, elapsed=job["finished"] - job["started"])
+    return result
+
+
+async def run_all(counts: list, site: BooksSite, overrides: dict) -> list:
+    return [await run_workers(workers, site, overrides) for workers in counts]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1200, help="Books on the stub site")
+    parser.add_argument("--max-books", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub latency per page (s)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Requests in flight per worker")
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="Requests per second to the site, across all workers")
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+    if not os.environ.get("BENCH_REDIS_URL"):
+        parser.error("set BENCH_REDIS_URL to a real Redis database")
+
+    use_local_redis()
+    site = BooksSite(books=args.books, latency=args.latency)
+    with ServerThread(site) as server:
+        overrides = {
+            "book_base_url": server.url,
+            "distributed_crawl": True,
+            "scrape_if_empty": False,
+            "max_books": args.max_books,
+            "min_books": args.max_books // 2,
+            "max_price": 1000.0,
+            "parse_workers": 0,
+            "crawl_workers": args.concurrency,
+            "per_host_concurrency": args.concurrency,
+            "rate_limit_per_second": args.rate_limit,
+            "rate_limit_burst": max(1, int(args.rate_limit / 10)),
+            "catalogue_gc_delay": 0.0,
+            "job_progress_interval": 0.2,
+        }
+        counts = [int(value) for value in args.workers.split(",")]
+        rows = asyncio.run(run_all(counts, site, overrides))
+
+    # Pages a single pass needs: the listing pages up to the last book kept and one page per book
+    listings = -(-args.max_books // site.per_page)
+    print(f"{'workers':>7} {'status':>7} {'books':>6} {'time s':>7} {'books/s':>8} {'speedup':>8} {'requests':>9} {'req/s':>6}")
+    base = rows[0]["books"] / rows[0]["elapsed"] if rows and rows[0]["elapsed"] else 0.0
+    for r in rows:
+        rate = r["books"] / r["elapsed"] if r["elapsed"] else 0.0
+        print(
+            f"{r['workers']:>7} {r['job']['status']:>7} {r['books']:>6} {r['elapsed']:>7.2f} {rate:>8.1f} "
+            f"{rate / base if base else 0:>7.2f}x {r['requests']:>9} {r['requests'] / r['elapsed']:>6.0f}"
+        )
+    print(f"minimum requests for {args.max_books} books: {args.max_books + listings}")
+    for r in rows:
+        assert r["job"]["status"] == DONE and r["job"]["published"], r["job"]
+        assert r["books"] == args.max_books, f"{r['workers']} workers published {r['books']} books"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Full scrapes of a struggling origin with the previous single attempt fetch,
+retries alone and the adaptive fetch layer (AIMD concurrency, retries
+honouring Retry-After, circuit breaker).
+
+    python -m benchmarks.bench_fetcher --books 500 --capacity 3 --error-rate 0.02 --spike-rate 0.05
+
+The stub books site is wrapped in a FlakyOrigin: it answers 429 beyond
+``--capacity`` concurrent requests, fails ``--error-rate`` of the others
+with a 503 and delays ``--spike-rate`` of them by ``--spike-latency``.
+The scraper allows ``--concurrency`` requests per host, more than the
+origin takes. Reported: books stored per minute, requests the origin
+received and how many of them were wasted on a 429 or 503.
+"""
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import ServerThread, use_local_redis
+from benchmarks.stubs import BooksSite, FlakyOrigin
+
+from core.config import settings
+from services.scrape_book import BookScraper
+from utils.models import BookRepository
+
+FIXED = "fixed"  # Minimum concurrency equal to the maximum: no adaptation
+
+# Settings overriding the defaults in each mode. "single" is the previous
+# behaviour: one attempt per page, Retry-After ignored.
+MODES = {
+    "single": {"fetch_retries": 0, "fetch_backoff_max": 0.0, "fetch_min_concurrency": FIXED, "breaker_failure_threshold": 0},
+    "retry": {"fetch_min_concurrency": FIXED, "breaker_failure_threshold": 0},
+    "adaptive": {},
+}
+
+
+async def run_mode(mode: str, origin: FlakyOrigin, defaults: dict) -> dict:
+    for name, value in {**defaults, **MODES[mode]}.items():
+        setattr(settings, name, settings.per_host_concurrency if value == FIXED else value)
+
+    repository = BookRepository()
+    await repository.redis.flushdb()
+    origin.reset_counters()
+    scraper = BookScraper()
+    started = time.perf_counter()
+    await scraper.scrape(incremental=False)
+    elapsed = time.perf_counter() - started
+    if scraper.gc_task:
+        await scraper.gc_task
+    books = await repository.count_books()
+    host = next(iter(scraper.fetcher.metrics()["hosts"].values()), {})
+    return {
+        "mode": mode,
+        "books": books,
+        "elapsed": elapsed,
+        "books_per_min": books / elapsed * 60,
+        "requests": origin.requests,
+        "wasted": origin.throttled + origin.errors,
+        "retries": scraper.fetcher.retries,
+        "concurrency": host.get("concurrency", 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub latency per page (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Per host concurrency of the scraper (the ceiling when adaptive)")
+    parser.add_argument("--capacity", type=int, default=3, help="Concurrent requests the origin takes before answering 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--spike-rate", type=float, default=0.05)
+    parser.add_argument("--spike-latency", type=float, default=0.5)
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    use_local_redis()
+    settings.max_books = args.books
+    settings.min_books = 0
+    settings.max_price = 1000.0
+    settings.parse_workers = 0
+    settings.catalogue_gc_delay = 0.0
+    settings.crawl_workers = args.concurrency
+    settings.per_host_concurrency = args.concurrency
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 100
+    settings.fetch_backoff_base = 0.1
+    settings.fetch_backoff_max = 5.0
+    settings.fetch_latency_target = args.spike_latency / 2
+    settings.breaker_reset_timeout = 1.0
+    defaults = {name: getattr(settings, name) for mode in MODES.values() for name in mode}
+
+    site = BooksSite(books=args.books, latency=args.latency)
+    origin = FlakyOrigin(
+        site, capacity=args.capacity, retry_after=args.retry_after, error_rate=args.error_rate,
+        spike_rate=args.spike_rate, spike_latency=args.spike_latency
+    )
+    with ServerThread(origin) as server:
+        settings.book_base_url = server.url
+        rows = [asyncio.run(run_mode(mode, origin, defaults)) for mode in args.modes.split(",")]
+
+    print(f"{'mode':<9} {'books':>6} {'time s':>7} {'books/min':>10} {'requests':>9} {'wasted':>7} {'retries':>8} {'final limit':>12}")
+    for r in rows:
+        print(
+            f"{r['mode']:<9} {r['books']:>6} {r['elapsed']:>7.1f} {r['books_per_min']:>10.0f} "
+            f"{r['requests']:>9} {r['wasted']:>7} {r['retries']:>8} {r['concurrency']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
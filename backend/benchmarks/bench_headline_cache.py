@@ -0,0 +1,117 @@
+"""
+Load test for the headline cache: concurrent ``GET /headlines`` calls against
+the API, counting requests that reach the (stub) Hacker News site.
+
+    python -m benchmarks.bench_headline_cache --concurrency 100 --latency 0.2
+
+Scenarios, each starting from an empty cache:
+
+* ``uncached``   - calling the scrapers directly, as /headlines used to
+* ``ttl=0``      - caching disabled, concurrent calls still share one scrape
+* ``cold``       - caching enabled, one wave of concurrent calls
+* ``warm``       - a second wave served from cache
+* ``max_age=0``  - a wave forcing a fresh scrape
+* ``stale``      - a wave after the TTL expired, served stale while one refresh runs
+
+Set ``--redis`` to store entries in Redis (BENCH_REDIS_URL or fakeredis).
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import ServerThread, percentile, use_local_redis
+from benchmarks.stubs import HackerNewsSite
+
+from core.config import settings
+import main
+import services.headline_cache as headline_cache
+
+
+async def wave(client: httpx.AsyncClient, concurrency: int, params: dict) -> list:
+    async def call():
+        started = time.perf_counter()
+        response = await client.get("/headlines", params=params)
+        response.raise_for_status()
+        return (time.perf_counter() - started) * 1000, response.json()
+
+    return await asyncio.gather(*(call() for _ in range(concurrency)))
+
+
+def report(name: str, site: HackerNewsSite, before: int, results: list) -> dict:
+    timings = [ms for ms, _ in results]
+    return {
+        "scenario": name,
+        "upstream": site.requests - before,
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+        "max_age": max(body["data_age"] for _, body in results),
+    }
+
+
+async def scenario(site: HackerNewsSite, concurrency: int, ttl: int) -> list:
+    rows = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+        # The previous behaviour: every call scrapes
+        before = site.requests
+        started = time.perf_counter()
+        await asyncio.gather(*(main.fetch_headlines() for _ in range(concurrency)))
+        elapsed = (time.perf_counter() - started) * 1000
+        rows.append({"scenario": "uncached", "upstream": site.requests - before, "p50": elapsed, "p99": elapsed, "max_age": 0.0})
+
+        settings.headlines_cache_ttl = 0
+        headline_cache._cache = None
+        before = site.requests
+        rows.append(report("ttl=0", site, before, await wave(client, concurrency, {})))
+
+        settings.headlines_cache_ttl = ttl
+        settings.headlines_cache_stale = 60
+        headline_cache._cache = None
+        if settings.headlines_cache_redis:
+            await headline_cache.RedisManager().client.delete("headlines:1")
+        for name, params in (("cold", {}), ("warm", {}), ("max_age=0", {"max_age": 0})):
+            before = site.requests
+            rows.append(report(name, site, before, await wave(client, concurrency, params)))
+
+        # Expire the entry without waiting for the TTL
+        headline_cache.get_headline_cache().ttl = 0.05
+        await asyncio.sleep(0.1)
+        before = site.requests
+        results = await wave(client, concurrency, {})
+        await asyncio.sleep(site.latency * 2 + 0.1)  # Let the background refresh land
+        rows.append(report("stale", site, before, results))
+    return rows
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub Hacker News latency (s)")
+    parser.add_argument("--ttl", type=int, default=30)
+    parser.add_argument("--redis", action="store_true", help="Store entries in Redis")
+    args = parser.parse_args()
+
+    site = HackerNewsSite(latency=args.latency)
+    settings.hnews_backend = "http"
+    settings.hnews_selenium_fallback = False
+    settings.headlines_cache_redis = args.redis
+    if args.redis:
+        use_local_redis()
+
+    with ServerThread(site) as server:
+        settings.hnews_site_url = server.url + "news"
+        rows = asyncio.run(scenario(site, args.concurrency, args.ttl))
+
+    print(f"{'scenario':<10} {'upstream':>9} {'p50 ms':>8} {'p99 ms':>8} {'max age s':>10}")
+    for r in rows:
+        print(f"{r['scenario']:<10} {r['upstream']:>9} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['max_age']:>10.2f}")
+
+    cold = next(r for r in rows if r["scenario"] == "cold")
+    assert cold["upstream"] == 1, f"expected one upstream fetch for {args.concurrency} concurrent calls, got {cold['upstream']}"
+    print(f"{args.concurrency} concurrent /headlines calls -> {cold['upstream']} upstream fetch")
+
+
+if __name__ == "__main__":
+    main_()
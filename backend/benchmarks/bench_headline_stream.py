@@ -0,0 +1,226 @@
+"""
+Fan-out of /headlines/stream: upstream scrapes and delivery latency with
+1, 100 and 500 Server-Sent Events subscribers.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_headline_stream --subscribers 1,100,500
+
+``--api-workers`` uvicorn processes serve the API against one Redis, the
+subscribers connecting to them in turn, and the stub Hacker News front
+page changes every ``--change-every`` seconds (a new story, growing
+scores). Each subscriber applies the snapshot and the diffs it receives
+to its own copy of the headlines. Reported per subscriber count: requests
+the stub received per second, which should stay at one per
+``--interval`` however many clients listen, the latency from publishing a
+diff to a client reading it, diffs received, and whether every client's
+copy matches the published snapshot at the end. The stub then answers 503
+for ``--outage`` seconds: no client may see its headlines emptied, and the
+stored snapshot must still hold the stories. Needs a real Redis in
+BENCH_REDIS_URL, shared by the API processes.
+"""
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import multiprocessing
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import ServerThread, _free_port, percentile, use_local_redis
+from benchmarks.stubs import HackerNewsSite
+
+from core.config import settings
+from services.headline_stream import HEADLINES_SNAPSHOT_KEY, story_key
+from utils.models import RedisManager
+
+
+def _serve_api(port: int, overrides: dict) -> None:
+    import uvicorn
+
+    use_local_redis()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    import main
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_for_port(port: int, process, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            if time.monotonic() > deadline or not process.is_alive():
+                raise RuntimeError("API did not start")
+            time.sleep(0.1)
+
+
+class Subscriber:
+    """SSE client keeping its own copy of the headlines from the snapshot and diffs"""
+
+    def __init__(self):
+        self.seq = -1
+        self.headlines: List[dict] = []
+        self.snapshots = 0
+        self.diffs = 0
+        self.gaps = 0
+        self.latencies: List[float] = []
+        self.emptied = False
+        self.ready = asyncio.Event()
+
+    def apply(self, event: str, data: str) -> None:
+        payload = json.loads(data)
+        if event == "snapshot":
+            self.snapshots += 1
+            self.seq = payload["seq"]
+            self.headlines = payload["headlines"]
+            self.ready.set()
+            return
+        self.latencies.append(time.time() - payload["fetched_at"])
+        self.diffs += 1
+        if payload["seq"] != self.seq + 1:
+            self.gaps += 1
+        self.seq = payload["seq"]
+
+        positions = {story_key(headline): position for position, headline in enumerate(self.headlines, 1)}
+        stories: Dict[str, dict] = {story_key(headline): dict(headline) for headline in self.headlines}
+        for key in payload["removed"]:
+            stories.pop(key, None)
+            positions.pop(key, None)
+        for change in payload["updated"]:
+            stories[change["key"]].update(change["fields"])
+        for move in payload["moved"]:
+            positions[move["key"]] = move["position"]
+        for added in payload["added"]:
+            key = story_key(added["headline"])
+            stories[key] = added["headline"]
+            positions[key] = added["position"]
+        self.headlines = [stories[key] for key in sorted(stories, key=positions.__getitem__)]
+        if not self.headlines:
+            self.emptied = True
+
+    async def run(self, client: httpx.AsyncClient, url: str) -> None:
+        async with client.stream("GET", url) as response:
+            event = data = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    data = line[6:]
+                elif not line and event:
+                    self.apply(event, data)
+                    event = data = None
+
+
+async def phase(
+    site: HackerNewsSite, ports: List[int], subscribers: int, duration: float, change_every: float, outage: float
+) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None), limits=limits) as client:
+        clients = [Subscriber() for _ in range(subscribers)]
+        tasks = [
+            asyncio.create_task(subscriber.run(client, f"http://127.0.0.1:{ports[index % len(ports)]}/headlines/stream"))
+            for index, subscriber in enumerate(clients)
+        ]
+        await asyncio.wait_for(asyncio.gather(*(subscriber.ready.wait() for subscriber in clients)), timeout=60)
+
+        before = site.requests
+        started = time.monotonic()
+        while time.monotonic() - started < duration:
+            await asyncio.sleep(change_every)
+            site.advance()
+        elapsed = time.monotonic() - started
+        requests = site.requests - before
+        # Let the last change reach everyone
+        await asyncio.sleep(change_every * 2)
+
+        snapshot = json.loads(await RedisManager().client.get(HEADLINES_SNAPSHOT_KEY))
+
+        # Upstream down: the failed scrapes must not reach the clients or the snapshot
+        site.down = True
+        await asyncio.sleep(outage)
+        site.down = False
+        after_outage = json.loads(await RedisManager().client.get(HEADLINES_SNAPSHOT_KEY))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [latency for subscriber in clients for latency in subscriber.latencies]
+    return {
+        "subscribers": subscribers,
+        "upstream_per_s": requests / elapsed,
+        "diffs": sum(subscriber.diffs for subscriber in clients) / subscribers,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "resyncs": sum(subscriber.snapshots - 1 for subscriber in clients),
+        "consistent": sum(
+            subscriber.seq == snapshot["seq"] and subscriber.headlines == snapshot["headlines"] for subscriber in clients
+        ),
+        "emptied": sum(subscriber.emptied for subscriber in clients),
+        "snapshot_kept": after_outage["headlines"] == snapshot["headlines"],
+    }
+
+
+async def run_phases(
+    site: HackerNewsSite, ports: List[int], counts: List[int], duration: float, change_every: float, outage: float
+) -> list:
+    await RedisManager().client.flushdb()
+    return [await phase(site, ports, count, duration, change_every, outage) for count in counts]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", default="1,100,500")
+    parser.add_argument("--api-workers", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=1.0, help="HEADLINES_STREAM_INTERVAL (s)")
+    parser.add_argument("--change-every", type=float, default=1.0, help="Seconds between front page changes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds measured per subscriber count")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub latency per page (s)")
+    parser.add_argument("--outage", type=float, default=3.0, help="Seconds the stub answers 503 after each phase")
+    args = parser.parse_args()
+    if not os.environ.get("BENCH_REDIS_URL"):
+        parser.error("set BENCH_REDIS_URL to a real Redis database")
+
+    use_local_redis()
+    site = HackerNewsSite(latency=args.latency)
+    context = multiprocessing.get_context("spawn")
+    with ServerThread(site) as server:
+        overrides = {
+            "hnews_backend": "http",
+            "hnews_selenium_fallback": False,
+            "hnews_site_url": server.url + "news",
+            "headlines_stream_interval": args.interval,
+            "headlines_stream_pages": 1,
+        }
+        ports = [_free_port() for _ in range(args.api_workers)]
+        processes = [context.Process(target=_serve_api, args=(port, overrides), daemon=True) for port in ports]
+        for process in processes:
+            process.start()
+        try:
+            for port, process in zip(ports, processes):
+                _wait_for_port(port, process)
+            counts = [int(value) for value in args.subscribers.split(",")]
+            rows = asyncio.run(run_phases(site, ports, counts, args.duration, args.change_every, args.outage))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join(timeout=10)
+
+    print(f"{args.api_workers} API workers, one scrape every {args.interval}s, front page changing every {args.change_every}s")
+    print(
+        f"{'subscribers':>11} {'upstream/s':>10} {'diffs':>6} {'p50 ms':>7} {'p99 ms':>7} {'resyncs':>8} "
+        f"{'consistent':>11} {'emptied':>8} {'outage':>7}"
+    )
+    for r in rows:
+        print(
+            f"{r['subscribers']:>11} {r['upstream_per_s']:>10.2f} {r['diffs']:>6.1f} {r['p50_ms']:>7.1f} "
+            f"{r['p99_ms']:>7.1f} {r['resyncs']:>8} {r['consistent']:>5}/{r['subscribers']} {r['emptied']:>8} "
+            f"{'kept' if r['snapshot_kept'] else 'LOST':>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
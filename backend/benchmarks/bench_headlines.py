@@ -0,0 +1,83 @@
+"""
+Hacker News headlines: parity of the HTTP backend on a saved fixture page
+and ``fetch_top_stories`` latency against a local stub.
+
+    python -m benchmarks.bench_headlines --pages 1,5 --latency 0.02
+
+The fixture's expected stories (``fixtures/hn/news.json``) are what the
+Selenium backend yields: title link text, absolute URLs, the rank, and the
+score, age and comment count from the following subtext row (score and
+comments 0 for job posts).
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import ServerThread, percentile
+from benchmarks.stubs import HackerNewsSite
+
+from core.config import settings
+from services.scrape_hn_http import HackerNewsHttpScraper, close_hn_client, parse_stories
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hn")
+
+
+def check_parity() -> None:
+    with open(os.path.join(FIXTURES, "news.html"), "rb") as f:
+        content = f.read()
+    with open(os.path.join(FIXTURES, "news.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+
+    got = parse_stories(content, "text/html; charset=utf-8", "https://news.ycombinator.com/news")
+    if got != expected:
+        for index, (a, b) in enumerate(zip(expected, got)):
+            if a != b:
+                print(f"row {index}: expected {a}\n        got      {b}")
+        raise SystemExit(f"parity: FAILED ({len(got)} stories parsed, {len(expected)} expected)")
+    print(f"parity: OK ({len(got)} stories)")
+
+
+async def measure(pages: int, rounds: int) -> list:
+    scraper = HackerNewsHttpScraper()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        stories = await scraper.fetch_top_stories(pages)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert len(stories) == pages * 30
+    return timings
+
+
+async def run(page_counts: list, rounds: int) -> list:
+    try:
+        return [(pages, await measure(pages, rounds)) for pages in page_counts]
+    finally:
+        await close_hn_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="1,5", help="Comma separated page counts to fetch")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub server latency per page (s)")
+    args = parser.parse_args()
+
+    check_parity()
+
+    site = HackerNewsSite(latency=args.latency)
+    with ServerThread(site) as server:
+        settings.hnews_site_url = server.url + "news"
+        results = asyncio.run(run([int(p) for p in args.pages.split(",")], args.rounds))
+
+    print(f"{'backend':<8} {'pages':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for pages, timings in results:
+        print(
+            f"{'http':<8} {pages:>5} {percentile(timings, 50):>8.2f} "
+            f"{percentile(timings, 95):>8.2f} {percentile(timings, 99):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
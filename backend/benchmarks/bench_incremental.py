@@ -0,0 +1,95 @@
+"""
+Cost of a full scrape versus an incremental refresh of a mostly unchanged
+catalogue.
+
+    python -m benchmarks.bench_incremental --books 2000 --changed 10
+
+After the full scrape, ``--changed`` books get a new price (a new book ID) and
+``--removed`` books disappear from the end of the catalogue. The refresh
+should answer nearly every page with a 304, store the changed books and
+remove the stale ones, while the catalogue stays readable throughout.
+"""
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import ServerThread, use_local_redis
+from benchmarks.stubs import BooksSite
+
+from core.config import settings
+from services.scrape_book import BookScraper
+from utils.models import BookRepository
+
+
+async def run(site: BooksSite, incremental: bool) -> dict:
+    site.reset_counters()
+    repository = BookRepository()
+    scraper = BookScraper()
+
+    # Sample the catalogue size while the scrape runs
+    sizes = []
+
+    async def sample():
+        while True:
+            sizes.append(await repository.count_books())
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample())
+    started = time.perf_counter()
+    books = await scraper.scrape(incremental=incremental)
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    return {
+        "mode": "incremental" if incremental else "full",
+        "requests": site.requests,
+        "not_modified": site.status_counts.get(304, 0),
+        "kbytes": site.bytes_sent / 1024,
+        "seconds": elapsed,
+        "books": books,
+        "stored": await repository.count_books(),
+        "min_visible": min(sizes) if sizes else 0,
+    }
+
+
+async def scenario(site: BooksSite, changed: int, removed: int) -> list:
+    results = [await run(site, incremental=False)]
+
+    for book_id in range(1, changed + 1):
+        site.price_overrides[book_id] = 11.11 + book_id / 100
+    site.books -= removed
+
+    results.append(await run(site, incremental=True))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("--removed", type=int, default=5)
+    args = parser.parse_args()
+
+    site = BooksSite(books=args.books, latency=args.latency)
+    use_local_redis()
+    settings.max_books = args.books
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 1000
+    settings.per_host_concurrency = 16
+
+    with ServerThread(site) as server:
+        settings.book_base_url = server.url
+        results = asyncio.run(scenario(site, args.changed, args.removed))
+
+    print(f"{'mode':<12} {'requests':>8} {'304s':>6} {'KiB':>9} {'seconds':>8} {'books':>6} {'stored':>7} {'min visible':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<12} {r['requests']:>8} {r['not_modified']:>6} {r['kbytes']:>9.0f} "
+            f"{r['seconds']:>8.2f} {r['books']:>6} {r['stored']:>7} {r['min_visible']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Latency of POST /init now that scrapes run as jobs, and the behaviour of
+the job workers: merged requests, no overlapping scrapes, progress and
+cancellation.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_jobs --books 500 --workers 2 --calls 50
+
+``--calls`` concurrent POST /init requests go through the ASGI app in
+process while ``--workers`` ScrapeWorker loops run against a local stub
+site. The requests must return at once and queue a single job, which
+reports progress while it runs. A full and an incremental job queued
+together must run one after the other, and a job cancelled halfway must
+stop without changing the live catalogue. Needs a real Redis in
+BENCH_REDIS_URL: fakeredis serves blocking stream reads without yielding to
+the event loop.
+"""
+import os
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import ServerThread, percentile, use_local_redis
+from benchmarks.stubs import BooksSite
+
+import main
+from core.config import settings
+from services.jobs import DONE, CANCELLED, RUNNING, ScrapeWorker
+from utils.models import CATALOGUE_CURRENT_KEY, RedisManager
+
+
+async def wait_for(client: httpx.AsyncClient, job_id: str, done, timeout: float = 120.0) -> tuple:
+    """Poll a job until done(job); returns it and the progress samples seen"""
+    samples = []
+    deadline = time.monotonic() + timeout
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()["job"]
+        samples.append(job)
+        if done(job):
+            return job, samples
+        if time.monotonic() > deadline:
+            raise AssertionError(f"Job {job_id} still {job['status']} after {timeout}s")
+        await asyncio.sleep(0.05)
+
+
+async def burst(client: httpx.AsyncClient, calls: int) -> tuple:
+    latencies = []
+
+    async def call():
+        started = time.perf_counter()
+        response = await client.post("/init", params={"incremental": "false"})
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 202, response.text
+        return response.json()["job_id"]
+
+    job_ids = await asyncio.gather(*(call() for _ in range(calls)))
+    return set(job_ids), latencies
+
+
+async def scenario(site: BooksSite, workers: int, calls: int) -> dict:
+    redis = RedisManager().client
+    await redis.flushdb()
+    pool = [ScrapeWorker(name=f"bench-{index}") for index in range(workers)]
+    tasks = [asyncio.create_task(worker.run()) for worker in pool]
+    result = {}
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        # 1. A burst of /init calls queues one job
+        job_ids, latencies = await burst(client, calls)
+        started = time.perf_counter()
+        job, samples = await wait_for(client, next(iter(job_ids)), lambda job: job["status"] == DONE)
+        result.update(
+            jobs=len(job_ids), p50_ms=percentile(latencies, 50) * 1000, max_ms=max(latencies) * 1000,
+            scrape_s=time.perf_counter() - started, books=job["books"], pages=job["pages"], rate=job["rate"],
+            progress_updates=len({(sample["pages"], sample["books"]) for sample in samples if sample["status"] == RUNNING})
+        )
+        assert len(job_ids) == 1, f"{calls} calls queued {len(job_ids)} jobs"
+        assert job["published"] and job["books"] == site.books, job
+
+        # 2. Jobs of both modes run one after the other
+        full = (await client.post("/init", params={"incremental": "false"})).json()["job_id"]
+        incremental = (await client.post("/init", params={"incremental": "true"})).json()["job_id"]
+        jobs = [(await wait_for(client, job_id, lambda job: job["status"] == DONE))[0] for job_id in (full, incremental)]
+        first, second = sorted(jobs, key=lambda job: job["started"])
+        result["overlap"] = first["finished"] > second["started"]
+        assert not result["overlap"], "two scrapes ran at the same time"
+
+        # 3. Cancelling a running job keeps the live catalogue
+        live = await redis.get(CATALOGUE_CURRENT_KEY)
+        job_id = (await client.post("/init", params={"incremental": "false"})).json()["job_id"]
+        await wait_for(client, job_id, lambda job: job["status"] == RUNNING and job["books"] > 0)
+        cancel_at = time.perf_counter()
+        await client.delete(f"/jobs/{job_id}")
+        job, _ = await wait_for(client, job_id, lambda job: job["status"] != RUNNING)
+        result.update(cancel_s=time.perf_counter() - cancel_at, cancelled_books=job["books"])
+        assert job["status"] == CANCELLED and not job["published"], job
+        assert await redis.get(CATALOGUE_CURRENT_KEY) == live, "a cancelled scrape changed the live catalogue"
+
+    for worker in pool:
+        worker.stop()
+    await asyncio.gather(*tasks)
+    return result
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    if not os.environ.get("BENCH_REDIS_URL"):
+        parser.error("set BENCH_REDIS_URL to a real Redis database")
+
+    site = BooksSite(books=args.books, latency=args.latency)
+    use_local_redis()
+    settings.max_books = args.books
+    settings.min_books = args.books // 2
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 200.0
+    settings.rate_limit_burst = 50
+    settings.per_host_concurrency = 8
+    settings.catalogue_gc_delay = 0.5
+    settings.scrape_if_empty = False
+    settings.job_progress_interval = 0.2
+
+    with ServerThread(site) as server:
+        settings.book_base_url = server.url
+        r = asyncio.run(scenario(site, args.workers, args.calls))
+
+    print(f"{args.calls} concurrent POST /init: p50 {r['p50_ms']:.1f} ms, max {r['max_ms']:.1f} ms, {r['jobs']} job queued")
+    print(f"job: {r['books']} books, {r['pages']} pages in {r['scrape_s']:.2f}s ({r['rate']:.0f} books/s), "
+          f"{r['progress_updates']} distinct progress readings")
+    print(f"full + incremental jobs overlapped: {r['overlap']}")
+    print(f"cancelled after {r['cancelled_books']} books, stopped {r['cancel_s'] * 1000:.0f} ms after DELETE, live catalogue unchanged")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,156 @@
+"""
+Overhead of the Prometheus metrics: the cost of one observation, and of
+metrics on an API search and on a crawl, with METRICS_ENABLED on and off.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_metrics --books 2000
+
+The micro benchmark times ``Counter.inc``, ``Histogram.observe`` and
+``Histogram.time`` per call. The API scenario sends ``--rounds`` searches
+through the ASGI app in process, the catalogue cache off so every call
+reaches BookRepository (one REPOSITORY_SECONDS and one HTTP_REQUEST_SECONDS
+observation each), and reports p50, p95 and requests per second of CPU. The
+crawl scenario scrapes the stub books site and reports pages per second.
+Both alternate enabled and disabled runs; the difference is the overhead.
+The size of ``GET /metrics`` after the runs is printed last.
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import ServerThread, percentile, seed_books, use_local_redis
+from benchmarks.stubs import BooksSite
+
+import main
+from core.config import settings
+from services import catalogue_cache
+from services.scrape_book import BookScraper
+from utils.metrics import REGISTRY, Counter, Histogram, Registry
+
+SEARCH = {"q": "kaka", "category": "science,history", "max_price": 40, "limit": 20}
+
+
+def micro(calls: int) -> list:
+    """Nanoseconds per call of each observation, on a registry of its own"""
+    rows = []
+    for enabled in (True, False):
+        registry = Registry(enabled=enabled)
+        counter = Counter("bench_counter", "", ("label",), registry=registry)
+        histogram = Histogram("bench_seconds", "", ("label",), registry=registry)
+
+        def timed_block():
+            with histogram.time("a"):
+                pass
+
+        for name, call in (
+            ("Counter.inc", lambda: counter.inc("a")),
+            ("Histogram.observe", lambda: histogram.observe(0.003, "a")),
+            ("Histogram.time", timed_block),
+        ):
+            started = time.perf_counter()
+            for _ in range(calls):
+                call()
+            rows.append({"call": name, "enabled": enabled, "ns": (time.perf_counter() - started) / calls * 1e9})
+    return rows
+
+
+async def api_run(client: httpx.AsyncClient, rounds: int) -> dict:
+    timings = []
+    cpu = time.process_time()
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = await client.get("/books/search", params=SEARCH)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+    cpu = time.process_time() - cpu
+    return {
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "per_cpu_sec": rounds / cpu if cpu else 0.0,
+    }
+
+
+async def api_scenario(books: int, rounds: int, repeats: int) -> dict:
+    settings.catalogue_cache_books = 0
+    await catalogue_cache.shutdown_catalogue_cache()
+    await seed_books(books)
+    transport = httpx.ASGITransport(app=main.app)
+    results = {True: [], False: []}
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+        await api_run(client, rounds // 10 or 1)
+        for _ in range(repeats):
+            for enabled in (True, False):
+                REGISTRY.enabled = enabled
+                results[enabled].append(await api_run(client, rounds))
+    REGISTRY.enabled = True
+    return results
+
+
+async def crawl_scenario(site: BooksSite, repeats: int) -> dict:
+    results = {True: [], False: []}
+    for _ in range(repeats):
+        for enabled in (True, False):
+            REGISTRY.enabled = enabled
+            site.requests = 0
+            started = time.perf_counter()
+            await BookScraper().scrape()
+            results[enabled].append(site.requests / (time.perf_counter() - started))
+    REGISTRY.enabled = True
+    return results
+
+
+async def scenarios(site: BooksSite, args: argparse.Namespace) -> tuple:
+    """Both scenarios on one event loop, the Redis clients being bound to it"""
+    api = await api_scenario(args.books, args.rounds, args.repeats)
+    crawl = await crawl_scenario(site, args.repeats)
+    return api, crawl
+
+
+def best(runs: list, key: str, lowest: bool) -> float:
+    values = [run[key] for run in runs]
+    return min(values) if lowest else max(values)
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000, help="Calls per observation in the micro benchmark")
+    parser.add_argument("--books", type=int, default=2000, help="Books seeded and crawled")
+    parser.add_argument("--rounds", type=int, default=500, help="Searches per API run")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per setting, the best is kept")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub books site latency per request (s)")
+    args = parser.parse_args()
+
+    print(f"{'observation':<18} {'enabled ns':>10} {'disabled ns':>11}")
+    rows = micro(args.calls)
+    for name in dict.fromkeys(row["call"] for row in rows):
+        ns = {row["enabled"]: row["ns"] for row in rows if row["call"] == name}
+        print(f"{name:<18} {ns[True]:>10.0f} {ns[False]:>11.0f}")
+
+    use_local_redis()
+    site = BooksSite(books=args.books, latency=args.latency)
+    settings.max_books = args.books
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 10000.0
+    settings.rate_limit_burst = 10000
+    with ServerThread(site) as server:
+        settings.book_base_url = server.url
+        api, crawl = asyncio.run(scenarios(site, args))
+
+    print(f"\n{'search, metrics':<16} {'p50 ms':>7} {'p95 ms':>7} {'req/cpu s':>10}")
+    for enabled in (True, False):
+        runs = api[enabled]
+        print(
+            f"{'on' if enabled else 'off':<16} {best(runs, 'p50_ms', True):>7.3f} "
+            f"{best(runs, 'p95_ms', True):>7.3f} {best(runs, 'per_cpu_sec', False):>10.0f}"
+        )
+
+    print(f"\n{'crawl, metrics':<16} {'pages/s':>8}")
+    for enabled in (True, False):
+        print(f"{'on' if enabled else 'off':<16} {max(crawl[enabled]):>8.1f}")
+
+    print(f"\nGET /metrics: {len(REGISTRY.render().encode())} bytes")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,117 @@
+"""
+Latency of ``GET /books/search`` while a scrape runs in the same API process,
+with HTML parsing inline on the event loop versus in the parse pool.
+
+    python -m benchmarks.bench_parse_offload --books 2000 --parser bs4
+
+The scrape and the search requests share one event loop, exactly as they do
+when ``POST /init`` runs inside uvicorn. With inline parsing every page parse
+stalls the loop and shows up in the search p99; with the pool it should stay
+close to the idle baseline.
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import ServerProcess, percentile, use_local_redis
+from benchmarks.stubs import BooksSite
+
+from core.config import settings
+from services.parse_pool import shutdown_parse_pool
+from services.scrape_book import BookScraper
+from utils.models import Book, BookRepository
+
+
+async def search_latencies(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/books/search", params={"category": "poetry"})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(mode: str, duration: float, interval: float) -> dict:
+    from main import app
+
+    shutdown_parse_pool()
+    scraper = BookScraper()
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        probe = asyncio.create_task(search_latencies(client, stop, interval))
+        started = time.perf_counter()
+        if mode == "idle":
+            await asyncio.sleep(duration)
+            pages = 0
+        else:
+            # Incremental keeps the seeded books searchable; drop the page
+            # fingerprints so every page is downloaded and parsed again
+            async for key in scraper.page_cache.redis.scan_iter("page:*"):
+                await scraper.page_cache.redis.delete(key)
+            await scraper.scrape(incremental=True)
+            pages = scraper.engine.stats.pages_processed
+        elapsed = time.perf_counter() - started
+        stop.set()
+        latencies = await probe
+    shutdown_parse_pool()
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else 0.0,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+    }
+
+
+async def seed(count: int) -> None:
+    repository = BookRepository()
+    for i in range(count):
+        await repository.store_book(Book(title=f"Seed {i}", price=9.99, category="poetry", image_url=""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--parser", default="bs4", help="HTML parser backend to use")
+    parser.add_argument("--workers", type=int, default=2, help="Parse pool size for the pool mode")
+    parser.add_argument("--interval", type=float, default=0.005, help="Pause between search requests (s)")
+    args = parser.parse_args()
+
+    site = BooksSite(books=args.books, latency=0.005)
+    use_local_redis()
+    settings.html_parser = args.parser
+    settings.max_books = args.books
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 1000
+    settings.per_host_concurrency = 16
+
+    async def scenario() -> list:
+        await seed(50)
+        results = [await run("idle", 3.0, args.interval)]
+        for mode, workers in (("inline", 0), ("pool", args.workers)):
+            settings.parse_workers = workers
+            results.append(await run(mode, 0, args.interval))
+        return results
+
+    with ServerProcess(site) as server:
+        settings.book_base_url = server.url
+        results = asyncio.run(scenario())
+
+    print(f"{'mode':<8} {'requests':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'pages/s':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:<8} {r['requests']:>8} {r['p50']:>8.2f} {r['p99']:>8.2f} "
+            f"{r['max']:>8.2f} {r['pages_per_sec']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
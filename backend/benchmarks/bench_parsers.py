@@ -0,0 +1,103 @@
+"""
+Per-page parse time and Python heap allocations of the HTML parser backends
+on saved fixture pages, plus a parity check that every backend extracts the
+same Book objects.
+
+    python -m benchmarks.bench_parsers --rounds 200
+
+The ``legacy`` row is the previous path: chardet over the whole body and a
+BeautifulSoup html.parser tree. Allocation figures come from tracemalloc and
+therefore only cover the Python heap, not lxml's or lexbor's C allocations.
+"""
+import os
+import time
+import argparse
+import tracemalloc
+
+import chardet
+
+from benchmarks.common import percentile
+
+from services.parsers import SoupParser, available_backends, get_parser
+from utils.models import Book
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "books")
+BASE_URL = "https://books.toscrape.com/catalogue/"
+
+# (fixture, page kind, URL the page was served from)
+PAGES = [
+    ("book_detail.html", "book", BASE_URL + "a-light-in-the-attic_1000/index.html"),
+    ("book_detail_latin1.html", "book", BASE_URL + "a-light-in-the-attic_1000/index.html"),
+    ("catalogue_page.html", "listing", BASE_URL + "page-2.html"),
+]
+
+
+class LegacyParser(SoupParser):
+    """chardet over the full body, as BookScraper._get_page used to do"""
+    name = "legacy"
+
+    def _make_soup(self, content: bytes, content_type):
+        encoding = chardet.detect(content)['encoding'] or 'utf-8'
+        return self._soup(content.decode(encoding, errors='replace'), 'html.parser')
+
+
+def _parse(parser, kind: str, content: bytes, url: str):
+    if kind == "book":
+        return parser.parse_book(content, "text/html", url)
+    return parser.parse_listing(content, "text/html", url)
+
+
+def _as_result(kind: str, data):
+    # Compare books the way the scraper stores them
+    return Book(**data) if kind == "book" and data else data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    pages = []
+    for name, kind, url in PAGES:
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            pages.append((name, kind, url, f.read()))
+
+    backends = [LegacyParser()] + [get_parser(name) for name in available_backends()]
+
+    # Parity: every backend must produce exactly what the legacy parser produces
+    mismatches = 0
+    for name, kind, url, content in pages:
+        expected = _as_result(kind, _parse(backends[0], kind, content, url))
+        assert expected, f"Legacy parser found nothing in {name}"
+        for backend in backends[1:]:
+            got = _as_result(kind, _parse(backend, kind, content, url))
+            if got != expected:
+                mismatches += 1
+                print(f"MISMATCH {backend.name} on {name}:\n  expected {expected}\n  got      {got}")
+
+    print(f"{'backend':<12} {'page':<26} {'p50 ms':>8} {'p99 ms':>8} {'alloc KiB':>10}")
+    for backend in backends:
+        for name, kind, url, content in pages:
+            timings = []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                _parse(backend, kind, content, url)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            tracemalloc.start()
+            _parse(backend, kind, content, url)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(
+                f"{backend.name:<12} {name:<26} {percentile(timings, 50):>8.3f} "
+                f"{percentile(timings, 99):>8.3f} {peak / 1024:>10.1f}"
+            )
+
+    print("parity: OK" if not mismatches else f"parity: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
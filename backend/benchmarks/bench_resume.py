@@ -0,0 +1,144 @@
+"""
+Pages fetched when a scrape is killed halfway and started again, with and
+without the crawl checkpoint.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_resume --books 1000 --kill-at 0.5
+
+A clean full scrape of the local stub site gives the baseline number of
+requests. Then a scrape runs in a child process that is SIGKILLed once the
+site served ``--kill-at`` of that baseline, and a second scrape finishes the
+job: without a checkpoint it starts over from index.html, with one it
+resumes. Last, the same happens to a whole job worker: a second worker
+claims the dead worker's job once the scrape lock expired and resumes it.
+Each run must publish the whole catalogue. Needs a real Redis, shared with
+the child process.
+"""
+import os
+import time
+import signal
+import asyncio
+import argparse
+import multiprocessing
+
+from benchmarks.common import ServerThread, use_local_redis
+from benchmarks.stubs import BooksSite
+
+from core.config import settings
+from services.jobs import DONE, JobQueue, ScrapeWorker
+from services.scrape_book import BookScraper
+from utils.models import BookRepository, RedisManager
+
+
+def configure(books: int, site_url: str) -> None:
+    settings.book_base_url = site_url
+    settings.max_books = books
+    settings.min_books = books
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 100
+    settings.per_host_concurrency = 8
+    settings.parse_workers = 0
+    settings.catalogue_gc_delay = 0.1
+    settings.scrape_if_empty = False
+    settings.scrape_lock_ttl = 2
+    settings.job_progress_interval = 0.2
+
+
+def _child(books: int, site_url: str, checkpoint, worker: bool) -> None:
+    use_local_redis()
+    configure(books, site_url)
+    if worker:
+        asyncio.run(ScrapeWorker(name="doomed").run())
+    else:
+        asyncio.run(BookScraper().scrape(incremental=False, checkpoint=checkpoint))
+
+
+def run_and_kill(site: BooksSite, books: int, site_url: str, kill_at: int, checkpoint=None, worker=False) -> int:
+    """Run a scrape (or a worker) in a child process and SIGKILL it after `kill_at` requests"""
+    process = multiprocessing.get_context("spawn").Process(target=_child, args=(books, site_url, checkpoint, worker))
+    process.start()
+    while site.requests < kill_at and process.is_alive():
+        time.sleep(0.001)
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+    return site.requests
+
+
+async def published_books() -> int:
+    return await BookRepository().count_books()
+
+
+async def scrape(checkpoint=None) -> None:
+    scraper = BookScraper()
+    await scraper.scrape(incremental=False, checkpoint=checkpoint)
+    if scraper.gc_task:
+        await scraper.gc_task
+
+
+async def worker_scenario(site: BooksSite, books: int, site_url: str, kill_at: int) -> dict:
+    job_id, _ = await JobQueue().enqueue(incremental=False)
+    before = await asyncio.to_thread(run_and_kill, site, books, site_url, kill_at, None, True)
+    worker = ScrapeWorker(name="survivor")
+    task = asyncio.create_task(worker.run())
+    started = time.perf_counter()
+    while (job := await JobQueue().get(job_id))["status"] != DONE:
+        await asyncio.sleep(0.05)
+    worker.stop()
+    await task
+    return {"killed_after": before, "job": job, "recovery_s": time.perf_counter() - started}
+
+
+async def scenario(site: BooksSite, books: int, site_url: str, kill_fraction: float) -> list:
+    redis = RedisManager().client
+    rows = []
+
+    await redis.flushdb()
+    site.reset_counters()
+    await scrape()
+    baseline = site.requests
+    assert await published_books() == books, "the clean scrape is incomplete"
+    rows.append({"case": "clean scrape", "killed_after": 0, "requests": baseline, "books": books})
+    kill_at = int(baseline * kill_fraction)
+
+    for case, checkpoint in (("restart", None), ("resume", "bench")):
+        await redis.flushdb()
+        site.reset_counters()
+        killed_after = await asyncio.to_thread(run_and_kill, site, books, site_url, kill_at, checkpoint)
+        await scrape(checkpoint)
+        rows.append({"case": f"kill + {case}", "killed_after": killed_after, "requests": site.requests,
+                     "books": await published_books()})
+
+    await redis.flushdb()
+    site.reset_counters()
+    result = await worker_scenario(site, books, site_url, kill_at)
+    rows.append({"case": "kill worker", "killed_after": result["killed_after"], "requests": site.requests,
+                 "books": await published_books(), "resumes": result["job"]["resumes"]})
+
+    for row in rows:
+        row["extra"] = row["requests"] - baseline
+        assert row["books"] == books, f"{row['case']} published {row['books']} of {books} books"
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--kill-at", type=float, default=0.5, help="Fraction of the clean scrape's requests served before the kill")
+    parser.add_argument("--latency", type=float, default=0.002)
+    args = parser.parse_args()
+    if not os.environ.get("BENCH_REDIS_URL"):
+        parser.error("set BENCH_REDIS_URL to a real Redis database, the child process shares it")
+
+    site = BooksSite(books=args.books, latency=args.latency)
+    use_local_redis()
+    with ServerThread(site) as server:
+        configure(args.books, server.url)
+        rows = asyncio.run(scenario(site, args.books, server.url, args.kill_at))
+
+    print(f"{'case':<16} {'killed after':>13} {'requests':>9} {'extra':>6} {'books':>6} {'job resumes':>12}")
+    for r in rows:
+        print(f"{r['case']:<16} {r['killed_after']:>13} {r['requests']:>9} {r['extra']:>6} {r['books']:>6} {r.get('resumes', '-'):>12}")
+
+
+if __name__ == "__main__":
+    main()
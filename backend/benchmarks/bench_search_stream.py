@@ -0,0 +1,96 @@
+"""
+Time to first byte, total time and API peak memory of a search returning the
+whole catalogue, buffered into one JSON response versus streamed as NDJSON.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_search_stream --books 1000000
+
+Each mode gets a fresh API process (benchmarks.stream_app under uvicorn), so
+its peak RSS (VmHWM) covers that one request; ``peak - idle`` is the memory
+the request itself needed. The catalogue is seeded once and reused by later
+runs seeded with the same ``--books``. Needs a real Redis shared with
+the API process.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import ServerProcess, seed_books, use_local_redis
+
+from utils.models import BookRepository
+
+
+def _memory_kib(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def run(mode: str, timeout: float) -> dict:
+    path = "/bench/buffered" if mode == "buffered" else "/books/search?stream=true"
+    with ServerProcess("benchmarks.stream_app:app") as server:
+        pid = server.process.pid
+        with httpx.Client(base_url=server.url.rstrip("/"), timeout=timeout) as client:
+            # Warm up imports and connections on a one-book page
+            client.get("/books/search", params={"limit": 1}).raise_for_status()
+            idle = _memory_kib(pid, "VmRSS")
+
+            received, lines, ttfb = 0, 0, None
+            started = time.perf_counter()
+            with client.stream("GET", path) as response:
+                response.raise_for_status()
+                for chunk in response.iter_raw():
+                    if ttfb is None:
+                        ttfb = time.perf_counter() - started
+                    received += len(chunk)
+                    lines += chunk.count(b"\n")
+            elapsed = time.perf_counter() - started
+            peak = _memory_kib(pid, "VmHWM")
+
+    return {
+        "mode": mode,
+        "ttfb": ttfb or elapsed,
+        "seconds": elapsed,
+        "mbytes": received / 2**20,
+        "lines": lines,
+        "idle_mb": idle / 1024,
+        "peak_mb": peak / 1024,
+    }
+
+
+async def prepare(count: int) -> None:
+    redis = BookRepository().redis
+    # Synthetic books may share an ID, so the seeded count is recorded
+    if await redis.get("bench:stream:seeded") != str(count):
+        await seed_books(count)
+        await redis.set("bench:stream:seeded", count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1000000)
+    parser.add_argument("--modes", default="streaming,buffered")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    if not os.environ.get("BENCH_REDIS_URL"):
+        sys.exit("BENCH_REDIS_URL must point at a Redis the API process can share")
+    use_local_redis()
+    asyncio.run(prepare(args.books))
+
+    rows = [run(mode, args.timeout) for mode in args.modes.split(",")]
+    print(f"{'mode':<10} {'TTFB ms':>9} {'seconds':>8} {'MiB':>7} {'NDJSON lines':>13} {'idle MiB':>9} {'peak MiB':>9} {'peak-idle':>10}")
+    for r in rows:
+        print(
+            f"{r['mode']:<10} {r['ttfb'] * 1000:>9.1f} {r['seconds']:>8.2f} {r['mbytes']:>7.1f} {r['lines']:>13} "
+            f"{r['idle_mb']:>9.1f} {r['peak_mb']:>9.1f} {r['peak_mb'] - r['idle_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Selenium headline extraction with per-row element lookups (the previous
+behaviour) versus one ``execute_script`` round trip per page, against the
+fake WebDriver endpoint.
+
+    python -m benchmarks.bench_selenium_extraction --calls 20 --command-latency 0.005
+
+Both modes lease from the same warm pool, so the difference is the number of
+WebDriver commands issued per page. Titles, URLs and scores must match.
+"""
+import time
+import argparse
+
+from benchmarks.common import ServerThread, percentile
+from benchmarks.fake_webdriver import FakeWebDriver
+
+from core.config import settings
+from services.scrape_hn import HackerNewsScraper
+from services.webdriver_pool import WebDriverPool
+
+MODES = ("elements", "script")
+
+
+def run(mode: str, pool: WebDriverPool, fake: FakeWebDriver, calls: int, pages: int) -> dict:
+    settings.hnews_selenium_extraction = mode
+    fake.reset_counters()
+    timings = []
+    stories = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        stories = HackerNewsScraper(pool=pool).fetch_top_stories(pages)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert len(stories) == pages * 30, f"expected {pages * 30} stories, got {len(stories)}"
+
+    return {
+        "mode": mode,
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+        "commands_per_page": fake.total_commands / (calls * pages),
+        "stories": stories,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20, help="fetch_top_stories calls per mode")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--command-latency", type=float, default=0.005, help="Fake per-command latency (s)")
+    args = parser.parse_args()
+
+    fake = FakeWebDriver(session_startup=0.0, command_latency=args.command_latency)
+    settings.hnews_site_url = "https://news.ycombinator.com/news"
+
+    with ServerThread(fake) as server:
+        settings.selenium_command_executor = server.url + "wd/hub"
+        pool = WebDriverPool(HackerNewsScraper._create_driver_instance, size=2, max_uses=1000, acquire_timeout=60)
+        pool.warm(2)
+        try:
+            results = [run(mode, pool, fake, args.calls, args.pages) for mode in MODES]
+        finally:
+            pool.close()
+
+    key = lambda story: (story["title"], story["url"], story["score"])
+    baseline = sorted(map(key, results[0]["stories"]))
+    for result in results[1:]:
+        assert sorted(map(key, result["stories"])) == baseline, f"{result['mode']} output differs from elements"
+    print("parity: title/url/score identical across modes")
+
+    print(f"{'mode':<9} {'p50 ms':>8} {'p99 ms':>8} {'cmds/page':>10}")
+    for r in results:
+        print(f"{r['mode']:<9} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['commands_per_page']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Throughput and CPU cost of /books/search responses serialized through the
+validated response models versus FAST_JSON_RESPONSES.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_serialization --sizes 100,10000,100000
+
+For each catalogue size the synthetic books are stored as JSON, then the same
+searches are sent through the ASGI app in process (no sockets),
+``--concurrency`` at a time, with the catalogue cache off (every request
+reads Redis) and on (every request is a hit, leaving serialization as the
+main cost). CPU per request is the process time of the whole benchmark
+process over the requests, so it includes the in-process client; the
+difference between modes is the server side saving. Both modes must return
+the same documents.
+"""
+import time
+import asyncio
+import argparse
+import itertools
+
+import httpx
+
+from benchmarks.common import seed_books, use_local_redis
+
+import main
+from core.config import settings
+from services import catalogue_cache
+from utils import fast_json
+
+MODES = (("validated", False), ("fast", True))
+
+
+def searches(limit: int) -> list:
+    return [
+        {"limit": limit},
+        {"limit": limit, "category": "science"},
+        {"limit": limit, "category": "science,history", "max_price": 40},
+        {"limit": limit, "q": "kaka"},
+        {"limit": limit, "sort": "title", "offset": limit},
+        {"limit": limit, "sort": "price", "order": "desc"},
+    ]
+
+
+async def reset_cache(books: int) -> None:
+    await catalogue_cache.shutdown_catalogue_cache()
+    settings.catalogue_cache_books = books
+    cache = catalogue_cache.get_catalogue_cache()
+    if cache.enabled:
+        # Let the watcher subscribe before measuring
+        await cache.get_categories()
+        while not cache.metrics()["live"]:
+            await asyncio.sleep(0.01)
+
+
+async def documents(client: httpx.AsyncClient, requests: list) -> list:
+    """Responses to `requests`, books keyed by ID so field order does not matter"""
+    result = []
+    for params in requests:
+        body = (await client.get("/books/search", params=params)).json()
+        body["books"] = {book["id"]: book for book in body["books"]}
+        result.append(body)
+    return result
+
+
+async def throughput(client: httpx.AsyncClient, requests: list, count: int, concurrency: int) -> dict:
+    pending = itertools.islice(itertools.cycle(requests), count)
+
+    async def worker():
+        for params in pending:
+            response = await client.get("/books/search", params=params)
+            response.raise_for_status()
+
+    # Warm up, then measure
+    for params in requests:
+        await client.get("/books/search", params=params)
+    cpu, started = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu
+    return {"rate": count / elapsed, "cpu_ms": cpu / count * 1000}
+
+
+async def scenario(sizes: list, count: int, concurrency: int, limit: int, cache_books: int) -> list:
+    requests = searches(limit)
+    transport = httpx.ASGITransport(app=main.app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        for size in sizes:
+            await seed_books(size)
+            for cache_label, cache_size in (("off", 0), ("on", cache_books)):
+                await reset_cache(cache_size)
+                expected = None
+                for label, fast in MODES:
+                    settings.fast_json_responses = fast
+                    got = await documents(client, requests)
+                    assert expected is None or got == expected, f"{label} responses differ at {size} books"
+                    expected = got
+                    rows.append({
+                        "books": size, "cache": cache_label, "mode": label,
+                        **await throughput(client, requests, count, concurrency)
+                    })
+        await catalogue_cache.shutdown_catalogue_cache()
+    return rows
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000", help="Comma separated catalogue sizes")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50, help="Page size of the searches")
+    parser.add_argument("--cache-books", type=int, default=20000)
+    args = parser.parse_args()
+
+    use_local_redis()
+    settings.book_storage = "json"
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rows = asyncio.run(scenario(sizes, args.requests, args.concurrency, args.limit, args.cache_books))
+
+    print(f"encoder: {'orjson' if fast_json.orjson else 'json'}, page size {args.limit}")
+    print(f"{'books':>7} {'cache':<6} {'mode':<10} {'req/s':>8} {'CPU ms/req':>11}")
+    for r in rows:
+        print(f"{r['books']:>7} {r['cache']:<6} {r['mode']:<10} {r['rate']:>8.0f} {r['cpu_ms']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main_()
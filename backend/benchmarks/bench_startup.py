@@ -0,0 +1,148 @@
+"""
+Cold start of an API worker: what importing ``main`` costs, module by
+module, and how long a fresh uvicorn process takes to answer its first
+requests.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_startup --runs 5
+
+Every run is a new interpreter, as when uvicorn workers are autoscaled.
+The import report comes from ``python -X importtime -c "import main"``:
+the total, the modules ``main`` imports directly ranked by cumulative time,
+and whether the scraping stack (selenium, lxml, chardet, bs4, httpx) was
+loaded. The boot report starts ``uvicorn main:app`` and times its first
+``GET /books/categories`` (startup included), the first ``GET /headlines``
+that follows, from the stub Hacker News, and a graceful shutdown. Boot
+needs a real Redis in BENCH_REDIS_URL, the worker being another process;
+without one only the imports are reported.
+"""
+import os
+import sys
+import time
+import signal
+import asyncio
+import statistics
+import argparse
+import subprocess
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+
+from benchmarks.common import APP_DIR, ServerThread, _free_port, seed_books, use_local_redis
+from benchmarks.stubs import HackerNewsSite
+
+HEAVY = ("selenium", "lxml", "chardet", "bs4", "httpx")
+
+
+def import_profile() -> dict:
+    """One ``import main`` in a new interpreter: total and per direct import, microseconds"""
+    script = f"import main, sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    # A module is listed after the modules it imports, one indent deeper
+    children, modules, total = {}, {}, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name.strip() == "main":
+                modules, total = children, int(cumulative)
+            children = {}
+    return {"total": total, "modules": modules, "loaded": result.stdout.strip()}
+
+
+def redis_env() -> dict:
+    url = urlsplit(os.environ["BENCH_REDIS_URL"])
+    return {
+        "REDIS_HOST": url.hostname or "127.0.0.1",
+        "REDIS_PORT": str(url.port or 6379),
+        "REDIS_DB": url.path.strip("/") or "0",
+    }
+
+
+def boot(hn_url: str) -> dict:
+    """Start a uvicorn worker, time its first requests and its shutdown, seconds"""
+    port = _free_port()
+    env = {
+        **os.environ, **redis_env(),
+        "HNEWS_BACKEND": "http", "HNEWS_SELENIUM_FALLBACK": "false", "HNEWS_SITE_URL": hn_url,
+    }
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                try:
+                    client.get("/books/categories").raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if process.poll() is not None:
+                        raise RuntimeError("API did not start")
+                    time.sleep(0.005)
+            first_request = time.perf_counter() - started
+            headlines_started = time.perf_counter()
+            client.get("/headlines").raise_for_status()
+            first_headlines = time.perf_counter() - headlines_started
+        stopping = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        code = process.wait(timeout=30)
+        return {
+            "first_request": first_request,
+            "first_headlines": first_headlines,
+            "shutdown": time.perf_counter() - stopping,
+            "clean": code == 0,
+        }
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Direct imports of main listed")
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    by_module = defaultdict(list)
+    for profile in profiles:
+        for name, cumulative in profile["modules"].items():
+            by_module[name].append(cumulative)
+    print(f"import main: median {statistics.median(p['total'] for p in profiles) / 1000:.1f} ms over {args.runs} runs")
+    print(f"scraping modules loaded: {profiles[0]['loaded'] or 'none'}")
+    print(f"{'direct import':<32} {'cumulative ms':>13}")
+    ranked = sorted(by_module.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, values in ranked[:args.top]:
+        print(f"{name:<32} {statistics.median(values) / 1000:>13.1f}")
+
+    if not os.environ.get("BENCH_REDIS_URL"):
+        print("set BENCH_REDIS_URL to a real Redis database to time the worker boot")
+        return
+    use_local_redis()
+    asyncio.run(seed_books(100))
+    with ServerThread(HackerNewsSite()) as server:
+        rows = [boot(server.url + "news") for _ in range(args.runs)]
+
+    print(f"{'uvicorn worker':<32} {'median ms':>9} {'max ms':>8}")
+    for key, label in (
+        ("first_request", "start to first /books/categories"),
+        ("first_headlines", "first /headlines"),
+        ("shutdown", "SIGTERM to exit"),
+    ):
+        values = [row[key] * 1000 for row in rows]
+        print(f"{label:<32} {statistics.median(values):>9.1f} {max(values):>8.1f}")
+    print(f"clean exits: {sum(row['clean'] for row in rows)}/{len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
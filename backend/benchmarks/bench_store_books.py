@@ -0,0 +1,107 @@
+"""
+Round trips and ingest rate of the book write path: the previous per-command
+``store_book`` (EXISTS, then one executed pipeline per SET/SADD/ZADD), the
+single-script ``store_book`` and the batched ``store_books``.
+
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.bench_store_books --books 100000
+
+Round trips are counted as packed writes on the Redis connection. Modes that
+make one round trip per command run on ``--slow-books`` books (rates are per
+book, so they compare directly). Each batch costs two round trips: the
+pipeline's SCRIPT EXISTS check and the pipeline itself.
+"""
+import time
+import asyncio
+import argparse
+
+from redis.asyncio.connection import Connection
+
+from benchmarks.common import synthetic_book, use_local_redis
+
+from utils.models import Book, BookRepository, sort_index_entries, title_index_entries
+
+_round_trips = 0
+_send_packed_command = Connection.send_packed_command
+
+
+async def _counting_send(self, command, check_health=True):
+    global _round_trips
+    _round_trips += 1
+    return await _send_packed_command(self, command, check_health)
+
+
+Connection.send_packed_command = _counting_send
+
+
+async def per_command_store_book(repository: BookRepository, book: Book) -> str:
+    """store_book as it was before the script: EXISTS, then one round trip per command"""
+    book.id = book.generate_id()
+    book_key = f'book:{book.id}'
+    if await repository.redis.exists(book_key):
+        return book.id
+    async with repository.redis.pipeline() as pipe:
+        await pipe.set(book_key, book.model_dump_json()).execute()
+        await pipe.sadd(f"category:{book.category.lower()}", book_key).execute()
+        await pipe.sadd("categories", book.category.lower()).execute()
+        await pipe.sadd("books:all", book_key).execute()
+        for index, mapping in sort_index_entries(book_key, book) + title_index_entries(book_key, book):
+            await pipe.zadd(index, mapping).execute()
+    return book.id
+
+
+async def run(mode: str, count: int, batch_size: int) -> dict:
+    global _round_trips
+    repository = BookRepository()
+    await repository.redis.flushdb()
+    books = [Book(**synthetic_book(index)) for index in range(count)]
+
+    _round_trips = 0
+    started = time.perf_counter()
+    if mode == "per-command":
+        for book in books:
+            await per_command_store_book(repository, book)
+    elif mode == "script":
+        for book in books:
+            await repository.store_book(book)
+    else:
+        await repository.store_books(books, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode if mode != "batched" else f"batched/{batch_size}",
+        "books": count,
+        "stored": await repository.redis.scard("books:all"),
+        "round_trips": _round_trips,
+        "per_book": _round_trips / count,
+        "rate": count / elapsed,
+    }
+
+
+async def scenario(books: int, slow_books: int, batch_sizes: list) -> list:
+    rows = [await run("per-command", slow_books, 0), await run("script", slow_books, 0)]
+    for batch_size in batch_sizes:
+        rows.append(await run("batched", books, batch_size))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--slow-books", type=int, default=10000, help="Books for the one-round-trip-per-call modes")
+    parser.add_argument("--batch-sizes", default="100,500,2000")
+    args = parser.parse_args()
+
+    use_local_redis()
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    rows = asyncio.run(scenario(args.books, args.slow_books, batch_sizes))
+
+    print(f"{'mode':<14} {'books':>7} {'stored':>7} {'round trips':>12} {'RT/book':>8} {'books/s':>9}")
+    for r in rows:
+        print(
+            f"{r['mode']:<14} {r['books']:>7} {r['stored']:>7} {r['round_trips']:>12} "
+            f"{r['per_book']:>8.3f} {r['rate']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
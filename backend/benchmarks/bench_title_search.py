@@ -0,0 +1,90 @@
+"""
+Title search through the Redis inverted index versus a naive substring scan
+over every stored book.
+
+    python -m benchmarks.bench_title_search --sizes 10000,100000,1000000 --queries 20
+
+Queries mix rare and common words, multi-term AND queries, a trailing prefix
+and a query combined with category/price filters. Uses BENCH_REDIS_URL when
+set (recommended for large sizes) or fakeredis. The scan is skipped above
+``--scan-max`` books.
+"""
+import json
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import percentile, seed_books, use_local_redis
+
+from utils.models import BookRepository
+
+# (name, query, filters)
+CASES = [
+    ("rare word", "brivor", {}),
+    ("common word", "kaka", {}),
+    ("two words", "kalo kami", {}),
+    ("prefix", "kaka kalin", {}),
+    ("filtered", "kami", {"categories": ["science"], "max_price": 30}),
+]
+
+
+async def substring_scan(repository: BookRepository, query: str, limit: int, categories=None, max_price=None) -> list:
+    """Fetch every book and keep titles containing every query word"""
+    words = query.lower().split()
+    keys = list(await repository.redis.smembers("books:all"))
+    matches = []
+    for start in range(0, len(keys), 10000):
+        for raw in await repository.redis.mget(keys[start:start + 10000]):
+            if not raw:
+                continue
+            book = json.loads(raw)
+            title = book["title"].lower()
+            if all(word in title for word in words) \
+                    and (not categories or book["category"].lower() in categories) \
+                    and (max_price is None or book["price"] <= max_price):
+                matches.append(book)
+    return matches[:limit]
+
+
+async def measure(call, queries: int) -> dict:
+    timings = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"p50": percentile(timings, 50), "p99": percentile(timings, 99)}
+
+
+async def scenario(sizes: list, queries: int, limit: int, scan_max: int) -> list:
+    repository = BookRepository()
+    rows = []
+    for size in sizes:
+        await seed_books(size)
+        for name, query, filters in CASES:
+            _, total = await repository.get_books(query=query, limit=limit, **filters)
+            if size <= scan_max:
+                scan = await measure(lambda: substring_scan(repository, query, limit, **filters), max(1, queries // 10))
+                rows.append({"size": size, "case": name, "path": "scan", "matches": total, **scan})
+            indexed = await measure(lambda: repository.get_books(query=query, limit=limit, **filters), queries)
+            rows.append({"size": size, "case": name, "path": "index", "matches": total, **indexed})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10, help="Top-k results per query")
+    parser.add_argument("--scan-max", type=int, default=100000)
+    args = parser.parse_args()
+
+    use_local_redis()
+    rows = asyncio.run(scenario([int(size) for size in args.sizes.split(",")], args.queries, args.limit, args.scan_max))
+
+    print(f"{'books':>8} {'case':<12} {'path':<6} {'matches':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in rows:
+        print(f"{r['size']:>8} {r['case']:<12} {r['path']:<6} {r['matches']:>8} {r['p50']:>9.2f} {r['p99']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Selenium headline latency with a session per page (the previous behaviour)
+versus the warm WebDriver pool, against the fake WebDriver endpoint.
+
+    python -m benchmarks.bench_webdriver_pool --calls 20 --session-startup 0.5
+
+The per-page mode is a pool with max_uses=1 and no warm sessions, which
+creates and quits a session for every page exactly like the old
+``_scrape_page`` did.
+"""
+import time
+import argparse
+
+from benchmarks.common import ServerThread, percentile
+from benchmarks.fake_webdriver import FakeWebDriver
+
+from core.config import settings
+from services.scrape_hn import HackerNewsScraper
+from services.webdriver_pool import WebDriverPool
+
+
+def run(mode: str, fake: FakeWebDriver, calls: int, pages: int, size: int) -> dict:
+    fake.reset_counters()
+    if mode == "per-page":
+        pool = WebDriverPool(HackerNewsScraper._create_driver_instance, size=size, max_uses=1, acquire_timeout=60)
+    else:
+        pool = WebDriverPool(HackerNewsScraper._create_driver_instance, size=size, max_uses=1000, acquire_timeout=60)
+        pool.warm(size)
+
+    timings = []
+    try:
+        for _ in range(calls):
+            started = time.perf_counter()
+            stories = HackerNewsScraper(pool=pool).fetch_top_stories(pages)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert len(stories) == pages * 30, f"expected {pages * 30} stories, got {len(stories)}"
+    finally:
+        metrics = pool.metrics()
+        pool.close()
+
+    return {
+        "mode": mode,
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+        "sessions": fake.sessions_created,
+        "commands_per_call": fake.total_commands / calls,
+        "avg_acquire_wait_ms": metrics["avg_acquire_wait_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20, help="fetch_top_stories calls per mode")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--size", type=int, default=2, help="Pool size")
+    parser.add_argument("--session-startup", type=float, default=0.5, help="Fake session creation cost (s)")
+    parser.add_argument("--command-latency", type=float, default=0.001, help="Fake per-command latency (s)")
+    args = parser.parse_args()
+
+    fake = FakeWebDriver(session_startup=args.session_startup, command_latency=args.command_latency)
+    settings.webdriver_pool_size = args.size
+    settings.hnews_site_url = "https://news.ycombinator.com/news"
+
+    with ServerThread(fake) as server:
+        settings.selenium_command_executor = server.url + "wd/hub"
+        results = [run(mode, fake, args.calls, args.pages, args.size) for mode in ("per-page", "pooled")]
+
+    print(f"{'mode':<9} {'p50 ms':>8} {'p99 ms':>8} {'sessions':>9} {'cmds/call':>10} {'acq wait ms':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<9} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['sessions']:>9} "
+            f"{r['commands_per_call']:>10.1f} {r['avg_acquire_wait_ms']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Shared helpers for the offline benchmarks.
+
+Benchmarks are run from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.bench_crawl --books 2000
+
+They never touch the live sites or the Docker Redis: scrapers are pointed at
+local stub servers and the repository at ``BENCH_REDIS_URL`` when set, or an
+in-process fakeredis otherwise.
+"""
+import os
+import sys
+import time
+import random
+import socket
+import logging
+import threading
+import multiprocessing
+from typing import Optional, Sequence
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# Per-page INFO logging would dominate the timings
+logging.disable(logging.INFO)
+
+
+def use_local_redis():
+    """Point RedisManager at BENCH_REDIS_URL, or at an in-process fakeredis"""
+    from redis.asyncio import Redis
+    from utils.models import RedisManager
+
+    url = os.environ.get("BENCH_REDIS_URL")
+    if url:
+        client = Redis.from_url(url, decode_responses=True)
+        raw_client = Redis.from_url(url, decode_responses=False)
+    else:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        raw_client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=False)
+    RedisManager()._redis_client = client
+    RedisManager()._raw_client = raw_client
+    return client
+
+
+CATEGORIES = [
+    "fiction", "mystery", "science", "history", "poetry", "travel", "romance", "fantasy",
+    "horror", "music", "philosophy", "religion", "science fiction", "sequential art", "young adult",
+    "nonfiction", "business", "classics", "default", "childrens",
+]
+
+SYLLABLES = [
+    "ka", "lo", "mi", "ra", "ten", "vor", "qui", "sel", "dan", "bri", "mo", "zu",
+    "ar", "el", "tis", "nor", "pa", "gre", "sha", "lin", "do", "ve", "ros", "cal",
+]
+VOCABULARY = [a + b for a in SYLLABLES for b in SYLLABLES] + [a + b + c for a in SYLLABLES[:12] for b in SYLLABLES for c in SYLLABLES[:12]]
+
+
+def _word(rng: random.Random) -> str:
+    # Log-uniform ranks give a Zipf-like mix of very common and rare words
+    return VOCABULARY[int(len(VOCABULARY) ** rng.random()) - 1]
+
+
+def synthetic_book(index: int) -> dict:
+    """Deterministic book record number `index` for seeding benchmarks"""
+    rng = random.Random(index)
+    return {
+        "title": " ".join(_word(rng) for _ in range(2 + index % 4)).title(),
+        "category": CATEGORIES[index % len(CATEGORIES)].title(),
+        "price": round(10 + (index * 7919 % 5000) / 100, 2),
+        "image_url": f"https://books.example/media/{index}.jpg",
+    }
+
+
+async def seed_books(count: int, batch_size: int = 5000) -> None:
+    """Store `count` synthetic books through BookRepository.store_books"""
+    from utils.models import Book, BookRepository
+
+    repository = BookRepository()
+    await repository.redis.flushdb()
+    await repository.store_books((Book(**synthetic_book(index)) for index in range(count)), batch_size=batch_size)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a sequence (0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """Run an ASGI app under uvicorn in a background thread with its own event loop"""
+
+    def __init__(self, app, port: Optional[int] = None):
+        import uvicorn
+
+        self.port = port or _free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off"
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def __enter__(self) -> "ServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+
+def _serve(app, port: int) -> None:
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+
+
+class ServerProcess:
+    """
+    Run an ASGI app under uvicorn in a separate process.
+
+    Use it instead of ServerThread when the stub must not compete with the
+    code under test for the GIL. Counters on the app object stay in the child.
+    """
+
+    def __init__(self, app, port: Optional[int] = None):
+        self.port = port or _free_port()
+        self.process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(app, self.port), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def __enter__(self) -> "ServerProcess":
+        self.process.start()
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return self
+            except OSError:
+                if time.monotonic() > deadline or not self.process.is_alive():
+                    raise RuntimeError("Stub server did not start")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc) -> None:
+        self.process.terminate()
+        self.process.join(timeout=10)
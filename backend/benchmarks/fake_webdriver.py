@@ -0,0 +1,283 @@
+"""
+A minimal W3C WebDriver endpoint for benchmarks, so the Selenium paths run
+without Chrome or a Selenium hub.
+
+It implements the commands the Hacker News scraper issues (new/delete
+session, timeouts, navigate, title, find element(s) by CSS or XPath, element
+text, Selenium's getAttribute atom, the scraper's batch story extraction
+script and ``execute/sync``) on top of lxml, with
+a configurable session start-up cost and per-command latency. Every command
+is counted so benchmarks can report round trips. CSS selectors are limited
+to the compound ones the scraper uses (``td.title a``), translated to XPath,
+so lxml needs no cssselect.
+"""
+import re
+import json
+import uuid
+import asyncio
+import itertools
+from collections import Counter
+from urllib.parse import parse_qs, urljoin, urlsplit
+from typing import Callable, Dict, Optional
+
+from lxml import etree, html
+
+from benchmarks.stubs import hn_page_html
+
+from services.parsers import xpath_has_class
+from services.scrape_hn import EXTRACT_STORIES_MARKER
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# One compound selector of a descendant chain: tag, classes and id, in any order
+_CSS_STEP = re.compile(r"([a-zA-Z][\w-]*|\*)?((?:[.#][\w-]+)*)$")
+_CSS_PART = re.compile(r"([.#])([\w-]+)")
+
+
+def css_to_xpath(selector: str) -> str:
+    """XPath of a descendant chain of compound CSS selectors, relative to the element searched"""
+    steps = []
+    for step in selector.split():
+        match = _CSS_STEP.match(step)
+        if match is None or not (match.group(1) or match.group(2)):
+            raise WebDriverError(400, "invalid selector", f"Unsupported CSS selector {selector}")
+        predicates = "".join(
+            f"[{xpath_has_class(name)}]" if kind == "." else f"[@id='{name}']"
+            for kind, name in _CSS_PART.findall(match.group(2))
+        )
+        steps.append(f"{match.group(1) or '*'}{predicates}")
+    if not steps:
+        raise WebDriverError(400, "invalid selector", "Empty CSS selector")
+    return ".//" + "//".join(steps)
+
+
+def css_select(root, selector: str) -> list:
+    return root.xpath(css_to_xpath(selector))
+
+
+def hn_pages(url: str) -> str:
+    """Default page source: the synthetic Hacker News listing for ?p=N"""
+    page = parse_qs(urlsplit(url).query).get("p", ["1"])[0]
+    return hn_page_html(int(page) if page.isdigit() else 1)
+
+
+class _Session:
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.url = "about:blank"
+        self.tree = None
+        self.elements: Dict[str, etree._Element] = {}
+        self._ids = itertools.count()
+
+    def ref(self, element) -> dict:
+        element_id = f"{self.id}-{next(self._ids)}"
+        self.elements[element_id] = element
+        return {ELEMENT_KEY: element_id}
+
+
+class WebDriverError(Exception):
+    def __init__(self, status: int, error: str, message: str):
+        self.status = status
+        self.error = error
+        self.message = message
+
+
+class FakeWebDriver:
+    """ASGI app speaking enough of the W3C WebDriver protocol for the scrapers"""
+
+    def __init__(
+        self,
+        pages: Callable[[str], str] = hn_pages,
+        session_startup: float = 0.3,
+        command_latency: float = 0.001,
+        script_handler: Optional[Callable[["_Session", str, list], object]] = None
+    ):
+        self.pages = pages
+        self.session_startup = session_startup
+        self.command_latency = command_latency
+        self.script_handler = script_handler
+        self.sessions: Dict[str, _Session] = {}
+        self.sessions_created = 0
+        self.commands: Counter = Counter()
+
+    @property
+    def total_commands(self) -> int:
+        return sum(self.commands.values())
+
+    def reset_counters(self) -> None:
+        self.commands = Counter()
+        self.sessions_created = 0
+
+    # Element helpers
+
+    def _find(self, session: _Session, root, using: str, value: str) -> list:
+        if root is None:
+            raise WebDriverError(404, "no such element", "No document loaded")
+        if using == "css selector":
+            return css_select(root, value)
+        if using == "xpath":
+            return [node for node in root.xpath(value) if isinstance(node, etree._Element)]
+        raise WebDriverError(400, "invalid argument", f"Unsupported locator strategy {using}")
+
+    def _element(self, session: _Session, element_id: str):
+        element = session.elements.get(element_id)
+        if element is None:
+            raise WebDriverError(404, "stale element reference", element_id)
+        return element
+
+    def _attribute(self, session: _Session, element, name: str):
+        value = element.get(name)
+        if value is not None and name in ("href", "src"):
+            # Like the browser property: fully resolved
+            return urljoin(session.url, value)
+        return value
+
+    @staticmethod
+    def _text(element) -> str:
+        return " ".join("".join(element.itertext()).split())
+
+    def _extract_stories(self, session: _Session) -> list:
+        """What EXTRACT_STORIES_JS returns in a browser, computed with lxml"""
+        if session.tree is None:
+            return []
+
+        def first_text(root, selector):
+            found = css_select(root, selector) if root is not None else []
+            return "".join(found[0].itertext()) if found else ""
+
+        items = []
+        for row in css_select(session.tree, "tr.athing"):
+            links = css_select(row, "td.title a")
+            if not links:
+                items.append(None)
+                continue
+            sub = row.getnext()
+            comments = ""
+            for link in reversed(css_select(sub, "a") if sub is not None else []):
+                text = "".join(link.itertext())
+                if "comment" in text or "discuss" in text:
+                    comments = text
+                    break
+            items.append({
+                "title": "".join(links[0].itertext()),
+                "url": self._attribute(session, links[0], "href") or "",
+                "score": first_text(sub, "span.score"),
+                "rank": first_text(row, "span.rank"),
+                "age": first_text(sub, "span.age"),
+                "comments": comments,
+            })
+        return items
+
+    def _unwrap(self, session: _Session, value):
+        if isinstance(value, dict) and ELEMENT_KEY in value:
+            return self._element(session, value[ELEMENT_KEY])
+        if isinstance(value, list):
+            return [self._unwrap(session, item) for item in value]
+        return value
+
+    def _execute(self, session: _Session, script: str, args: list):
+        args = self._unwrap(session, args)
+        if script.startswith("/* getAttribute */"):
+            return self._attribute(session, args[0], args[1])
+        if script.startswith(EXTRACT_STORIES_MARKER):
+            return self._extract_stories(session)
+        if self.script_handler is not None:
+            return self.script_handler(session, script, args)
+        if script.strip() in ("return 1", "return 1;"):
+            return 1
+        raise WebDriverError(500, "javascript error", "Script not supported by the fake WebDriver")
+
+    # Routing
+
+    async def _handle(self, method: str, parts: list, body: dict):
+        if parts == ["status"]:
+            return {"ready": True, "message": "fake"}
+        if parts == ["session"] and method == "POST":
+            if self.session_startup > 0:
+                await asyncio.sleep(self.session_startup)
+            session = _Session(uuid.uuid4().hex)
+            self.sessions[session.id] = session
+            self.sessions_created += 1
+            return {"sessionId": session.id, "capabilities": {
+                "browserName": "chrome", "browserVersion": "fake", "platformName": "linux",
+                "acceptInsecureCerts": False, "pageLoadStrategy": "normal",
+            }}
+
+        if len(parts) < 2 or parts[0] != "session" or parts[1] not in self.sessions:
+            raise WebDriverError(404, "invalid session id", "Unknown session")
+        session = self.sessions[parts[1]]
+        rest = parts[2:]
+
+        if not rest and method == "DELETE":
+            del self.sessions[session.id]
+            return None
+        if rest == ["timeouts"]:
+            return None
+        if rest == ["url"]:
+            if method == "POST":
+                session.url = body["url"]
+                session.tree = html.fromstring(self.pages(session.url))
+                session.elements = {}
+                return None
+            return session.url
+        if rest == ["title"]:
+            titles = session.tree.xpath("//title") if session.tree is not None else []
+            return titles[0].text_content() if titles else ""
+        if rest == ["window"]:
+            return "window-1"
+        if rest in (["element"], ["elements"]):
+            found = self._find(session, session.tree, body["using"], body["value"])
+            return self._found(session, rest[0], found, body["value"])
+        if rest == ["execute", "sync"]:
+            return self._execute(session, body.get("script", ""), body.get("args", []))
+
+        if len(rest) >= 3 and rest[0] == "element":
+            element = self._element(session, rest[1])
+            action = rest[2:]
+            if action in (["element"], ["elements"]):
+                found = self._find(session, element, body["using"], body["value"])
+                return self._found(session, action[0], found, body["value"])
+            if action == ["text"]:
+                return self._text(element)
+            if len(action) == 2 and action[0] in ("attribute", "property"):
+                return self._attribute(session, element, action[1])
+
+        raise WebDriverError(404, "unknown command", f"{method} /{'/'.join(parts)}")
+
+    def _found(self, session: _Session, kind: str, found: list, selector: str):
+        if kind == "elements":
+            return [session.ref(element) for element in found]
+        if not found:
+            raise WebDriverError(404, "no such element", f"Unable to locate element: {selector}")
+        return session.ref(found[0])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        parts = [part for part in scope["path"].split("/") if part]
+        if parts[:2] == ["wd", "hub"]:
+            parts = parts[2:]
+        method = scope["method"]
+        self.commands[(method, parts[2] if len(parts) > 2 else parts[0] if parts else "")] += 1
+        if self.command_latency > 0:
+            await asyncio.sleep(self.command_latency)
+
+        try:
+            status, value = 200, await self._handle(method, parts, json.loads(body) if body else {})
+        except WebDriverError as e:
+            status, value = e.status, {"error": e.error, "message": e.message, "stacktrace": ""}
+
+        payload = json.dumps({"value": value}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json; charset=utf-8"), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,394 @@
+"""
+The benchmark suite: every scenario in one run, written as JSON and compared
+against a stored baseline.
+
+    python -m benchmarks.run                                  # full profile, compare with baseline.json
+    python -m benchmarks.run --quick --save-baseline          # record a baseline
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.run --scenarios search_1m
+
+Scenarios, all offline (stub sites, the fake WebDriver and BENCH_REDIS_URL or
+fakeredis, see ``common.py``):
+
+* ``scrape``             - a full ``BookScraper.scrape()`` of the stub books site, per page latency
+* ``headlines_http``     - ``fetch_top_stories`` of the HTTP backend against the stub Hacker News
+* ``headlines_selenium`` - ``fetch_top_stories`` of the Selenium backend against the fake WebDriver
+* ``search_1k`` .. ``search_1m`` - ``/books/search`` through the ASGI app, catalogue cache off
+* ``api_load``           - concurrent mixed search, categories and headlines calls, caches on
+
+Each scenario runs in a fresh process, so its peak RSS (``ru_maxrss`` of
+that process) is its own. With fakeredis the stored books live in that
+process and count towards it; use BENCH_REDIS_URL for the 1M books search.
+
+A scenario regresses when its throughput drops, or its p95 latency or peak
+RSS grows, by more than ``--tolerance`` against the baseline; the run then
+exits with status 1. Baselines are machine specific: record one on the
+machine that runs the suite before deploys.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import argparse
+import platform
+import itertools
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+import httpx
+
+from benchmarks.common import ServerThread, percentile, seed_books, use_local_redis
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.stubs import BooksSite, HackerNewsSite
+
+import main
+from core.config import settings
+from services import catalogue_cache, headline_cache
+from services.parse_pool import shutdown_parse_pool
+from services.scrape_book import BookScraper
+from services.scrape_hn import HackerNewsScraper
+from services.scrape_hn_http import HackerNewsHttpScraper, close_hn_client
+from services.webdriver_pool import WebDriverPool
+from utils import fast_json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(HERE, "results.json")
+
+SEARCH_SIZES = {"1k": 1000, "10k": 10000, "100k": 100000, "1m": 1000000}
+
+PROFILES = {
+    "full": {
+        "scrape": {"books": 2000, "latency": 0.002, "rounds": 2},
+        "headlines_http": {"pages": 3, "rounds": 50, "latency": 0.01},
+        "headlines_selenium": {"pages": 1, "rounds": 20, "command_latency": 0.002},
+        "search": {"sizes": ["1k", "100k", "1m"], "requests": 2000, "concurrency": 20, "limit": 50},
+        "api_load": {"books": 10000, "requests": 5000, "concurrency": 100, "limit": 50, "latency": 0.05},
+    },
+    "quick": {
+        "scrape": {"books": 300, "latency": 0.002, "rounds": 1},
+        "headlines_http": {"pages": 1, "rounds": 20, "latency": 0.01},
+        "headlines_selenium": {"pages": 1, "rounds": 5, "command_latency": 0.002},
+        "search": {"sizes": ["1k", "10k"], "requests": 500, "concurrency": 20, "limit": 50},
+        "api_load": {"books": 1000, "requests": 1000, "concurrency": 50, "limit": 50, "latency": 0.05},
+    },
+}
+
+# Metric, and whether a higher value is better
+COMPARED = (("throughput", True), ("p95_ms", False), ("peak_rss_mb", False))
+
+
+def configure_scrape(site_url: str, books: int) -> None:
+    settings.book_base_url = site_url
+    settings.max_books = books
+    settings.min_books = books
+    settings.max_price = 1000.0
+    settings.rate_limit_per_second = 1000.0
+    settings.rate_limit_burst = 100
+    settings.per_host_concurrency = 8
+    settings.catalogue_gc_delay = 0.1
+
+
+async def scrape(params: dict) -> dict:
+    redis = use_local_redis()
+    site = BooksSite(books=params["books"], latency=params["latency"])
+    timings = []
+    elapsed = 0.0
+    with ServerThread(site) as server:
+        configure_scrape(server.url, params["books"])
+        try:
+            for _ in range(params["rounds"]):
+                await redis.flushdb()
+                scraper = BookScraper()
+                handle_task = scraper._handle_task
+
+                async def timed(task):
+                    started = time.perf_counter()
+                    try:
+                        return await handle_task(task)
+                    finally:
+                        timings.append((time.perf_counter() - started) * 1000)
+
+                scraper._handle_task = timed
+                started = time.perf_counter()
+                stored = await scraper.scrape(incremental=False)
+                elapsed += time.perf_counter() - started
+                if scraper.gc_task:
+                    await scraper.gc_task
+                assert stored == params["books"], f"scraped {stored} of {params['books']} books"
+        finally:
+            shutdown_parse_pool()
+    return {"throughput": params["books"] * params["rounds"] / elapsed, "unit": "books/s", "latencies_ms": timings}
+
+
+async def headlines_http(params: dict) -> dict:
+    site = HackerNewsSite(latency=params["latency"])
+    timings = []
+    with ServerThread(site) as server:
+        settings.hnews_site_url = server.url + "news"
+        scraper = HackerNewsHttpScraper()
+        try:
+            for _ in range(params["rounds"]):
+                started = time.perf_counter()
+                stories = await scraper.fetch_top_stories(params["pages"])
+                timings.append((time.perf_counter() - started) * 1000)
+                assert len(stories) == params["pages"] * 30
+        finally:
+            await close_hn_client()
+    return {"throughput": 1000 * len(timings) / sum(timings), "unit": "calls/s", "latencies_ms": timings}
+
+
+def _selenium_rounds(pool: WebDriverPool, params: dict) -> list:
+    timings = []
+    for _ in range(params["rounds"]):
+        started = time.perf_counter()
+        stories = HackerNewsScraper(pool=pool).fetch_top_stories(params["pages"])
+        timings.append((time.perf_counter() - started) * 1000)
+        assert len(stories) == params["pages"] * 30
+    return timings
+
+
+async def headlines_selenium(params: dict) -> dict:
+    fake = FakeWebDriver(session_startup=0.0, command_latency=params["command_latency"])
+    settings.hnews_site_url = "https://news.ycombinator.com/news"
+    with ServerThread(fake) as server:
+        settings.selenium_command_executor = server.url + "wd/hub"
+        pool = WebDriverPool(HackerNewsScraper._create_driver_instance, size=1, max_uses=1000, acquire_timeout=60)
+        pool.warm(1)
+        try:
+            timings = await asyncio.to_thread(_selenium_rounds, pool, params)
+        finally:
+            pool.close()
+    return {"throughput": 1000 * len(timings) / sum(timings), "unit": "calls/s", "latencies_ms": timings}
+
+
+def book_searches(limit: int) -> list:
+    return [
+        {"limit": limit},
+        {"limit": limit, "category": "science"},
+        {"limit": limit, "category": "science,history", "max_price": 40},
+        {"limit": limit, "q": "kaka"},
+        {"limit": limit, "sort": "title", "offset": limit},
+        {"limit": limit, "sort": "price", "order": "desc"},
+    ]
+
+
+async def load(client: httpx.AsyncClient, calls: list, count: int, concurrency: int) -> dict:
+    """Send `count` of `calls` (path, params) cycling, `concurrency` at a time"""
+    pending = itertools.islice(itertools.cycle(calls), count)
+    timings = []
+
+    async def worker():
+        for path, params in pending:
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            timings.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+
+    # Warm up, then measure
+    for path, params in calls:
+        (await client.get(path, params=params)).raise_for_status()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"throughput": count / (time.perf_counter() - started), "unit": "req/s", "latencies_ms": timings}
+
+
+async def search(params: dict) -> dict:
+    use_local_redis()
+    settings.catalogue_cache_books = 0
+    await seed_books(params["books"])
+    calls = [("/books/search", query) for query in book_searches(params["limit"])]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+        return await load(client, calls, params["requests"], params["concurrency"])
+
+
+async def api_load(params: dict) -> dict:
+    use_local_redis()
+    await seed_books(params["books"])
+    settings.hnews_backend = "http"
+    settings.hnews_selenium_fallback = False
+    settings.headlines_cache_ttl = 30
+    settings.headlines_cache_redis = False
+    headline_cache._cache = None
+    calls = [("/books/search", query) for query in book_searches(params["limit"])]
+    calls += [("/books/categories", {}), ("/headlines", {})]
+
+    site = HackerNewsSite(latency=params["latency"])
+    with ServerThread(site) as server:
+        settings.hnews_site_url = server.url + "news"
+        transport = httpx.ASGITransport(app=main.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+                result = await load(client, calls, params["requests"], params["concurrency"])
+        finally:
+            await catalogue_cache.shutdown_catalogue_cache()
+            await close_hn_client()
+    return {**result, "upstream_fetches": site.requests}
+
+
+SCENARIOS = {
+    "scrape": scrape,
+    "headlines_http": headlines_http,
+    "headlines_selenium": headlines_selenium,
+    **{f"search_{label}": search for label in SEARCH_SIZES},
+    "api_load": api_load,
+}
+
+
+def scenario_params(profile: dict, name: str) -> dict:
+    if name.startswith("search_"):
+        return {**profile["search"], "books": SEARCH_SIZES[name[len("search_"):]]}
+    return profile[name]
+
+
+def profile_scenarios(profile: dict) -> list:
+    names = ["scrape", "headlines_http", "headlines_selenium"]
+    names += [f"search_{label}" for label in profile["search"]["sizes"]]
+    return names + ["api_load"]
+
+
+def peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _child(name: str, params: dict, results) -> None:
+    try:
+        started = time.perf_counter()
+        result = asyncio.run(SCENARIOS[name](params))
+        timings = result.pop("latencies_ms")
+        results.put({
+            **result,
+            "operations": len(timings),
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "p99_ms": percentile(timings, 99),
+            "peak_rss_mb": peak_rss_mb(),
+            "wall_s": time.perf_counter() - started,
+        })
+    except BaseException as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        raise
+
+
+def run_scenario(name: str, params: dict) -> dict:
+    """Run one scenario in a fresh process and return its metrics"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_child, args=(name, params, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                result = {"error": f"the scenario process exited with code {process.exitcode}"}
+                break
+    process.join()
+    return {"params": params, **result}
+
+
+def metadata(profile: str) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "profile": profile,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "redis": "redis" if os.environ.get("BENCH_REDIS_URL") else "fakeredis",
+        "json_encoder": "orjson" if fast_json.orjson else "json",
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Rows of (scenario, metric, baseline, current, change, regressed)"""
+    rows = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or "error" in previous or "error" in result:
+            continue
+        for metric, higher_is_better in COMPARED:
+            before, now = previous.get(metric), result.get(metric)
+            if not before or now is None:
+                continue
+            change = (now - before) / before
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            rows.append((name, metric, before, now, change, regressed))
+    return rows
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller scales, for a smoke run")
+    parser.add_argument("--scenarios", help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline as well")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before a regression")
+    args = parser.parse_args()
+
+    profile_name = "quick" if args.quick else "full"
+    profile = PROFILES[profile_name]
+    names = args.scenarios.split(",") if args.scenarios else profile_scenarios(profile)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        print(f"running {name} ...", flush=True)
+        results[name] = run_scenario(name, scenario_params(profile, name))
+
+    report = {"meta": metadata(profile_name), "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'scenario':<19} {'throughput':>16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak RSS MB':>12}")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<19} FAILED: {r['error']}")
+            continue
+        rate = f"{r['throughput']:.0f} {r['unit']}"
+        print(f"{name:<19} {rate:>16} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['peak_rss_mb']:>12.1f}")
+    print(f"results written to {args.output}")
+
+    failed = any("error" in r for r in results.values())
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for key in ("profile", "redis"):
+            if baseline["meta"].get(key) != report["meta"][key]:
+                print(f"warning: the baseline was recorded with {key} {baseline['meta'].get(key)}, this run used {report['meta'][key]}")
+        rows = compare(results, baseline["results"], args.tolerance)
+        print(f"\ncompared with {args.baseline} (commit {baseline['meta'].get('commit')}, tolerance {args.tolerance:.0%})")
+        print(f"{'scenario':<19} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}")
+        for name, metric, before, now, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<19} {metric:<12} {before:>10.2f} {now:>10.2f} {change:>+8.1%}{flag}")
+        failed = failed or any(row[-1] for row in rows)
+    elif args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+    else:
+        print(f"no baseline at {args.baseline}, record one with --save-baseline")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_()
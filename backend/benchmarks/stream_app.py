@@ -0,0 +1,32 @@
+"""
+The API app as served by bench_search_stream, plus the buffered search it is
+compared against: every match loaded into one list, validated into a
+BookSearchResponse and serialized at once (what /books/search did before
+streaming, without its page size cap). Imported by uvicorn in a separate
+process, so the Redis connection comes from BENCH_REDIS_URL.
+"""
+import time
+
+from benchmarks.common import use_local_redis
+
+from main import app
+from services.catalogue_cache import get_catalogue_cache
+from utils.schemas import BookSearchResponse
+
+use_local_redis()
+
+
+@app.get("/bench/buffered", response_model=BookSearchResponse)
+async def buffered_search(offset: int = 0):
+    repository = get_catalogue_cache().repository
+    total = (await repository.get_books(limit=1))[1]
+    books, total = await repository.get_books(limit=max(1, total), offset=offset)
+    return BookSearchResponse(
+        success=True,
+        count=len(books),
+        total=total,
+        limit=total,
+        offset=offset,
+        books=books,
+        timestamp=int(time.time())
+    )
@@ -0,0 +1,392 @@
+"""
+Local stub sites used by the benchmarks.
+
+``BooksSite`` serves a synthetic books.toscrape-style catalogue: an
+``index.html`` listing page, ``catalogue/page-N.html`` listing pages and one
+detail page per book, with the same markup the scraper's selectors expect.
+Responses carry an ETag and Last-Modified header and honour
+``If-None-Match`` with a 304, like a typical static origin.
+
+``HackerNewsSite`` serves news.ycombinator.com-style listing pages with the
+same ``tr.athing`` / subtext row markup as the real site.
+
+``FlakyOrigin`` wraps either one as an origin that throttles and slows down.
+"""
+import zlib
+import random
+import asyncio
+from html import escape
+from typing import Dict, List
+
+CATEGORIES = [
+    "Travel", "Mystery", "Historical Fiction", "Sequential Art", "Classics",
+    "Philosophy", "Romance", "Womens Fiction", "Fiction", "Childrens",
+    "Religion", "Nonfiction", "Music", "Science Fiction", "Sports and Games",
+    "Fantasy", "Science", "Poetry", "History", "Horror",
+]
+
+_FILLER = (
+    "<p>It is a truth universally acknowledged that a synthetic catalogue in "
+    "possession of many pages must be in want of a crawler. </p>"
+)
+
+
+def _slug(text: str) -> str:
+    return "-".join(text.lower().split())
+
+
+def book_title(book_id: int) -> str:
+    return f"Synthetic Book Number {book_id}"
+
+
+def book_price(book_id: int) -> float:
+    return round(10 + (book_id * 7919 % 4000) / 100, 2)
+
+
+def book_category(book_id: int) -> str:
+    return CATEGORIES[book_id % len(CATEGORIES)]
+
+
+def _book_path(book_id: int) -> str:
+    return f"{_slug(book_title(book_id))}_{book_id}/index.html"
+
+
+def _sidebar() -> str:
+    items = "".join(
+        f'<li><a href="catalogue/category/books/{_slug(name)}_{i}/index.html">{name}</a></li>'
+        for i, name in enumerate(CATEGORIES, start=2)
+    )
+    return f'<aside class="sidebar col-sm-4 col-md-3"><div class="side_categories"><ul class="nav nav-list">{items}</ul></div></aside>'
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        '<!DOCTYPE html>\n<html lang="en-us" class="no-js">\n<head>\n'
+        '<meta http-equiv="content-type" content="text/html; charset=UTF-8" />\n'
+        f'<title>{title} | Books to Scrape - Sandbox</title>\n'
+        '<link rel="stylesheet" type="text/css" href="static/oscar/css/styles.css" />\n'
+        '</head>\n<body id="default" class="default">\n'
+        '<header class="header container-fluid"><div class="page_inner"><div class="row">'
+        '<div class="col-sm-8 h1"><a href="index.html">Books to Scrape</a></div></div></div></header>\n'
+        f'<div class="container-fluid page"><div class="page_inner">{body}</div></div>\n'
+        '<footer class="footer container-fluid"></footer>\n</body>\n</html>\n'
+    )
+
+
+class BooksSite:
+    """ASGI app serving a books.toscrape-style catalogue of `books` books"""
+
+    def __init__(self, books: int = 1000, per_page: int = 20, latency: float = 0.0):
+        self.books = books
+        self.per_page = per_page
+        self.latency = latency
+        self.price_overrides: Dict[int, float] = {}
+        self.requests = 0
+        self.bytes_sent = 0
+        self.status_counts: Dict[int, int] = {}
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.bytes_sent = 0
+        self.status_counts = {}
+
+    def price(self, book_id: int) -> float:
+        return self.price_overrides.get(book_id, book_price(book_id))
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.books // self.per_page))
+
+    def _book_ids(self, page: int) -> List[int]:
+        start = (page - 1) * self.per_page + 1
+        return list(range(start, min(self.books, start + self.per_page - 1) + 1))
+
+    def listing_html(self, page: int) -> str:
+        """Listing page `page`; page 1 is served at /index.html"""
+        prefix = "catalogue/" if page == 1 else ""
+        pods = []
+        for book_id in self._book_ids(page):
+            title = book_title(book_id)
+            href = prefix + _book_path(book_id)
+            pods.append(
+                '<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">'
+                f'<div class="image_container"><a href="{href}"><img src="media/cache/{book_id}.jpg" alt="{title}" class="thumbnail"></a></div>'
+                '<p class="star-rating Three"><i class="icon-star"></i></p>'
+                f'<h3><a href="{href}" title="{title}">{title[:20]}...</a></h3>'
+                f'<div class="product_price"><p class="price_color">£{self.price(book_id):.2f}</p>'
+                '<p class="instock availability"><i class="icon-ok"></i> In stock</p></div>'
+                '</article></li>'
+            )
+        pager = [f'<li class="current">Page {page} of {self.pages}</li>']
+        if page < self.pages:
+            pager.append(f'<li class="next"><a href="{prefix}page-{page + 1}.html">next</a></li>')
+        body = (
+            '<ul class="breadcrumb"><li><a href="index.html">Home</a></li><li class="active">All products</li></ul>'
+            f'<div class="row">{_sidebar()}<div class="col-sm-8 col-md-9"><section>'
+            f'<ol class="row">{"".join(pods)}</ol>'
+            f'<div><ul class="pager">{"".join(pager)}</ul></div></section></div></div>'
+        )
+        return _page("All products", body)
+
+    def detail_html(self, book_id: int) -> str:
+        title = book_title(book_id)
+        category = book_category(book_id)
+        body = (
+            '<ul class="breadcrumb">'
+            '<li><a href="../../index.html">Home</a></li>'
+            '<li><a href="../category/books_1/index.html">Books</a></li>'
+            f'<li><a href="../category/books/{_slug(category)}_2/index.html">{category}</a></li>'
+            f'<li class="active">{title}</li></ul>'
+            '<article class="product_page"><div class="row">'
+            '<div class="col-sm-6"><div id="product_gallery" class="carousel"><div class="thumbnail">'
+            f'<div class="carousel-inner"><div class="item active"><img src="../../media/cache/{book_id}.jpg" alt="{title}" /></div></div>'
+            '</div></div></div>'
+            f'<div class="col-sm-6 product_main"><h1>{title}</h1>'
+            f'<p class="price_color">£{self.price(book_id):.2f}</p>'
+            '<p class="instock availability"><i class="icon-ok"></i> In stock (22 available)</p></div></div>'
+            f'<div id="product_description" class="sub-header"><h2>Product Description</h2></div><p>{_FILLER * 8}</p>'
+            '<table class="table table-striped">'
+            f'<tr><th>UPC</th><td>{book_id:016x}</td></tr><tr><th>Product Type</th><td>Books</td></tr>'
+            f'<tr><th>Price (excl. tax)</th><td>£{self.price(book_id):.2f}</td></tr></table>'
+            '</article>'
+        )
+        return _page(title, body)
+
+    def render(self, path: str):
+        """Return (status, html) for a request path"""
+        path = path.lstrip("/")
+        if path in ("", "index.html"):
+            return 200, self.listing_html(1)
+        if path.startswith("catalogue/"):
+            rest = path[len("catalogue/"):]
+            if rest.startswith("page-") and rest.endswith(".html"):
+                try:
+                    page = int(rest[len("page-"):-len(".html")])
+                except ValueError:
+                    return 404, ""
+                if 1 <= page <= self.pages:
+                    return 200, self.listing_html(page)
+            elif rest.endswith("/index.html"):
+                try:
+                    book_id = int(rest[:-len("/index.html")].rsplit("_", 1)[1])
+                except (IndexError, ValueError):
+                    return 404, ""
+                if 1 <= book_id <= self.books:
+                    return 200, self.detail_html(book_id)
+        return 404, ""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        status, html = self.render(scope["path"])
+        body = html.encode("utf-8")
+        headers = [
+            # books.toscrape.com does not advertise a charset in the header
+            (b"content-type", b"text/html"),
+            (b"last-modified", b"Thu, 01 Jan 2026 00:00:00 GMT"),
+        ]
+        if status == 200:
+            etag = f'"{zlib.crc32(body):08x}"'.encode()
+            headers.append((b"etag", etag))
+            if dict(scope["headers"]).get(b"if-none-match") == etag:
+                status, body = 304, b""
+
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self.bytes_sent += len(body)
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+HN_TITLES = [
+    "Show HN: A tiny key-value store in 500 lines of Rust",
+    "The unreasonable effectiveness of SQLite",
+    "Ask HN: What are you working on this month?",
+    "Why we moved our CI from YAML to Python & back",
+    "Café owners are using LLMs to write menus",
+    "A deep dive into Linux io_uring",
+    "Launch HN: Frodo (YC W26) – Scraping for agents",
+]
+
+
+def hn_story(index: int) -> dict:
+    """Deterministic story `index` (0-based) of the synthetic front page"""
+    item_id = 40_000_000 + index
+    kind = index % 15
+    story = {
+        "id": item_id,
+        "rank": index + 1,
+        "title": f"{HN_TITLES[index % len(HN_TITLES)]} ({index})",
+        "href": f"https://example{index % 9}.com/articles/{item_id}",
+        "score": (index * 37) % 500 + 1,
+        "comments": (index * 13) % 300,
+        "age": f"{index % 23 + 1} hours ago",
+        "by": f"user{index % 50}",
+    }
+    if kind == 2:
+        # Ask HN posts link to the item page itself
+        story["href"] = f"item?id={item_id}"
+    elif kind == 14:
+        # Job posts have no score and no comments
+        story["score"] = None
+        story["title"] = f"Frodo (YC W26) is hiring backend engineers ({index})"
+    return story
+
+
+def _hn_row(story: dict) -> str:
+    item_id = story["id"]
+    title = escape(story["title"])
+    href = escape(story["href"])
+    sitebit = ""
+    if not story["href"].startswith("item?"):
+        site = story["href"].split("/")[2]
+        sitebit = f'<span class="sitebit comhead"> (<a href="from?site={site}"><span class="sitestr">{site}</span></a>)</span>'
+    if story["score"] is None:
+        subline = (
+            f'<span class="age" title="2026-10-17T10:00:00"><a href="item?id={item_id}">{story["age"]}</a></span> '
+            f'| <a href="hide?id={item_id}&amp;goto=news">hide</a>'
+        )
+    else:
+        subline = (
+            f'<span class="subline"><span class="score" id="score_{item_id}">{story["score"]} points</span> '
+            f'by <a href="user?id={story["by"]}" class="hnuser">{story["by"]}</a> '
+            f'<span class="age" title="2026-10-17T10:00:00"><a href="item?id={item_id}">{story["age"]}</a></span> '
+            f'<span id="unv_{item_id}"></span> | <a href="hide?id={item_id}&amp;goto=news">hide</a> | '
+            f'<a href="item?id={item_id}">{story["comments"]}&nbsp;comments</a> </span>'
+        )
+    return (
+        f'<tr class="athing submission" id="{item_id}">'
+        f'<td align="right" valign="top" class="title"><span class="rank">{story["rank"]}.</span></td>'
+        f'<td valign="top" class="votelinks"><center><a id="up_{item_id}" href="vote?id={item_id}&amp;how=up&amp;goto=news">'
+        '<div class="votearrow" title="upvote"></div></a></center></td>'
+        f'<td class="title"><span class="titleline"><a href="{href}">{title}</a>{sitebit}</span></td></tr>\n'
+        f'<tr><td colspan="2"></td><td class="subtext">{subline}</td></tr>\n'
+        '<tr class="spacer" style="height:5px"></tr>\n'
+    )
+
+
+def hn_story_at(index: int, tick: int) -> dict:
+    """Story `index` of the front page after `tick` updates: one new story per tick, scores growing"""
+    story = hn_story(index + tick)
+    story["rank"] = index + 1
+    if story["score"] is not None:
+        story["score"] += tick * (index % 7)
+    return story
+
+
+def hn_page_html(page: int, per_page: int = 30, tick: int = 0) -> str:
+    """A Hacker News-style listing page with the same row markup as the real site"""
+    start = (page - 1) * per_page
+    rows = "".join(_hn_row(hn_story_at(i, tick)) for i in range(start, start + per_page))
+    return (
+        '<html lang="en" op="news"><head><meta name="referrer" content="origin">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+        '<link rel="stylesheet" type="text/css" href="news.css"><title>Hacker News</title></head>'
+        '<body><center><table id="hnmain" border="0" cellpadding="0" cellspacing="0" width="85%" bgcolor="#f6f6ef">\n'
+        '<tr><td bgcolor="#ff6600"><table border="0" cellpadding="0" cellspacing="0" width="100%"><tr>'
+        '<td style="line-height:12pt; height:10px;"><span class="pagetop"><b class="hnname"><a href="news">Hacker News</a></b>'
+        ' <a href="newest">new</a> | <a href="front">past</a> | <a href="newcomments">comments</a></span></td>'
+        '</tr></table></td></tr>\n'
+        f'<tr id="bigbox"><td><table border="0" cellpadding="0" cellspacing="0">\n{rows}'
+        '<tr class="morespace" style="height:10px"></tr>'
+        f'<tr><td colspan="2"></td><td class="title"><a href="?p={page + 1}" class="morelink" rel="next">More</a></td></tr>\n'
+        '</table></td></tr></table></center></body></html>\n'
+    )
+
+
+class HackerNewsSite:
+    """
+    ASGI app serving Hacker News-style listing pages at /news?p=N; advance()
+    changes the front page and `down` makes every request a 503.
+    """
+
+    def __init__(self, per_page: int = 30, latency: float = 0.0):
+        self.per_page = per_page
+        self.latency = latency
+        self.requests = 0
+        self.tick = 0
+        self.down = False
+
+    def advance(self) -> None:
+        self.tick += 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        page = 1
+        for pair in scope.get("query_string", b"").decode().split("&"):
+            if pair.startswith("p=") and pair[2:].isdigit():
+                page = int(pair[2:])
+        status = 200 if scope["path"] == "/news" else 404
+        if self.down:
+            status = 503
+        body = hn_page_html(page, self.per_page, self.tick).encode("utf-8") if status == 200 else b""
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/html; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class FlakyOrigin:
+    """
+    ASGI wrapper making a stub site behave like a struggling origin.
+
+    Beyond `capacity` concurrent requests it answers 429 with a Retry-After
+    of `retry_after` seconds. Of the requests it accepts, `error_rate` get a
+    503 and `spike_rate` are delayed by another `spike_latency` seconds.
+    The random choices are seeded, so runs are repeatable.
+    """
+
+    def __init__(self, site, capacity: int = 4, retry_after: int = 1, error_rate: float = 0.0,
+                 spike_rate: float = 0.0, spike_latency: float = 1.0, seed: int = 0):
+        self.site = site
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.spike_rate = spike_rate
+        self.spike_latency = spike_latency
+        self.rng = random.Random(seed)
+        self.in_flight = 0
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.spikes = 0
+
+    async def _reply(self, send, status: int, headers: list) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers + [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        if self.in_flight >= self.capacity:
+            self.throttled += 1
+            await self._reply(send, 429, [(b"retry-after", str(self.retry_after).encode())])
+            return
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            await self._reply(send, 503, [])
+            return
+
+        self.in_flight += 1
+        try:
+            if self.rng.random() < self.spike_rate:
+                self.spikes += 1
+                await asyncio.sleep(self.spike_latency)
+            await self.site(scope, receive, send)
+        finally:
+            self.in_flight -= 1